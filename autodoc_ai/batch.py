@@ -0,0 +1,313 @@
+"""
+Offline batch execution: submit, poll and apply.
+
+Provider batch endpoints trade latency for price and throughput, which suits nightly
+whole-repo passes. A batch run works in three phases:
+
+1. submit: the processors run as usual, but every LLM request that misses the response
+   cache is recorded into a job instead of being sent (RecordingLLMService) and nothing
+   is applied. The job is written to `<cache_dir>/batches/<job_id>.json` and handed to a
+   BatchBackend.
+2. poll: the backend is asked for the job's status; once it has finished, its answers are
+   stored in the response cache under the same keys the processors will look up.
+3. apply: the original run is repeated with the recorded options. Every request is now a
+   cache hit, so edits reach CodeTransformer exactly as in an interactive run. Anything
+   the batch did not answer (e.g. a follow-up request that only became necessary after an
+   answer arrived) is made live.
+
+All job state lives on disk, so each phase can run in a different process.
+"""
+
+import abc
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .cache import DEFAULT_CACHE_DIR, ResponseCache
+from .llm_services import ILLMService, LLMServiceWrapper, chat_generation_args, generation_profile
+from .prompts import RESPONSE_SCHEMAS, chat_messages
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+# Job statuses: submitted -> completed (answers cached) or failed
+STATUS_SUBMITTED = "submitted"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+
+class BatchRecorder:
+    """Collects the LLM requests of a submit run, one entry per distinct cache key."""
+
+    def __init__(self):
+        self.requests: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, task: str, prompt: str,
+               generation: Optional[Dict[str, Any]] = None) -> None:
+        key = ResponseCache.make_key(provider, model, task, prompt, generation)
+        with self._lock:
+            self.requests.setdefault(key, {"key": key, "provider": provider, "model": model,
+                                           "task": task, "prompt": prompt})
+
+
+class RecordingLLMService(LLMServiceWrapper):
+    """
+    Stands in for a provider during a submit run: requests are recorded, not sent, and
+    answered with an empty response so processors skip them without editing anything.
+    """
+
+    def __init__(self, inner: ILLMService, recorder: BatchRecorder):
+        super().__init__(inner)
+        self.recorder = recorder
+
+    def _generation(self, task: str) -> Dict[str, Any]:
+        # Keyed like CachedLLMService, so apply finds the answers under the same keys
+        return generation_profile(getattr(self, "generation", None), task)
+
+    def _complete(self, prompt: str, task: str) -> str:
+        self.recorder.record(self.provider, self.model, task, prompt, self._generation(task))
+        return ""
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        self.recorder.record(self.provider, self.model, task, prompt, self._generation(task))
+        return iter(())
+
+
+def build_batch_lines(requests: List[Dict[str, str]],
+                      generation: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Formats recorded requests as chat-completion batch input lines (OpenAI/Groq batch format),
+    with each task's generation profile (`generation` overrides the built-in ones).
+    Tasks answering with a JSON object use JSON mode, which both batch APIs accept.
+    """
+    lines = []
+    for request in requests:
+        body: Dict[str, Any] = {"model": request["model"], "messages": chat_messages(request["prompt"]),
+                                **chat_generation_args(generation, request["task"])}
+        if request.get("task") in RESPONSE_SCHEMAS:
+            body["response_format"] = {"type": "json_object"}
+        lines.append({"custom_id": request["key"], "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+    return lines
+
+
+def parse_batch_output(text: str) -> Dict[str, str]:
+    """Reads a batch output file (one JSON result per line) into custom_id -> response text."""
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            body = (item.get("response") or {}).get("body") or {}
+            content = body["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            continue
+        if item.get("custom_id") and content:
+            results[item["custom_id"]] = content
+    return results
+
+
+class BatchBackend(abc.ABC):
+    """Somewhere a list of recorded requests can be submitted and later collected."""
+    name: str = ""
+
+    @abc.abstractmethod
+    def submit(self, requests: List[Dict[str, str]]) -> str:
+        """Submits the requests and returns the backend's job id."""
+        pass
+
+    @abc.abstractmethod
+    def poll(self, backend_job_id: str) -> str:
+        """Returns STATUS_SUBMITTED while the job runs, then STATUS_COMPLETED or STATUS_FAILED."""
+        pass
+
+    @abc.abstractmethod
+    def results(self, backend_job_id: str) -> Dict[str, str]:
+        """Returns the answers of a completed job as cache key -> response text."""
+        pass
+
+
+class LocalBatchBackend(BatchBackend):
+    """
+    A file-based stand-in for a provider batch API, for tests and offline dry runs.
+
+    Jobs are directories holding `requests.jsonl`; the first poll after `delay_seconds`
+    answers every request with `responder` (by default the fake server's canned answers)
+    and writes `output.jsonl` in the provider output format.
+    """
+    name = "local"
+
+    def __init__(self, root: str, responder: Optional[Callable[[str], str]] = None, delay_seconds: float = 0.0):
+        self.root = root
+        self.responder = responder
+        self.delay_seconds = delay_seconds
+
+    def _dir(self, backend_job_id: str) -> str:
+        return os.path.join(self.root, backend_job_id)
+
+    def submit(self, requests: List[Dict[str, str]]) -> str:
+        backend_job_id = f"local-{uuid.uuid4().hex[:12]}"
+        os.makedirs(self._dir(backend_job_id), exist_ok=True)
+        with open(os.path.join(self._dir(backend_job_id), "requests.jsonl"), "w", encoding="utf-8") as f:
+            for line in build_batch_lines(requests):
+                f.write(json.dumps(line) + "\n")
+        return backend_job_id
+
+    def poll(self, backend_job_id: str) -> str:
+        job_dir = self._dir(backend_job_id)
+        output_path = os.path.join(job_dir, "output.jsonl")
+        requests_path = os.path.join(job_dir, "requests.jsonl")
+        if os.path.exists(output_path):
+            return STATUS_COMPLETED
+        if not os.path.exists(requests_path):
+            return STATUS_FAILED
+        if time.time() - os.path.getmtime(requests_path) < self.delay_seconds:
+            return STATUS_SUBMITTED
+
+        responder = self.responder
+        if responder is None:
+            from .fake_server import canned_response
+            responder = canned_response
+        with open(requests_path, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        with open(output_path + ".tmp", "w", encoding="utf-8") as f:
+            for line in lines:
+                prompt = "\n".join(message["content"] for message in line["body"]["messages"])
+                body = {"choices": [{"index": 0, "message": {"role": "assistant", "content": responder(prompt)}}]}
+                f.write(json.dumps({"custom_id": line["custom_id"],
+                                    "response": {"status_code": 200, "body": body}, "error": None}) + "\n")
+        os.replace(output_path + ".tmp", output_path)
+        return STATUS_COMPLETED
+
+    def results(self, backend_job_id: str) -> Dict[str, str]:
+        with open(os.path.join(self._dir(backend_job_id), "output.jsonl"), "r", encoding="utf-8") as f:
+            return parse_batch_output(f.read())
+
+
+class ProviderBatchBackend(BatchBackend):
+    """
+    The batch API of an OpenAI-compatible provider (OpenAI and Groq), driven through the
+    adapter's SDK client: upload a JSONL file, create a batch, poll it, download the output.
+    """
+    name = "provider"
+
+    # Provider batch states that mean the job is over without usable output
+    FAILED_STATES = {"failed", "expired", "cancelled", "cancelling"}
+
+    def __init__(self, client: Any, generation: Optional[Dict[str, Dict[str, Any]]] = None):
+        if not (hasattr(client, "files") and hasattr(client, "batches")):
+            raise ValueError("This provider's SDK has no batch API; use --batch-backend local or an OpenAI/Groq provider.")
+        self.client = client
+        self.generation = generation
+
+    def submit(self, requests: List[Dict[str, str]]) -> str:
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for line in build_batch_lines(requests, self.generation):
+                    f.write(json.dumps(line) + "\n")
+            with open(path, "rb") as f:
+                uploaded = self.client.files.create(file=f, purpose="batch")
+        finally:
+            os.remove(path)
+        batch = self.client.batches.create(input_file_id=uploaded.id, endpoint=BATCH_ENDPOINT,
+                                           completion_window="24h")
+        return batch.id
+
+    def poll(self, backend_job_id: str) -> str:
+        status = self.client.batches.retrieve(backend_job_id).status
+        if status == "completed":
+            return STATUS_COMPLETED
+        if status in self.FAILED_STATES:
+            return STATUS_FAILED
+        return STATUS_SUBMITTED
+
+    def results(self, backend_job_id: str) -> Dict[str, str]:
+        batch = self.client.batches.retrieve(backend_job_id)
+        if not batch.output_file_id:
+            return {}
+        return parse_batch_output(self.client.files.content(batch.output_file_id).text)
+
+
+class BatchJobStore:
+    """Batch jobs as JSON files under `<cache_dir>/batches/`, so they survive process restarts."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.root = os.path.join(cache_dir, "batches")
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def create(self, backend: str, provider: str, model: str, requests: List[Dict[str, str]],
+               run_args: Dict[str, Any], base_url: Optional[str] = None) -> Dict[str, Any]:
+        """Returns a new, not yet saved, job for the recorded requests."""
+        return {
+            "id": time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6],
+            "created": time.time(),
+            "status": STATUS_SUBMITTED,
+            "backend": backend,
+            "backend_job_id": None,
+            "provider": provider,
+            "model": model,
+            "base_url": base_url,
+            "run_args": run_args,
+            "requests": requests,
+            "answered": 0,
+        }
+
+    def save(self, job: Dict[str, Any]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self._path(job["id"]) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, indent=2)
+        os.replace(tmp_path, self._path(job["id"]))
+
+    def load(self, job_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except OSError:
+            raise ValueError(f"Unknown batch job: {job_id}")
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Returns every job, newest first."""
+        if not os.path.isdir(self.root):
+            return []
+        jobs = []
+        for name in os.listdir(self.root):
+            if name.endswith(".json"):
+                try:
+                    jobs.append(self.load(name[:-len(".json")]))
+                except (ValueError, json.JSONDecodeError):
+                    continue
+        return sorted(jobs, key=lambda job: job.get("created", 0), reverse=True)
+
+
+def poll_job(job: Dict[str, Any], backend: BatchBackend, cache: ResponseCache, store: BatchJobStore) -> str:
+    """
+    Polls a submitted job. When the backend has finished, its answers are written to the
+    response cache (where the apply run will find them) and the job is marked completed.
+    Returns the job's status.
+    """
+    if job["status"] != STATUS_SUBMITTED:
+        return job["status"]
+
+    status = backend.poll(job["backend_job_id"])
+    if status == STATUS_COMPLETED:
+        answers = backend.results(job["backend_job_id"])
+        for request in job["requests"]:
+            answer = answers.get(request["key"])
+            if answer:
+                cache.put(request["key"], answer, provider=request["provider"], model=request["model"],
+                          task=request["task"])
+        job["answered"] = sum(1 for request in job["requests"] if answers.get(request["key"]))
+    if status != STATUS_SUBMITTED:
+        job["status"] = status
+        job["finished"] = time.time()
+        store.save(job)
+    return status
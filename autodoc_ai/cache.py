@@ -0,0 +1,263 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+
+Responses are stored one file per entry under a project-local directory, keyed on
+provider, model, task, the task's generation profile and a hash of the prompt, so re-running zenco over unchanged
+code does not pay for the same completions twice.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .telemetry import record_cache, record_coalesced
+from .llm_services import ILLMService, LLMServiceWrapper, VERDICT_PATTERN, VERDICT_TASKS, generation_profile
+
+DEFAULT_CACHE_DIR = ".zenco_cache"
+
+
+class ResponseCache:
+    """
+    A directory of cached completions with size/age-based LRU eviction.
+
+    Entries live in `<cache_dir>/responses/<key[:2]>/<key>.json`. Reads expire entries
+    older than `max_age_days`; a file's mtime is bumped on every hit, so pruning by oldest
+    mtime evicts the least recently used entries.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = 10000,
+                 max_age_days: float = 30):
+        self.root = os.path.join(cache_dir, "responses")
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider: str, model: str, task: str, prompt: str,
+                 generation: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Builds the content address for a request. `generation` is the task's resolved
+        generation profile, so answers made under other limits (e.g. truncated by a lower
+        max_tokens) are not served for it.
+        """
+        prompt_hash = hashlib.sha256(prompt.encode("utf8")).hexdigest()
+        raw = json.dumps([provider, model, task, prompt_hash, generation or {}], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for `key`, or None on a miss or expired entry."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf8") as f:
+                entry = json.load(f)
+            if time.time() - entry.get("created", 0) > self.max_age_seconds:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry.get("response")
+
+    def put(self, key: str, response: str, **metadata) -> None:
+        """Stores a response. Writes go through a temp file so readers never see partial JSON."""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf8") as f:
+                json.dump({"response": response, "created": time.time(), **metadata}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write LLM cache entry: {e}")
+
+    def prune(self) -> int:
+        """
+        Evicts expired entries, then the least recently used ones above `max_entries`.
+
+        Returns:
+            Number of entries removed.
+        """
+        if not os.path.isdir(self.root):
+            return 0
+
+        entries = []
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+
+        now = time.time()
+        expired = [path for mtime, path in entries if now - mtime > self.max_age_seconds]
+        live = sorted((e for e in entries if now - e[0] <= self.max_age_seconds), reverse=True)
+        overflow = [path for _, path in live[self.max_entries:]]
+
+        removed = 0
+        for path in expired + overflow:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters for the run summary."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def request_key(service: ILLMService, task: str, prompt: str) -> str:
+    """The cache key of a request sent through `service`, with the task's generation profile."""
+    return ResponseCache.make_key(service.provider, service.model, task, prompt,
+                                  generation_profile(getattr(service, "generation", None), task))
+
+
+class CachedLLMService(LLMServiceWrapper):
+    """Wraps any ILLMService and answers repeated requests from a ResponseCache."""
+
+    def __init__(self, inner: ILLMService, cache: ResponseCache):
+        super().__init__(inner)
+        self.cache = cache
+
+    def _complete(self, prompt: str, task: str) -> str:
+        key = request_key(self, task, prompt)
+        cached = self.cache.get(key)
+        record_cache(cached is not None)
+        if cached is not None:
+            return cached
+
+        response = self.inner._complete(prompt, task)
+        if response:
+            self.cache.put(key, response, provider=self.provider, model=self.model, task=task)
+        return response
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        key = request_key(self, task, prompt)
+        cached = self.cache.get(key)
+        record_cache(cached is not None)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        complete = False
+        stream = self.inner.stream_completion(prompt, task=task)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            complete = True
+        finally:
+            stream.close()
+            # A verdict read only up to its YES/NO word is still the whole answer
+            response = "".join(chunks)
+            is_verdict = task in VERDICT_TASKS and VERDICT_PATTERN.search(response.lower())
+            if response and (complete or is_verdict):
+                self.cache.put(key, response, provider=self.provider, model=self.model, task=task)
+
+
+class CoalescingLLMService(LLMServiceWrapper):
+    """
+    Single-flight for identical concurrent requests: while a request for one (provider, model,
+    task, generation profile, prompt) is in flight, the same request from other workers waits
+    for its answer instead of being sent again. The response cache only helps once that first
+    answer is in.
+
+    Waiting requests get the leader's response, or its error. A leader whose stream was
+    abandoned before the answer was complete leaves its followers to send their own request.
+    """
+
+    def __init__(self, inner: ILLMService):
+        super().__init__(inner)
+        self.coalesced = 0
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, prompt: str, task: str) -> Tuple[str, Future, bool]:
+        """Returns (key, future, leader): the in-flight future for the request, and whether this caller sends it."""
+        key = request_key(self, task, prompt)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return key, future, False
+            future = self._in_flight[key] = Future()
+            return key, future, True
+
+    def _finish(self, key: str, future: Future, response: Optional[str] = None,
+                error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(response)
+
+    def _complete(self, prompt: str, task: str) -> str:
+        key, future, leader = self._join(prompt, task)
+        if not leader:
+            response = future.result()
+            if response is not None:
+                record_coalesced()
+                return response
+            return self.inner._complete(prompt, task)
+
+        try:
+            response = self.inner._complete(prompt, task)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, response)
+        return response
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        key, future, leader = self._join(prompt, task)
+        if not leader:
+            response = future.result()
+            if response is not None:
+                record_coalesced()
+                yield response
+                return
+            yield from self.inner.stream_completion(prompt, task=task)
+            return
+
+        chunks = []
+        complete = False
+        stream = self.inner.stream_completion(prompt, task=task)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            complete = True
+        except BaseException as e:
+            # GeneratorExit means the caller stopped reading, not that the request failed
+            if not isinstance(e, GeneratorExit):
+                self._finish(key, future, error=e)
+            raise
+        finally:
+            stream.close()
+            if not future.done():
+                response = "".join(chunks)
+                is_verdict = task in VERDICT_TASKS and VERDICT_PATTERN.search(response.lower())
+                self._finish(key, future, response if complete or is_verdict else None)
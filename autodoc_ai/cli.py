@@ -2,9 +2,11 @@ import argparse
 import sys
 import os
 import getpass
+import time
 from pathlib import Path
 from textwrap import indent
 import traceback
+from typing import Optional
 from autodoc_ai.transformers import CodeTransformer
 from autodoc_ai.formatters import FormatterFactory
 from autodoc_ai.generators import GeneratorFactory, IDocstringGenerator
@@ -15,6 +17,21 @@ from autodoc_ai.processors import (
     MagicNumberProcessor
 )
 from .utils import get_source_files, get_git_changed_files
+from .concurrency import RequestEngine, set_deadline
+from .cache import DEFAULT_CACHE_DIR, ResponseCache
+from .batch import (
+    BatchJobStore,
+    BatchRecorder,
+    LocalBatchBackend,
+    ProviderBatchBackend,
+    STATUS_COMPLETED,
+    poll_job,
+)
+from .fingerprints import FingerprintStore
+from .dedup import FunctionDeduplicator
+from .telemetry import telemetry_scope
+from .http_clients import close_http_clients
+from .llm_services import circuit_breakers
 from .config import load_config
 from .parser import get_language_parser, get_language_queries, LANGUAGES
 from .transformers import CodeTransformer
@@ -85,14 +102,16 @@ def init_config():
     print("  2. OpenAI      - GPT-4, GPT-4o-mini (requires paid account)")
     print("  3. Anthropic   - Claude 3.5 Sonnet (requires paid account)")
     print("  4. Google      - Gemini Pro/Flash (free tier available)")
+    print("  5. Local       - Self-hosted OpenAI-compatible server (llama.cpp, vLLM, Ollama)")
     
-    provider_choice = input("\n[SELECT] Select your LLM provider (1-4) [default: 1]: ").strip() or "1"
+    provider_choice = input("\n[SELECT] Select your LLM provider (1-5) [default: 1]: ").strip() or "1"
     
     provider_map = {
         "1": ("groq", "GROQ_API_KEY", "GROQ_MODEL_NAME", "llama-3.3-70b-versatile"),
         "2": ("openai", "OPENAI_API_KEY", "OPENAI_MODEL_NAME", "gpt-4o-mini"),
         "3": ("anthropic", "ANTHROPIC_API_KEY", "ANTHROPIC_MODEL_NAME", "claude-3-5-sonnet-latest"),
         "4": ("gemini", "GEMINI_API_KEY", "GEMINI_MODEL_NAME", "gemini-1.5-pro"),
+        "5": ("local", "LOCAL_API_KEY", "LOCAL_MODEL_NAME", ""),
     }
     
     if provider_choice not in provider_map:
@@ -115,22 +134,31 @@ def init_config():
     elif provider_name == "gemini":
         print("[INFO] Get your API key at: https://aistudio.google.com/app/apikey")
     
-    api_key = getpass.getpass(f"\n[INPUT] Enter your {provider_name.upper()} API key (input hidden): ").strip()
+    extra_keys = {}
+    if provider_name == "local":
+        base_url = input("\n[INPUT] Enter the server's base URL [default: http://localhost:8000/v1]: ").strip()
+        extra_keys["LOCAL_BASE_URL"] = base_url or "http://localhost:8000/v1"
+        api_key = getpass.getpass("[INPUT] Enter the server's API key, if it requires one (input hidden): ").strip()
+    else:
+        api_key = getpass.getpass(f"\n[INPUT] Enter your {provider_name.upper()} API key (input hidden): ").strip()
     
-    if not api_key:
+    if not api_key and provider_name != "local":
         print("\n[ERROR] API key is required. Configuration cancelled.")
         return
     
     # Show confirmation with masked key (first 4 chars + asterisks)
-    masked_key = api_key[:4] + "*" * (len(api_key) - 4) if len(api_key) > 4 else "*" * len(api_key)
-    print(f"[CONFIRM] API key received: {masked_key}")
+    if api_key:
+        masked_key = api_key[:4] + "*" * (len(api_key) - 4) if len(api_key) > 4 else "*" * len(api_key)
+        print(f"[CONFIRM] API key received: {masked_key}")
     
-    model_name = input(f"[INPUT] Enter model name [default: {default_model}]: ").strip() or default_model
+    default_label = default_model or "first model the server lists"
+    model_name = input(f"[INPUT] Enter model name [default: {default_label}]: ").strip() or default_model
     
     keys_to_update = {
         api_key_var: api_key,
         model_var: model_name,
         "ZENCO_PROVIDER": provider_name,  # Store the selected provider
+        **extra_keys,
     }
     
     env_path = ".env"
@@ -187,7 +215,7 @@ def init_config():
     print(f"\n{'='*70}\n")
 
 
-def process_file_with_treesitter(filepath: str, generator: IDocstringGenerator, in_place: bool, overwrite_existing: bool, add_type_hints: bool = False, fix_magic_numbers: bool = False, docstrings_enabled: bool = False, dead_code: bool = False, dead_code_strict: bool = False, json_mode: bool = False):
+def process_file_with_treesitter(filepath: str, generator: IDocstringGenerator, in_place: bool, overwrite_existing: bool, add_type_hints: bool = False, fix_magic_numbers: bool = False, docstrings_enabled: bool = False, dead_code: bool = False, dead_code_strict: bool = False, json_mode: bool = False, engine: Optional[RequestEngine] = None, batch_docstrings: bool = False, fingerprints: Optional[FingerprintStore] = None, dedup: Optional[FunctionDeduplicator] = None, batch_constants: bool = True):
     """
     Processes a single file using the Tree-sitter engine to find and
     report undocumented functions, add type hints, and fix magic numbers.
@@ -209,6 +237,7 @@ def process_file_with_treesitter(filepath: str, generator: IDocstringGenerator,
         "stats": {
             "docstrings_added": 0,
             "type_hints_added": 0,
+            "type_hints_resolved_locally": 0,
             "magic_numbers_fixed": 0,
             "dead_code_removed": 0
         },
@@ -314,11 +343,12 @@ def process_file_with_treesitter(filepath: str, generator: IDocstringGenerator,
     if docstrings_enabled:
         try:
             with suppress_stdout():
-                docstring_processor = DocstringProcessor(lang, tree, source_bytes, transformer)
+                docstring_processor = DocstringProcessor(lang, tree, source_bytes, transformer, engine, fingerprints, dedup)
                 docstring_changes = docstring_processor.process(
                     generator=generator,
                     overwrite_existing=overwrite_existing,
-                    dead_functions=dead_function_names
+                    dead_functions=dead_function_names,
+                    batch=batch_docstrings
                 )
             
             if docstring_changes:
@@ -336,11 +366,12 @@ def process_file_with_treesitter(filepath: str, generator: IDocstringGenerator,
     if add_type_hints:
         try:
             with suppress_stdout():
-                type_hint_processor = TypeHintProcessor(lang, tree, source_bytes, transformer)
+                type_hint_processor = TypeHintProcessor(lang, tree, source_bytes, transformer, engine, fingerprints, dedup)
                 type_hint_changes = type_hint_processor.process(
                     generator=generator,
                     dead_functions=dead_function_names
                 )
+            result["stats"]["type_hints_resolved_locally"] = type_hint_processor.resolved_locally
             
             if type_hint_changes:
                 result["changes"].extend(type_hint_changes)
@@ -357,10 +388,11 @@ def process_file_with_treesitter(filepath: str, generator: IDocstringGenerator,
     if fix_magic_numbers:
         try:
             with suppress_stdout():
-                magic_number_processor = MagicNumberProcessor(lang, tree, source_bytes, transformer)
+                magic_number_processor = MagicNumberProcessor(lang, tree, source_bytes, transformer, engine, fingerprints, dedup)
                 magic_changes = magic_number_processor.process(
                     generator=generator,
-                    dead_functions=dead_function_names
+                    dead_functions=dead_function_names,
+                    batch=batch_constants
                 )
             
             if magic_changes:
@@ -410,11 +442,113 @@ def process_file_with_treesitter(filepath: str, generator: IDocstringGenerator,
 
 
 
+def _make_stream_listener(filepath: str):
+    """Builds a callback that forwards streamed docstring text for `filepath` as JSON-line events."""
+    from autodoc_ai.json_output import emit_event
+
+    def listener(node, delta):
+        name_node = node.child_by_field_name('name')
+        emit_event({
+            "event": "docstring_delta",
+            "file": filepath,
+            "function": name_node.text.decode('utf8') if name_node else None,
+            "line": node.start_point[0] + 1,
+            "delta": delta,
+        })
+    return listener
+
+
+def _get_telemetry(generator):
+    """Returns the Telemetry collector behind an LLM generator, if any."""
+    llm_service = getattr(generator, 'llm_service', None)
+    return getattr(llm_service, 'telemetry', None) if llm_service else None
+
+
+def _print_telemetry_summary(summary) -> None:
+    """Prints the run's LLM call totals and a per-task breakdown."""
+    cost = f", est. cost ${summary['cost_usd']:.4f}" if summary['cost_usd'] else ""
+    prompt_cache = (f" ({summary['cached_input_tokens']:,} from the provider's prompt cache)"
+                    if summary['cached_input_tokens'] else "")
+    coalesced = f", {summary['coalesced']} coalesced" if summary.get('coalesced') else ""
+    print(f"  * LLM calls: {summary['calls']} ({summary['cache_hits']} cached{coalesced}, {summary['errors']} failed), "
+          f"{summary['input_tokens']:,} input{prompt_cache} / {summary['output_tokens']:,} output tokens{cost}")
+    for task, stats in summary['by_task'].items():
+        print(f"      {task}: {stats['calls']} call(s), p50 {stats['latency_p50_ms']:.0f} ms / "
+              f"p95 {stats['latency_p95_ms']:.0f} ms, {stats['input_tokens']:,} in / "
+              f"{stats['output_tokens']:,} out tokens, {stats['retries']} retries")
+    if len(summary.get('by_model', {})) > 1:
+        # Tasks routed to other models by [tool.zenco.models]
+        for model, stats in summary['by_model'].items():
+            print(f"      model {model}: {stats['calls']} call(s), p50 {stats['latency_p50_ms']:.0f} ms, "
+                  f"{stats['input_tokens']:,} in / {stats['output_tokens']:,} out tokens")
+
+
+def _circuit_report():
+    """
+    Returns the state of every provider circuit breaker that opened during the run, and the
+    requests skipped while one was open (each labelled with its provider, task, file and function).
+    """
+    breakers = {name: breaker for name, breaker in circuit_breakers().items() if breaker.opened_count}
+    skipped = [item for breaker in breakers.values() for item in breaker.skipped]
+    return {name: breaker.stats() for name, breaker in breakers.items()}, skipped
+
+
+def _deadline_report(deadline, source_files, not_started):
+    """Returns the run deadline's outcome, with unfinished files (never started or cut short) in run order."""
+    unfinished = [f for f in source_files if f in not_started or f in deadline.unfinished_files]
+    return {"seconds": deadline.seconds, "exceeded": deadline.expired(), "unfinished_files": unfinished}
+
+
+def _get_response_cache(generator):
+    """Returns the ResponseCache behind an LLM generator, if caching is enabled."""
+    llm_service = getattr(generator, 'llm_service', None)
+    return getattr(llm_service, 'cache', None) if llm_service else None
+
+
+def _batch_cache_dir(args) -> str:
+    """The cache directory batch jobs and their answers live in (the same one the run's cache uses)."""
+    return getattr(args, 'cache_dir', None) or load_config().get("cache_dir", DEFAULT_CACHE_DIR)
+
+
+def _create_batch_backend(job, cache_dir: str):
+    """Rebuilds the backend a batch job was submitted to (jobs outlive the process that created them)."""
+    if job["backend"] == "local":
+        return LocalBatchBackend(os.path.join(cache_dir, "batches", "local"))
+    adapter = GeneratorFactory._create_adapter(job["provider"], job["model"], job.get("base_url"))
+    return ProviderBatchBackend(getattr(adapter, "client", None), getattr(adapter, "generation", None))
+
+
+def _submit_batch(args, generator, recorder: BatchRecorder):
+    """Submits the requests recorded by a `--batch-submit` run and saves the job. Returns a summary dict."""
+    requests = list(recorder.requests.values())
+    if not requests:
+        return {"job_id": None, "requests": 0}
+
+    cache_dir = _batch_cache_dir(args)
+    store = BatchJobStore(cache_dir)
+    run_args = {key: value for key, value in vars(args).items() if key != 'func'}
+    run_args["cwd"] = os.getcwd()
+    job = store.create(args.batch_backend, generator.llm_service.provider, generator.llm_service.model,
+                       requests, run_args, base_url=getattr(args, 'base_url', None))
+    try:
+        job["backend_job_id"] = _create_batch_backend(job, cache_dir).submit(requests)
+    except Exception as e:
+        print(f"[ERROR] Could not submit batch job: {e}")
+        return None
+    store.save(job)
+    return {"job_id": job["id"], "backend": job["backend"], "backend_job_id": job["backend_job_id"],
+            "requests": len(requests)}
+
+
 def run_autodoc(args):
     """The main entry point for running the analysis."""
     # Detect JSON mode early to suppress all non-JSON output
     json_mode = getattr(args, 'json', False)
     
+    # The wall-clock limit covers the whole run; LLM requests are cut off once it passes
+    deadline = set_deadline(getattr(args, 'deadline', None))
+    not_started = set()
+    
     if not json_mode:
         if RICH_AVAILABLE:
             console = Console()
@@ -435,10 +569,11 @@ def run_autodoc(args):
     
     # Check if any API keys are configured
     has_api_keys = any([
-        os.getenv("GROQ_API_KEY"),
-        os.getenv("OPENAI_API_KEY"), 
-        os.getenv("ANTHROPIC_API_KEY"),
-        os.getenv("GEMINI_API_KEY")
+        os.getenv("GROQ_API_KEY") or os.getenv("GROQ_API_KEYS"),
+        os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEYS"),
+        os.getenv("ANTHROPIC_API_KEY") or os.getenv("ANTHROPIC_API_KEYS"),
+        os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEYS"),
+        os.getenv("LOCAL_BASE_URL")
     ])
     
     if not json_mode and (not dotenv_path.exists() or not has_api_keys):
@@ -532,12 +667,33 @@ def run_autodoc(args):
                 print(f"  Mode: In-place (files will be modified)")
             print()
     
+    # --batch-submit records uncached requests into a batch job instead of sending them
+    batch_recorder = None
+    if getattr(args, 'batch_submit', False):
+        if getattr(args, 'no_cache', False):
+            if not json_mode:
+                print("[ERROR] Error: --batch-submit needs the response cache; remove --no-cache.")
+            sys.exit(1)
+        batch_recorder = BatchRecorder()
+        # Nothing is applied while recording, and per-function prompts suit batch endpoints better
+        args.in_place = False
+        args.batch_docstrings = False
+    
     try:
         generator = GeneratorFactory.create_generator(
             args.strategy,
             args.style,
             getattr(args, 'provider', None),
             getattr(args, 'model', None),
+            use_cache=not getattr(args, 'no_cache', False),
+            cache_dir=getattr(args, 'cache_dir', None),
+            fallbacks=getattr(args, 'fallback', None),
+            hedge=getattr(args, 'hedge', False),
+            context_budget=getattr(args, 'context_budget', None),
+            base_url=getattr(args, 'base_url', None),
+            batch_recorder=batch_recorder,
+            # Apply with the unrouted configuration the batch job was recorded with
+            route_models=not getattr(args, 'batch_apply', False),
         )
     except ValueError as e:
         if not json_mode:
@@ -545,12 +701,39 @@ def run_autodoc(args):
             print(f"[TIP] Tip: Run 'zenco init' to configure your provider.")
         sys.exit(1)
 
+    if batch_recorder is not None and not hasattr(generator, 'llm_service'):
+        if not json_mode:
+            print("[ERROR] Error: --batch-submit needs an LLM provider; it cannot be used with the mock strategy.")
+        sys.exit(1)
+
     if not json_mode:
         print(f"{'-'*70}\n")
     
     # Detect JSON mode
     json_mode = getattr(args, 'json', False)
     
+    # Streamed docstring text is forwarded as JSON-line events on stderr (LLM strategy only)
+    stream_enabled = getattr(args, 'stream', False) and hasattr(generator, 'stream_listener')
+    
+    # Shared executor so each processor can keep several LLM requests in flight
+    engine = RequestEngine(max_in_flight=getattr(args, 'concurrency', 1))
+    
+    # Results for functions unchanged since an earlier run are reused (disabled along with the cache)
+    fingerprints = None
+    if not getattr(args, 'no_cache', False):
+        fingerprints = FingerprintStore(
+            cache_dir=getattr(args, 'cache_dir', None) or DEFAULT_CACHE_DIR,
+            scope=generator.fingerprint_scope,
+        )
+    
+    # All magic numbers of a file are named in one request unless disabled in [tool.zenco]
+    batch_constants = bool(load_config().get("batch_constant_names", True))
+    
+    # Structurally identical functions anywhere in the run share one request
+    dedup = None
+    if not getattr(args, 'no_dedup', False):
+        dedup = FunctionDeduplicator(alpha_rename=getattr(args, 'dedup_alpha_rename', False))
+    
     if json_mode:
         # Import JSONOutput for JSON mode
         from autodoc_ai.json_output import JSONOutput
@@ -558,19 +741,30 @@ def run_autodoc(args):
         
         # Process files and collect results
         for i, filepath in enumerate(source_files, 1):
+            if deadline and deadline.expired():
+                not_started.add(filepath)
+                continue
+            if stream_enabled:
+                generator.stream_listener = _make_stream_listener(filepath)
             try:
-                result = process_file_with_treesitter(
-                    filepath=filepath,
-                    generator=generator,
-                    in_place=args.in_place,
-                    overwrite_existing=args.overwrite_existing,
-                    add_type_hints=hints_enabled,
-                    fix_magic_numbers=magic_enabled,
-                    docstrings_enabled=docstrings_enabled,
-                    dead_code=dead_code_enabled,
-                    dead_code_strict=dead_code_strict_enabled,
-                    json_mode=True
-                )
+                with telemetry_scope(file=filepath):
+                    result = process_file_with_treesitter(
+                        filepath=filepath,
+                        generator=generator,
+                        in_place=args.in_place,
+                        overwrite_existing=args.overwrite_existing,
+                        add_type_hints=hints_enabled,
+                        fix_magic_numbers=magic_enabled,
+                        docstrings_enabled=docstrings_enabled,
+                        dead_code=dead_code_enabled,
+                        dead_code_strict=dead_code_strict_enabled,
+                        json_mode=True,
+                        engine=engine,
+                        batch_docstrings=getattr(args, 'batch_docstrings', False),
+                        fingerprints=fingerprints,
+                        dedup=dedup,
+                        batch_constants=batch_constants
+                    )
                 
                 # Add result to JSON output
                 json_output.add_file_result(
@@ -591,38 +785,204 @@ def run_autodoc(args):
                     file=filepath
                 )
         
+        cache = _get_response_cache(generator)
+        if cache:
+            json_output.set_cache_stats(cache.stats())
+        if fingerprints:
+            fingerprints.save()
+            json_output.set_fingerprint_stats(fingerprints.stats())
+        if dedup:
+            json_output.set_dedup_stats(dedup.stats())
+        telemetry = _get_telemetry(generator)
+        if telemetry:
+            json_output.set_telemetry(telemetry.summary())
+            if getattr(args, 'telemetry', None):
+                telemetry.dump_jsonl(args.telemetry)
+        json_output.set_circuit_breakers(*_circuit_report())
+        if deadline:
+            json_output.set_deadline(_deadline_report(deadline, source_files, not_started))
+        if batch_recorder is not None:
+            batch_info = _submit_batch(args, generator, batch_recorder)
+            if batch_info is None:
+                json_output.add_error(error_type="BatchSubmitError", message="Could not submit batch job")
+            else:
+                json_output.set_batch(batch_info)
+
+        engine.shutdown()
+        close_http_clients()
+        
         # Output JSON results
         json_output.output(mode="refactor", in_place=args.in_place)
     else:
         # Normal text output mode
         for i, filepath in enumerate(source_files, 1):
+            if deadline and deadline.expired():
+                not_started.add(filepath)
+                continue
             print(f"[{i}/{len(source_files)}] Processing: {filepath}")
-            process_file_with_treesitter(
-                filepath=filepath,
-                generator=generator,
-                in_place=args.in_place,
-                overwrite_existing=args.overwrite_existing,
-                add_type_hints=hints_enabled,
-                fix_magic_numbers=magic_enabled,
-                docstrings_enabled=docstrings_enabled,
-                dead_code=dead_code_enabled,
-                dead_code_strict=dead_code_strict_enabled,
-                json_mode=False
-            )
+            if stream_enabled:
+                generator.stream_listener = _make_stream_listener(filepath)
+            with telemetry_scope(file=filepath):
+                process_file_with_treesitter(
+                    filepath=filepath,
+                    generator=generator,
+                    in_place=args.in_place,
+                    overwrite_existing=args.overwrite_existing,
+                    add_type_hints=hints_enabled,
+                    fix_magic_numbers=magic_enabled,
+                    docstrings_enabled=docstrings_enabled,
+                    dead_code=dead_code_enabled,
+                    dead_code_strict=dead_code_strict_enabled,
+                    json_mode=False,
+                    engine=engine,
+                    batch_docstrings=getattr(args, 'batch_docstrings', False),
+                    fingerprints=fingerprints,
+                    dedup=dedup,
+                    batch_constants=batch_constants
+                )
             print(f"{'-'*70}\n")
+        if fingerprints:
+            fingerprints.save()
+        batch_info = _submit_batch(args, generator, batch_recorder) if batch_recorder is not None else None
+        engine.shutdown()
+        close_http_clients()
         
         # Summary (only in text mode)
         print(f"{'='*70}")
         print(f"  [OK] Processing Complete!")
         print(f"{'='*70}")
         print(f"\nSummary:")
-        print(f"  * Files processed: {len(source_files)}")
+        print(f"  * Files processed: {len(source_files) - len(not_started)}")
+        if not_started:
+            print(f"  * Files not started: {len(not_started)} (deadline reached first)")
         print(f"  * Mode: {'Modified files' if args.in_place else 'Preview only'}")
-        if not args.in_place:
+        cache = _get_response_cache(generator)
+        if cache:
+            cache_stats = cache.stats()
+            print(f"  * LLM cache: {cache_stats['hits']} hit(s), {cache_stats['misses']} miss(es)")
+        if fingerprints:
+            print(f"  * Unchanged functions: {fingerprints.reused} result(s) reused from earlier runs")
+        if dedup and dedup.functions:
+            dedup_stats = dedup.stats()
+            print(f"  * Deduplication: {dedup_stats['functions']} function(s) in {dedup_stats['requests']} request(s) "
+                  f"(ratio {dedup_stats['dedup_ratio']}:1)")
+        telemetry = _get_telemetry(generator)
+        if telemetry:
+            if telemetry.records:
+                _print_telemetry_summary(telemetry.summary())
+            if getattr(args, 'telemetry', None):
+                telemetry.dump_jsonl(args.telemetry)
+                print(f"  * Per-call telemetry written to {args.telemetry}")
+        if deadline:
+            report = _deadline_report(deadline, source_files, not_started)
+            if report["unfinished_files"]:
+                print(f"  * DEADLINE: {deadline.seconds:g}s limit reached; completed edits were kept, "
+                      f"{len(report['unfinished_files'])} file(s) unfinished:")
+                for path in report["unfinished_files"][:20]:
+                    print(f"      {path}")
+                if len(report["unfinished_files"]) > 20:
+                    print(f"      ... and {len(report['unfinished_files']) - 20} more (see --json for the full list)")
+        breakers, skipped = _circuit_report()
+        for name, stats in breakers.items():
+            print(f"  * Circuit breaker: {name} opened {stats['opened']} time(s), now {stats['state']}")
+        if skipped:
+            functions = sorted({f"{item['file']}:{item['function']}" for item in skipped if item['function']})
+            print(f"  * PARTIAL RESULTS: {len(skipped)} request(s) skipped while a provider was failing"
+                  + (f", in {len(functions)} function(s):" if functions else ""))
+            for label in functions[:20]:
+                print(f"      {label}")
+            if len(functions) > 20:
+                print(f"      ... and {len(functions) - 20} more (see --json for the full list)")
+        if batch_recorder is not None:
+            if batch_info and batch_info["job_id"]:
+                print(f"  * Batch job {batch_info['job_id']}: {batch_info['requests']} request(s) submitted "
+                      f"to the {batch_info['backend']} backend")
+                print(f"\nCheck progress with: zenco batch status {batch_info['job_id']}")
+                print(f"Apply results with:  zenco batch apply {batch_info['job_id']} --in-place")
+            elif batch_info:
+                print(f"  * Batch: nothing to submit, every request is already cached")
+        elif not args.in_place:
             print(f"\nTo apply changes, add the --in-place flag")
         print(f"\n{'='*70}\n")
 
 
+def run_fake_server(args):
+    """Runs the local fake LLM server until interrupted."""
+    from .fake_server import FakeLLMServer
+    server = FakeLLMServer(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        latency_distribution=args.latency_distribution,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    print(f"Fake LLM server listening on {server.base_url} (Ctrl+C to stop)")
+    print(f"  Stats: {server.base_url}/stats")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStopped. Stats: {server.stats}")
+
+
+def _print_batch_job(job) -> None:
+    created = time.strftime("%Y-%m-%d %H:%M", time.localtime(job.get("created", 0)))
+    answered = f", {job['answered']} answered" if job["status"] == STATUS_COMPLETED else ""
+    print(f"  {job['id']}  {job['status']:<9}  {created}  {job['backend']}  "
+          f"{len(job['requests'])} request(s){answered}")
+
+
+def run_batch(args):
+    """Shows, polls or applies batch jobs created by `zenco run --batch-submit`."""
+    from dotenv import load_dotenv
+    load_dotenv(Path(os.getcwd()) / '.env')
+
+    cache_dir = _batch_cache_dir(args)
+    store = BatchJobStore(cache_dir)
+    cache = ResponseCache(cache_dir=cache_dir)
+
+    if args.job_id:
+        try:
+            jobs = [store.load(args.job_id)]
+        except ValueError as e:
+            print(f"[ERROR] Error: {e}")
+            sys.exit(1)
+    elif args.action == "status":
+        jobs = store.list()
+    else:
+        print("[ERROR] Error: 'zenco batch apply' needs a job id (see 'zenco batch status').")
+        sys.exit(1)
+
+    # Polling stores any finished answers in the response cache
+    for job in jobs:
+        try:
+            poll_job(job, _create_batch_backend(job, cache_dir), cache, store)
+        except Exception as e:
+            print(f"[WARN]  Could not poll batch job {job['id']}: {e}")
+
+    if args.action == "status":
+        if not jobs:
+            print("No batch jobs found.")
+        for job in jobs:
+            _print_batch_job(job)
+        return
+
+    job = jobs[0]
+    if job["status"] != STATUS_COMPLETED:
+        print(f"[WAIT] Batch job {job['id']} is {job['status']}; nothing to apply yet.")
+        sys.exit(1)
+
+    # Repeat the recorded run; its requests are now answered from the cache
+    run_args = dict(job["run_args"])
+    run_args.update(batch_submit=False, batch_apply=True, in_place=args.in_place, json=args.json,
+                    cache_dir=os.path.abspath(cache_dir))
+    os.chdir(run_args.pop("cwd", os.getcwd()))
+    run_autodoc(argparse.Namespace(**run_args))
+
+
 def main():
     """Main CLI entry point with subcommand routing."""
     parser = argparse.ArgumentParser(
@@ -753,7 +1113,7 @@ Examples:
     
     parser_run.add_argument(
         "--provider",
-        choices=["groq", "openai", "anthropic", "gemini"],
+        choices=["groq", "openai", "anthropic", "gemini", "local"],
         default=None,
         help="LLM provider to use (default: reads from .env ZENCO_PROVIDER)"
     )
@@ -764,13 +1124,94 @@ Examples:
         metavar="MODEL_NAME",
         help="Override default model (e.g., gpt-4, claude-3-5-sonnet-latest, gemini-1.5-pro)"
     )
+
+    parser_run.add_argument(
+        "--base-url",
+        default=config.get('base_url'),
+        metavar="URL",
+        help="Send the primary provider's requests to another endpoint (e.g. a proxy or 'zenco fake-server')"
+    )
     
+    parser_run.add_argument(
+        "--fallback",
+        action="append",
+        default=config.get('fallback_providers'),
+        metavar="PROVIDER[:MODEL]",
+        help="Fallback provider to use when the primary fails (repeatable, tried in order)"
+    )
+
+    parser_run.add_argument(
+        "--hedge",
+        action="store_true",
+        default=config.get('hedge', False),
+        help="Duplicate slow requests (past the primary's p95 latency) to the first fallback and take the first answer"
+    )
+
+    parser_run.add_argument(
+        "--context-budget",
+        type=int,
+        default=config.get('context_budget'),
+        metavar="TOKENS",
+        help="Maximum estimated tokens of code context per LLM request; longer code is elided (default: 1500)"
+    )
+
+    parser_run.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.get('concurrency', 4),
+        metavar="N",
+        help="Maximum number of LLM requests in flight at once (default: 4, 1 = sequential)"
+    )
+
+    parser_run.add_argument(
+        "--deadline",
+        type=float,
+        default=config.get('deadline'),
+        metavar="SECONDS",
+        help="Wall-clock limit for the whole run; afterwards no new LLM requests start, completed edits are "
+             "kept and unfinished files are listed (per-request limits: [tool.zenco.timeouts])"
+    )
+
+    parser_run.add_argument(
+        "--no-dedup",
+        action="store_true",
+        default=not config.get('dedup', True),
+        help="Send a request for every function instead of one per group of structurally identical functions"
+    )
+
+    parser_run.add_argument(
+        "--dedup-alpha-rename",
+        action="store_true",
+        default=config.get('dedup_alpha_rename', False),
+        help="Also treat functions that differ only in local variable names as identical"
+    )
+
+    parser_run.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the on-disk LLM response cache"
+    )
+
+    parser_run.add_argument(
+        "--cache-dir",
+        default=config.get('cache_dir', '.zenco_cache'),
+        metavar="DIR",
+        help="Directory for the LLM response cache (default: .zenco_cache)"
+    )
+
     parser_run.add_argument(
         "--docstrings",
         action="store_true",
         help="Generate missing docstrings (opt-in)"
     )
 
+    parser_run.add_argument(
+        "--batch-docstrings",
+        action="store_true",
+        default=config.get('batch_docstrings', False),
+        help="Pack many functions into each docstring request to cut request count (token budget set by batch_token_budget in [tool.zenco])"
+    )
+
     parser_run.add_argument(
         "--add-type-hints",
         action="store_true",
@@ -801,8 +1242,90 @@ Examples:
         help="Output results in JSON format (for programmatic use)"
     )
 
+    parser_run.add_argument(
+        "--telemetry",
+        default=None,
+        metavar="FILE.jsonl",
+        help="Write one JSON line per LLM call (task, file, function, latency, tokens, retries, cache) to FILE"
+    )
+
+    parser_run.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream docstring text as it is generated, as JSON-line events on stderr (for editor integrations)"
+    )
+
+    parser_run.add_argument(
+        "--batch-submit",
+        action="store_true",
+        help="Record every uncached LLM request into an offline batch job instead of sending it (see 'zenco batch')"
+    )
+
+    parser_run.add_argument(
+        "--batch-backend",
+        choices=["provider", "local"],
+        default="provider",
+        help="Where --batch-submit sends its job: the provider's batch API (OpenAI, Groq) or a local stand-in (default: provider)"
+    )
+
     parser_run.set_defaults(func=run_autodoc)
 
+    # Batch command
+    parser_batch = subparsers.add_parser(
+        "batch",
+        help="Check on or apply offline batch jobs created with 'zenco run --batch-submit'",
+        description="""
+Batch jobs trade latency for cheaper, higher-throughput provider batch endpoints.
+
+Example:
+  zenco run . --refactor --batch-submit        # record and submit
+  zenco batch status                           # list jobs, fetch finished answers
+  zenco batch apply <job-id> --in-place        # apply the answers to the files
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser_batch.add_argument("action", choices=["status", "apply"], help="Show job status, or apply a finished job")
+    parser_batch.add_argument("job_id", nargs="?", default=None, help="Job id (status without one lists every job)")
+    parser_batch.add_argument("--cache-dir", default=config.get('cache_dir', '.zenco_cache'), metavar="DIR",
+                              help="Cache directory the job was recorded in (default: .zenco_cache)")
+    parser_batch.add_argument("--in-place", action="store_true", help="Apply changes to the files (default: preview)")
+    parser_batch.add_argument("--json", action="store_true", help="Output the apply run's results in JSON format")
+    parser_batch.set_defaults(func=run_batch)
+
+    # Fake server command
+    parser_fake = subparsers.add_parser(
+        "fake-server",
+        help="Run a local OpenAI-compatible LLM stand-in for load and latency testing",
+        description="""
+Serve canned, task-aware chat completions with configurable latency and fault injection.
+Point the OpenAI or Groq provider at it with --base-url to exercise the real adapters offline.
+
+Example:
+  zenco fake-server --port 8765 --latency-ms 300 --rate-limit-rate 0.05
+  OPENAI_API_KEY=fake zenco run . --refactor --provider openai --base-url http://127.0.0.1:8765/v1
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser_fake.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser_fake.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser_fake.add_argument("--latency-ms", type=float, default=200.0, help="Mean response latency (default: 200)")
+    parser_fake.add_argument(
+        "--latency-distribution",
+        choices=["fixed", "uniform", "exponential", "lognormal"],
+        default="lognormal",
+        help="Shape of the latency distribution (default: lognormal)"
+    )
+    parser_fake.add_argument("--jitter-ms", type=float, default=100.0,
+                             help="Latency spread for uniform/lognormal distributions (default: 100)")
+    parser_fake.add_argument("--error-rate", type=float, default=0.0,
+                             help="Fraction of requests answered with HTTP 500 (default: 0)")
+    parser_fake.add_argument("--rate-limit-rate", type=float, default=0.0,
+                             help="Fraction of requests answered with HTTP 429 (default: 0)")
+    parser_fake.add_argument("--retry-after", type=float, default=1.0,
+                             help="Retry-After seconds sent with 429 responses (default: 1)")
+    parser_fake.add_argument("--seed", type=int, default=None, help="Seed for reproducible latencies and faults")
+    parser_fake.set_defaults(func=run_fake_server)
+
     args = parser.parse_args()
     args.func(args)
 
@@ -0,0 +1,134 @@
+"""
+Concurrent execution of LLM requests.
+
+Processors hand all of a file's requests to a RequestEngine up front and apply the
+results afterwards, so wall-clock time is bounded by the slowest batch of in-flight
+requests rather than the sum of every round-trip.
+
+A run may also have a wall-clock Deadline (`zenco run --deadline`). Adapters cap each
+request's timeout by the time left and refuse new requests once it has passed, so
+in-flight work ends by the deadline and queued work fails fast.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Set
+
+from .telemetry import current_labels, set_queue_time
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting (or retrying) an LLM request after the run deadline."""
+
+
+class Deadline:
+    """
+    A wall-clock limit for a whole run. Files whose requests were refused because the
+    deadline had passed are collected in `unfinished_files`.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.unfinished_files: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> float:
+        """Returns the seconds left, or raises DeadlineExceeded and marks the current file unfinished."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            file = current_labels().get("file")
+            if file:
+                with self._lock:
+                    self.unfinished_files.add(file)
+            raise DeadlineExceeded(f"run deadline of {self.seconds:g}s exceeded")
+        return remaining
+
+
+_deadline: Optional[Deadline] = None
+
+
+def set_deadline(seconds: Optional[float]) -> Optional[Deadline]:
+    """Starts the run-wide deadline (None clears it) and returns it."""
+    global _deadline
+    _deadline = Deadline(seconds) if seconds else None
+    return _deadline
+
+
+def get_deadline() -> Optional[Deadline]:
+    return _deadline
+
+
+def check_deadline() -> Optional[float]:
+    """Seconds left before the run deadline (None without one); raises DeadlineExceeded once it has passed."""
+    return _deadline.check() if _deadline is not None else None
+
+
+class RequestEngine:
+    """
+    Runs blocking LLM calls on a shared thread pool with a cap on requests in flight.
+
+    The provider SDKs used by the adapters are synchronous, so a thread pool gives the
+    same overlap of network latency as their async clients without changing the
+    ILLMService contract. With `max_in_flight <= 1` calls run inline on the caller's thread.
+    """
+
+    def __init__(self, max_in_flight: int = 1):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_in_flight, thread_name_prefix="zenco-llm"
+            )
+        return self._executor
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Calls `fn(item)` for every item and returns the results in input order.
+
+        All calls are submitted before any result is awaited. If a call raises, the
+        first exception is re-raised once every submitted call has finished, so callers
+        that want per-item error handling should catch inside `fn`.
+        """
+        items = list(items)
+        if self.max_in_flight == 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+
+        # Workers run in a copy of the caller's context so telemetry labels (file, function) carry over
+        executor = self._get_executor()
+        futures = [
+            executor.submit(contextvars.copy_context().run, self._run_queued, fn, item, time.monotonic())
+            for item in items
+        ]
+        results = []
+        first_error = None
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(None)
+                first_error = first_error or e
+        if first_error:
+            raise first_error
+        return results
+
+    @staticmethod
+    def _run_queued(fn: Callable[[Any], Any], item: Any, submitted: float) -> Any:
+        set_queue_time((time.monotonic() - submitted) * 1000)
+        return fn(item)
+
+    def shutdown(self) -> None:
+        """Stops the worker threads. The engine can still be used afterwards."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,147 @@
+"""
+Token-budgeted code context for LLM prompts.
+
+Prompts used to embed raw node text (or, for module-level magic numbers, the whole
+file), so a single request could carry thousands of tokens the model never needed.
+ContextExtractor builds a bounded window per task instead, using the local
+`estimate_tokens` heuristic so no tokenizer round-trip is required.
+"""
+
+from typing import List, Optional
+from tree_sitter import Node
+
+from .utils import estimate_tokens
+
+DEFAULT_CONTEXT_BUDGET = 1500
+DEFAULT_CONTEXT_LINES = 5
+
+# Node types whose children are whole statements; a literal's enclosing statement is
+# the ancestor sitting directly inside one of these.
+STATEMENT_CONTAINERS = {
+    'module', 'block', 'program', 'statement_block', 'class_body', 'source_file',
+    'translation_unit', 'compound_statement', 'declaration_list', 'field_declaration_list',
+    'class_declaration', 'switch_block', 'switch_body', 'constructor_body', 'interface_body',
+    'statement_list', 'literal_value', 'expression_switch_statement',
+}
+
+
+class ContextExtractor:
+    """
+    Builds prompt context that fits a per-request token budget.
+
+    Code that already fits is returned verbatim, so small functions see exactly the
+    prompts they always did; only oversized context is elided or windowed.
+    """
+
+    def __init__(self, budget_tokens: int = DEFAULT_CONTEXT_BUDGET, surrounding_lines: int = DEFAULT_CONTEXT_LINES):
+        self.budget_tokens = max(1, int(budget_tokens))
+        self.surrounding_lines = max(0, int(surrounding_lines))
+
+    def for_node(self, node: Node) -> str:
+        """Context for a function or class: its signature and body, with the middle elided if too long."""
+        return self.elide(node.text.decode('utf8'))
+
+    def elide(self, text: str) -> str:
+        """
+        Shortens `text` to the budget by keeping its head (signature and opening lines)
+        and tail (typically the return path) and replacing the middle with a marker.
+        """
+        if estimate_tokens(text) <= self.budget_tokens:
+            return text
+
+        lines = text.split('\n')
+        # Two thirds of the budget for the head, the rest for the tail
+        head = self._take_lines(lines, self.budget_tokens * 2 // 3)
+        tail = self._take_lines(lines[len(head):][::-1], self.budget_tokens - self._tokens(head))[::-1]
+        if not head:
+            # A single enormous line: fall back to a character cut
+            return text[:self.budget_tokens * 4]
+
+        omitted = len(lines) - len(head) - len(tail)
+        if omitted <= 0:
+            return '\n'.join(head + tail)
+        indent = self._indent_of(lines[len(head)])
+        return '\n'.join(head + [f"{indent}... ({omitted} lines omitted) ..."] + tail)
+
+    def for_literal(self, literal: Node, scope: Optional[Node], source_text: str) -> str:
+        """
+        Context for a literal (e.g. a magic number): the enclosing function if it fits the
+        budget, otherwise the enclosing statement plus up to `surrounding_lines` lines on each
+        side, limited to the function (or file) the literal appears in.
+        """
+        if scope is not None:
+            scope_text = scope.text.decode('utf8')
+            if estimate_tokens(scope_text) <= self.budget_tokens:
+                return scope_text
+
+        lines = source_text.split('\n')
+        scope_start = scope.start_point[0] if scope is not None else 0
+        scope_end = scope.end_point[0] if scope is not None else len(lines) - 1
+
+        statement = self._enclosing_statement(literal, scope)
+        start, end = statement.start_point[0], statement.end_point[0]
+        if self._tokens(lines[start:end + 1]) > self.budget_tokens:
+            # The statement alone is too big; centre on the literal's own line
+            start = end = literal.start_point[0]
+
+        # Grow the window one line at a time on each side while it fits
+        for _ in range(self.surrounding_lines):
+            grown = False
+            if start > scope_start and self._tokens(lines[start - 1:end + 1]) <= self.budget_tokens:
+                start -= 1
+                grown = True
+            if end < scope_end and self._tokens(lines[start:end + 2]) <= self.budget_tokens:
+                end += 1
+                grown = True
+            if not grown:
+                break
+
+        window = lines[start:end + 1]
+        if scope is not None and start > scope_start:
+            # Keep the signature so the model knows which function the number belongs to
+            window = [lines[scope_start], f"{self._indent_of(lines[start])}..."] + window
+        return self.elide('\n'.join(window))
+
+    def for_usage(self, literal: Node, scope: Optional[Node], max_tokens: int = 80) -> str:
+        """
+        A short snippet showing how a literal is used: the signature line of its function
+        followed by the enclosing statement (or just the literal's line if that is too long).
+        """
+        statement = self._enclosing_statement(literal, scope)
+        text = statement.text.decode('utf8').strip()
+        if estimate_tokens(text) > max_tokens:
+            line = literal.start_point[0] - statement.start_point[0]
+            text = statement.text.decode('utf8').split('\n')[line].strip()
+        if scope is None:
+            return text
+        signature = scope.text.decode('utf8').split('\n', 1)[0].strip()
+        return f"{signature}\n    {text}"
+
+    @staticmethod
+    def _enclosing_statement(node: Node, scope: Optional[Node]) -> Node:
+        current = node
+        while current.parent is not None and current.parent.type not in STATEMENT_CONTAINERS:
+            if scope is not None and current.parent == scope:
+                break
+            current = current.parent
+        return current
+
+    @staticmethod
+    def _take_lines(lines: List[str], budget: int) -> List[str]:
+        taken = []
+        used = 0
+        for line in lines:
+            cost = estimate_tokens(line + '\n')
+            if used + cost > budget:
+                break
+            taken.append(line)
+            used += cost
+        return taken
+
+    @staticmethod
+    def _tokens(lines: List[str]) -> int:
+        return estimate_tokens('\n'.join(lines))
+
+    @staticmethod
+    def _indent_of(line: str) -> str:
+        return line[:len(line) - len(line.lstrip())]
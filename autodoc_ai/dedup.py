@@ -0,0 +1,141 @@
+"""
+Run-wide deduplication of structurally identical functions.
+
+Copy-pasted helpers and generated adapters produce many functions that differ only in
+comments, whitespace or (optionally) local variable names. FunctionDeduplicator groups
+them by a normalized form of their tree-sitter tree, sends one request per group and
+fans the answer back out to every member, across all files of a run.
+"""
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set
+from tree_sitter import Node
+
+COMMENT_TYPES = {'comment', 'line_comment', 'block_comment'}
+
+# Nodes that bind a local variable, and the field holding the bound name
+LOCAL_BINDINGS = {
+    'assignment': 'left',                # Python
+    'augmented_assignment': 'left',      # Python
+    'for_statement': 'left',             # Python
+    'for_in_clause': 'left',             # Python comprehensions
+    'variable_declarator': 'name',       # JavaScript, Java
+    'short_var_declaration': 'left',     # Go
+    'var_spec': 'name',                  # Go
+    'init_declarator': 'declarator',     # C++
+}
+
+
+def _bound_identifiers(node: Optional[Node]) -> List[str]:
+    """Identifiers bound by an assignment target (plain names, tuples and lists of names)."""
+    if node is None:
+        return []
+    if node.type == 'identifier':
+        return [node.text.decode('utf8')]
+    if node.type in ('expression_list', 'pattern_list', 'tuple_pattern', 'list_pattern'):
+        return [name for child in node.children for name in _bound_identifiers(child)]
+    return []
+
+
+def _parameter_names(func_node: Node) -> Set[str]:
+    params = func_node.child_by_field_name('parameters')
+    names = set()
+    stack = [params] if params else []
+    while stack:
+        node = stack.pop()
+        if node.type == 'identifier':
+            names.add(node.text.decode('utf8'))
+        stack.extend(node.children)
+    return names
+
+
+def local_names(func_node: Node) -> Dict[str, str]:
+    """Maps each local variable of a function (never its parameters) to a positional placeholder."""
+    params = _parameter_names(func_node)
+    renames: Dict[str, str] = {}
+    stack = [func_node]
+    while stack:
+        node = stack.pop()
+        field = LOCAL_BINDINGS.get(node.type)
+        if field:
+            for name in _bound_identifiers(node.child_by_field_name(field)):
+                if name not in params and name not in renames:
+                    renames[name] = f"_v{len(renames)}"
+        stack.extend(reversed(node.children))
+    return renames
+
+
+def structural_key(func_node: Node, alpha_rename: bool = False) -> str:
+    """
+    Returns a hash of a function's syntax tree with comments and formatting removed.
+
+    Node types are kept alongside leaf text, so code that only differs in layout matches
+    while code with a different block structure does not. With `alpha_rename`, locals are
+    replaced by placeholders in binding order; the function name and parameters are kept
+    because generated docstrings and type hints refer to them.
+    """
+    renames = local_names(func_node) if alpha_rename else {}
+    parts: List[str] = []
+
+    def walk(node: Node) -> None:
+        if node.type in COMMENT_TYPES:
+            return
+        if not node.children:
+            text = node.text.decode('utf8')
+            parts.append(renames.get(text, text) if node.type == 'identifier' else text)
+            return
+        parts.append(f"({node.type}")
+        for child in node.children:
+            walk(child)
+        parts.append(")")
+
+    walk(func_node)
+    return hashlib.sha256(" ".join(parts).encode("utf-8")).hexdigest()
+
+
+class FunctionDeduplicator:
+    """
+    Groups structurally identical functions so each group costs one request.
+
+    Results are remembered for the whole run, so a helper copied into fifty files is
+    requested once. Results rejected by the caller's `keep` check (by default, empty
+    ones) are not remembered, letting a later copy retry.
+    """
+
+    def __init__(self, alpha_rename: bool = False):
+        self.alpha_rename = alpha_rename
+        self.functions = 0
+        self.requests = 0
+        self._results: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def run(self, feature: str, lang: str, nodes: List[Node],
+            request: Callable[[List[Node]], List[Any]], keep: Callable[[Any], bool] = bool) -> List[Any]:
+        """
+        Returns one result per node, calling `request` only for one representative of each
+        group not already answered earlier in the run.
+        """
+        keys = [f"{feature}:{lang}:{structural_key(node, self.alpha_rename)}" for node in nodes]
+        with self._lock:
+            known = {key: self._results[key] for key in keys if key in self._results}
+
+        representatives: Dict[str, Node] = {}
+        for key, node in zip(keys, nodes):
+            if key not in known and key not in representatives:
+                representatives[key] = node
+
+        fresh = request(list(representatives.values())) if representatives else []
+        with self._lock:
+            for key, result in zip(representatives, fresh):
+                known[key] = result
+                if keep(result):
+                    self._results[key] = result
+            self.functions += len(nodes)
+            self.requests += len(representatives)
+        return [known[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns how many functions were handled, how many requests they needed, and the ratio."""
+        ratio = self.functions / max(1, self.requests) if self.functions else 1.0
+        return {"functions": self.functions, "requests": self.requests, "dedup_ratio": round(ratio, 2)}
@@ -0,0 +1,339 @@
+"""
+A local stand-in for an OpenAI-compatible chat-completions server.
+
+`--strategy mock` replaces the whole LLM stack with MockGenerator, so it says nothing
+about HTTP pooling, concurrency, retries or response parsing. FakeLLMServer speaks the
+chat-completions wire format used by OpenAIAdapter and GroqAdapter (including streamed
+responses) with configurable latency, error and 429 injection, and task-aware canned
+answers, so the real adapters can be benchmarked end to end without network access:
+
+    zenco fake-server --port 8765 --latency-ms 300 --rate-limit-rate 0.05
+    OPENAI_API_KEY=fake zenco run . --refactor --provider openai --base-url http://127.0.0.1:8765/v1
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .utils import estimate_tokens
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+def canned_response(prompt: str) -> str:
+    """Returns a plausible, well-formed answer for whichever zenco prompt `prompt` is."""
+    if "YES or NO" in prompt:
+        return "YES"
+
+    if '{"verdict": "keep"}' in prompt:
+        # Judge-and-rewrite: keep substantial docstrings, rewrite stubs
+        match = re.search(r"Docstring:\s*```\s*(.*?)\s*```", prompt, re.DOTALL)
+        if match and len(match.group(1)) > 20:
+            return json.dumps({"verdict": "keep"})
+        return json.dumps({"verdict": "rewrite", "docstring": "Performs the operation implemented by this function."})
+
+    if "JSON array with one object per function" in prompt:
+        functions = json.loads(prompt.split("Functions:", 1)[1].strip()) if "Functions:" in prompt else []
+        return json.dumps([
+            {"id": item["id"], "docstring": "Performs the operation implemented by this function."}
+            for item in functions
+        ])
+
+    if "infer appropriate type hints" in prompt:
+        match = re.search(r"def\s+\w+\s*\(([^)]*)\)", prompt)
+        parameters = {}
+        for param in (match.group(1).split(",") if match else []):
+            name = param.split(":")[0].split("=")[0].strip()
+            if name and name not in ("self", "cls") and not name.startswith("*"):
+                parameters[name] = "Any"
+        return json.dumps({"parameters": parameters, "return_type": "None"})
+
+    if "constant name for each magic number" in prompt:
+        usages = json.loads(prompt.split("Numbers:", 1)[1].strip()) if "Numbers:" in prompt else {}
+        return json.dumps({value: "VALUE_" + value.replace("-", "NEG_").replace(".", "_").upper() for value in usages})
+
+    match = re.search(r"Magic number: `([^`]+)`", prompt)
+    if match:
+        value = match.group(1).replace("-", "NEG_").replace(".", "_")
+        return f"VALUE_{value}".upper()
+
+    match = re.search(r"Name: `([^`]+)`", prompt)
+    if match and "has been flagged" in prompt:
+        old_name = match.group(1)
+        return f"Renamed{old_name[:1].upper()}{old_name[1:]}" if "PascalCase" in prompt else f"renamed_{old_name}"
+
+    if "docstring" in prompt:
+        return "Performs the operation implemented by this function.\n\nReturns:\n    The result of the operation."
+
+    return "OK"
+
+
+def apply_generation_limits(text: str, body: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Applies a request's `stop` sequences and `max_tokens` to an answer like a real endpoint
+    would, returning (text, finish_reason). Tokens are estimated at ~4 characters each.
+    """
+    stop = body.get("stop") or []
+    for sequence in [stop] if isinstance(stop, str) else stop:
+        if sequence and sequence in text:
+            text = text[:text.index(sequence)]
+    max_tokens = body.get("max_tokens")
+    if max_tokens is not None and estimate_tokens(text) > max_tokens:
+        return text[:max_tokens * 4], "length"
+    return text, "stop"
+
+
+class FakeLLMServer:
+    """
+    An in-process OpenAI-compatible server on a background thread.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free one; see `base_url`)
+        latency_ms: Mean response latency in milliseconds
+        latency_distribution: One of LATENCY_DISTRIBUTIONS
+        jitter_ms: Spread for the uniform distribution, sigma scale for lognormal
+        error_rate: Fraction of requests answered with HTTP 500
+        rate_limit_rate: Fraction of requests answered with HTTP 429
+        retry_after: Seconds advertised in the Retry-After header of 429 responses
+        chunk_delay_ms: Delay between streamed chunks
+        seed: Seed for the latency and fault-injection random generator
+        structured_output: Whether `response_format` is accepted; when False such requests
+            get HTTP 400, like servers without JSON mode
+        key_errors: API keys (bearer tokens) to reject: 401 for an invalid key, or 429 with
+            "insufficient_quota" for an exhausted one. `requests_by_key` counts each key's requests.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 200.0,
+                 latency_distribution: str = "lognormal", jitter_ms: float = 100.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0,
+                 chunk_delay_ms: float = 5.0, seed: Optional[int] = None, structured_output: bool = True,
+                 key_errors: Optional[Dict[str, int]] = None):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.chunk_delay_ms = chunk_delay_ms
+        self.structured_output = structured_output
+        self.key_errors = key_errors or {}
+        self.requests_by_key: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "completed": 0, "errors": 0, "rate_limited": 0, "in_flight": 0,
+                                      "peak_in_flight": 0, "cached_tokens": 0,
+                                      "structured": 0}
+        # System prompts seen so far, to report prompt-cache hits like OpenAI does
+        self._prompt_prefixes: Set[str] = set()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to hand to the adapters; any path ending in /chat/completions is served."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        """Starts serving on a daemon thread and returns self."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="zenco-fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serves on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stops the server and releases its port."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sample_latency(self) -> float:
+        """Draws one response latency in seconds from the configured distribution."""
+        with self._lock:
+            mean = self.latency_ms
+            if self.latency_distribution == "uniform":
+                value = self._random.uniform(mean - self.jitter_ms, mean + self.jitter_ms)
+            elif self.latency_distribution == "exponential":
+                value = self._random.expovariate(1.0 / mean) if mean > 0 else 0.0
+            elif self.latency_distribution == "lognormal":
+                # Long-tailed like real provider latencies: median ~ mean, sigma scaled by jitter
+                sigma = self.jitter_ms / mean if mean > 0 else 0.0
+                value = mean * self._random.lognormvariate(0.0, sigma) if mean > 0 else 0.0
+            else:
+                value = mean
+        return max(0.0, value) / 1000.0
+
+    def _fault(self) -> Optional[int]:
+        """Decides whether this request fails: 429, 500 or None."""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500
+        return None
+
+    def cached_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        """Tokens of the request's system prompt if an earlier request already sent it, else 0."""
+        system = "".join(message.get("content") or "" for message in messages
+                         if message.get("role") == "system" and isinstance(message.get("content"), str))
+        if not system:
+            return 0
+        with self._lock:
+            if system not in self._prompt_prefixes:
+                self._prompt_prefixes.add(system)
+                return 0
+            tokens = estimate_tokens(system)
+            self.stats["cached_tokens"] += tokens
+            return tokens
+
+    def _count(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += delta
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002 - silence per-request logging
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/stats"):
+                    with server._lock:
+                        stats = dict(server.stats)
+                    self._send_json(200, stats)
+                elif self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "fake-model", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                    return
+
+                server._count("requests")
+                api_key = (self.headers.get("Authorization") or "").replace("Bearer ", "", 1)
+                with server._lock:
+                    server.requests_by_key[api_key] = server.requests_by_key.get(api_key, 0) + 1
+                if server.key_errors.get(api_key) == 401:
+                    self._send_json(401, {"error": {"message": "Invalid API key (fake server)",
+                                                    "type": "invalid_request_error", "code": "invalid_api_key"}})
+                    return
+                if server.key_errors.get(api_key) == 429:
+                    self._send_json(429, {"error": {"message": "You exceeded your current quota (fake server)",
+                                                    "type": "insufficient_quota", "code": "insufficient_quota"}})
+                    return
+                if "response_format" in body:
+                    if not server.structured_output:
+                        self._send_json(400, {"error": {"message": "response_format is not supported by this server",
+                                                        "type": "invalid_request_error"}})
+                        return
+                    server._count("structured")
+                fault = server._fault()
+                if fault == 429:
+                    server._count("rate_limited")
+                    self._send_json(429, {"error": {"message": "Rate limit reached (fake server)",
+                                                    "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                                    headers={"retry-after": str(server.retry_after)})
+                    return
+                if fault == 500:
+                    server._count("errors")
+                    self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+                    return
+
+                server._count("in_flight")
+                try:
+                    time.sleep(server.sample_latency())
+                    prompt = "\n".join(
+                        message.get("content") or "" for message in body.get("messages", [])
+                        if isinstance(message.get("content"), str)
+                    )
+                    text, finish_reason = apply_generation_limits(canned_response(prompt), body)
+                    model = body.get("model", "fake-model")
+                    if body.get("stream"):
+                        self._stream(text, model, finish_reason)
+                    else:
+                        cached = server.cached_tokens(body.get("messages", []))
+                        self._send_json(200, self._completion(text, model, prompt, cached, finish_reason))
+                    server._count("completed")
+                finally:
+                    server._count("in_flight", -1)
+
+            def _completion(self, text: str, model: str, prompt: str, cached_tokens: int = 0,
+                            finish_reason: str = "stop") -> Dict[str, Any]:
+                prompt_tokens = estimate_tokens(prompt)
+                completion_tokens = estimate_tokens(text)
+                return {
+                    "id": f"chatcmpl-fake-{time.time_ns()}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": finish_reason}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens,
+                              "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+                }
+
+            def _stream(self, text: str, model: str, finish_reason: str = "stop") -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                chunk_id = f"chatcmpl-fake-{time.time_ns()}"
+                pieces: List[str] = re.findall(r"\S+\s*|\s+", text) or [""]
+                try:
+                    for i, piece in enumerate(pieces):
+                        if i:
+                            time.sleep(server.chunk_delay_ms / 1000.0)
+                        self._event({"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                                     "model": model,
+                                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                    self._event({"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                                 "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading early (e.g. a short-circuited YES/NO verdict)
+                    pass
+                self.close_connection = True
+
+            def _event(self, payload: Dict[str, Any]) -> None:
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
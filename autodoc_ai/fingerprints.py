@@ -0,0 +1,105 @@
+"""
+Persistent per-function results keyed by a fingerprint of the function's code.
+
+Each processor records what it produced or decided for a function (a generated
+docstring, a quality verdict, inferred type hints, a constant name). On the next run
+a function whose normalized code, language, feature and generator are unchanged is
+answered from this store without touching the generator, so re-running zenco over a
+mostly unchanged codebase only pays for the functions that actually changed.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import textwrap
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .cache import DEFAULT_CACHE_DIR
+
+FINGERPRINT_FILE = "fingerprints.json"
+
+
+def normalize_code(code: str) -> str:
+    """Normalizes code so formatting-only edits (indentation, trailing spaces, blank lines) keep the same fingerprint."""
+    lines = textwrap.dedent(code.replace('\r\n', '\n')).split('\n')
+    return '\n'.join(line.rstrip() for line in lines if line.strip())
+
+
+class FingerprintStore:
+    """
+    A JSON file of fingerprint -> result, loaded once per run and written back by `save()`.
+
+    `scope` identifies whatever produced the results (e.g. provider, model and docstring
+    style) and is part of every fingerprint, so switching generators never reuses
+    another generator's answers.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, scope: str = "", max_age_days: float = 90):
+        self.path = os.path.join(cache_dir, FINGERPRINT_FILE)
+        self.scope = scope
+        self.max_age_seconds = max_age_days * 86400
+        self.reused = 0
+        self.recorded = 0
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def fingerprint(self, lang: str, feature: str, code: str) -> str:
+        """Returns the fingerprint of a function's normalized code for one language and feature."""
+        material = "\0".join([self.scope, lang, feature, normalize_code(code)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, lang: str, feature: str, code: str) -> Optional[Any]:
+        """Returns the stored result for unchanged code, or None if there is none."""
+        key = self.fingerprint(lang, feature, code)
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                return None
+            entry["seen"] = time.time()
+            self._dirty = True
+            self.reused += 1
+            return entry["result"]
+
+    def put(self, lang: str, feature: str, code: str, result: Any) -> None:
+        """Records the result produced for a function's code. `result` must be JSON-serializable."""
+        key = self.fingerprint(lang, feature, code)
+        with self._lock:
+            self._load()[key] = {"result": result, "seen": time.time()}
+            self._dirty = True
+            self.recorded += 1
+
+    def save(self) -> None:
+        """Writes the store back to disk atomically, dropping entries unseen for `max_age_days`."""
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            cutoff = time.time() - self.max_age_seconds
+            entries = {key: entry for key, entry in self._entries.items() if entry.get("seen", 0) >= cutoff}
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"[WARN] Could not save function fingerprints: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Returns how many results were reused from, and recorded to, the store this run."""
+        return {"reused": self.reused, "recorded": self.recorded}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+                if not isinstance(self._entries, dict):
+                    self._entries = {}
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
@@ -3,11 +3,35 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from tree_sitter import Node
-from typing import Optional
-from .llm_services import ILLMService, GroqAdapter
+import json
+from typing import Callable, Dict, List, Optional
+from .llm_services import (
+    ILLMService,
+    GroqAdapter,
+    CircuitBreakerLLMService,
+    FailoverLLMService,
+    RateLimitedLLMService,
+    KeyPoolLLMService,
+    TelemetryLLMService,
+    extract_json,
+    get_circuit_breaker,
+    get_rate_limiter,
+)
+from . import prompts
+from .prompts import build_prompt
+from .utils import estimate_tokens
+from .telemetry import Telemetry, telemetry_scope
+from .context import ContextExtractor, DEFAULT_CONTEXT_BUDGET, DEFAULT_CONTEXT_LINES
+from .cache import ResponseCache, CachedLLMService, CoalescingLLMService, DEFAULT_CACHE_DIR
+from .batch import BatchRecorder, RecordingLLMService
+from .http_clients import get_http_client, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from .config import load_config
 
 class IDocstringGenerator(abc.ABC):
     """An interface for AI strategies using Tree-sitter."""
+    # Builds the bounded code context processors put into prompts
+    context: ContextExtractor = ContextExtractor()
+
     @abc.abstractmethod
     def generate(self, node: Node) -> str:
         """Generates a docstring for a given Tree-sitter node."""
@@ -18,6 +42,16 @@ class IDocstringGenerator(abc.ABC):
         """Evaluates if a docstring is high quality."""
         pass
 
+    def review(self, node: Node, docstring: str) -> Optional[str]:
+        """
+        Judges an existing docstring and returns the one to use: `docstring` itself when it is
+        good enough, otherwise a replacement. Returns None if no answer could be obtained.
+        By default this evaluates and then regenerates; LLMGenerator does both in one request.
+        """
+        if self.evaluate(node, docstring):
+            return docstring
+        return self.generate(node) or None
+
     @abc.abstractmethod
     def suggest_name(self, node: Node, old_name: str) -> Optional[str]:
         """Suggests a better name for any given node."""
@@ -28,11 +62,39 @@ class IDocstringGenerator(abc.ABC):
         """Generates type hints for a function node."""
         pass
 
+    def complete_type_hints(self, node: Node, known: dict) -> dict:
+        """
+        Generates the type hints missing from `known` (hints already inferred locally).
+        By default the whole signature is requested; callers keep their known hints.
+        """
+        return self.generate_type_hints(node)
+
     @abc.abstractmethod
     def suggest_constant_name(self, code_context: str, magic_number: str) -> Optional[str]:
         """Suggests a constant name for a magic number."""
         pass
 
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        """
+        Names several magic numbers at once from short usage snippets (value -> name).
+        Values left out of the result are named one at a time by the caller.
+        By default every value is named individually.
+        """
+        return {value: self.suggest_constant_name("\n".join(snippets), value) for value, snippets in usages.items()}
+
+    @property
+    def fingerprint_scope(self) -> str:
+        """Identifies this generator's output in the function fingerprint store."""
+        return type(self).__name__
+
+    def pack_batches(self, nodes: List[Node]) -> List[List[Node]]:
+        """Groups nodes into batches for `generate_batch`. By default every node is its own batch."""
+        return [[node] for node in nodes]
+
+    def generate_batch(self, nodes: List[Node]) -> List[str]:
+        """Generates docstrings for several nodes, returned in input order."""
+        return [self.generate(node) for node in nodes]
+
 
 class MockGenerator(IDocstringGenerator):
     """A mock generator for testing."""
@@ -52,50 +114,326 @@ class MockGenerator(IDocstringGenerator):
         return f"MOCK_CONSTANT_FOR_{magic_number.replace('.', '_').replace('-', 'NEG_')}"
 
 
+def pack_by_token_budget(sizes: List[int], budget: int, max_items: int) -> List[List[int]]:
+    """
+    First-fit-decreasing bin packing of item indices by estimated token size.
+    Items larger than the budget get a bin of their own. Each bin is returned in index order.
+    """
+    bins: List[List[int]] = []
+    loads: List[int] = []
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i], reverse=True):
+        for b, load in enumerate(loads):
+            if load + sizes[index] <= budget and len(bins[b]) < max_items:
+                bins[b].append(index)
+                loads[b] += sizes[index]
+                break
+        else:
+            bins.append([index])
+            loads.append(sizes[index])
+    return sorted(sorted(b) for b in bins)
+
+
+# The tasks LLMGenerator sends, each of which [tool.zenco.models] can route to its own model
+ROUTABLE_TASKS = ("docstring", "docstring_batch", "evaluate_docstring", "review_docstring", "suggest_name",
+                  "suggest_function_name", "suggest_class_name", "type_hints", "constant_name", "constant_names")
+
+
 class LLMGenerator(IDocstringGenerator):
-    """A generator that uses an LLM service."""
-    def __init__(self, llm_service: ILLMService, style: str = "google"):
+    """
+    A generator that uses an LLM service.
+    `routes` maps tasks to services for another model (see [tool.zenco.models]); every other
+    task goes to `llm_service`.
+    """
+    def __init__(self, llm_service: ILLMService, style: str = "google",
+                 batch_token_budget: int = 4000, batch_max_functions: int = 20,
+                 context: Optional[ContextExtractor] = None, routes: Optional[Dict[str, ILLMService]] = None):
         self.llm_service = llm_service
+        self.routes = routes or {}
+        self.context = context or ContextExtractor()
         self.style = style
+        self.batch_token_budget = batch_token_budget
+        self.batch_max_functions = batch_max_functions
+        # Optional callback(node, text_delta) that receives docstring text as it streams in
+        self.stream_listener: Optional[Callable[[Node, str], None]] = None
+
+    @property
+    def fingerprint_scope(self) -> str:
+        scope = f"llm:{self.llm_service.provider}:{self.llm_service.model}:{self.style}"
+        # Routing a task to another model changes its answers, so it must invalidate fingerprints too
+        for task, service in sorted(self.routes.items()):
+            scope += f":{task}={service.model}"
+        return scope
+
+    def service_for(self, task: str) -> ILLMService:
+        """The service that answers `task`: its routed model's, else the default one."""
+        return self.routes.get(task, self.llm_service)
+
+    @staticmethod
+    def _function_label(node: Node) -> Optional[str]:
+        """The node's name, used to label telemetry for requests about it."""
+        name_node = node.child_by_field_name('name')
+        return name_node.text.decode('utf8') if name_node else None
 
     def generate(self, node: Node) -> str:
-        code_snippet = node.text.decode('utf8')
-        prompt = f"""
-        Generate a professional, {self.style}-style docstring for the following code.
-        Only return the raw content of the docstring, without the triple quotes.
-        Code:
-        {code_snippet}
+        with telemetry_scope(function=self._function_label(node)):
+            return self._generate(node)
+
+    def _generate(self, node: Node) -> str:
+        code_snippet = self.context.for_node(node)
+        prompt = build_prompt(prompts.DOCSTRING, f"Docstring style: {self.style}\n\nCode:\n{code_snippet}")
+        if self.stream_listener is None:
+            raw_docstring = self.service_for("docstring").create_completion(prompt, task="docstring")
+            return raw_docstring.strip()
+
+        chunks = []
+        try:
+            for chunk in self.service_for("docstring").stream_completion(prompt, task="docstring"):
+                chunks.append(chunk)
+                self.stream_listener(node, chunk)
+        except Exception as e:
+            print(f"Error streaming docstring: {e}")
+            return ""
+        return "".join(chunks).strip()
+
+    def pack_batches(self, nodes: List[Node]) -> List[List[Node]]:
+        sizes = [estimate_tokens(self.context.for_node(node)) for node in nodes]
+        bins = pack_by_token_budget(sizes, self.batch_token_budget, self.batch_max_functions)
+        return [[nodes[i] for i in b] for b in bins]
+
+    def generate_batch(self, nodes: List[Node]) -> List[str]:
+        """
+        Packs several functions into one structured request (JSON array in, JSON array out).
+        Any function missing from, or malformed in, the response falls back to `generate`.
         """
-        raw_docstring = self.llm_service.create_completion(prompt)
-        return raw_docstring.strip()
+        if len(nodes) <= 1:
+            return [self.generate(node) for node in nodes]
+
+        label = ", ".join(filter(None, (self._function_label(node) for node in nodes)))
+        with telemetry_scope(function=label or None):
+            docstrings = self._generate_batch(nodes)
+        return [docstrings[i] if i in docstrings else self.generate(node) for i, node in enumerate(nodes)]
+
+    def _generate_batch(self, nodes: List[Node]) -> dict:
+        """Sends one batch request and returns the valid docstrings by position."""
+        functions = [{"id": i, "code": self.context.for_node(node)} for i, node in enumerate(nodes)]
+        prompt = build_prompt(prompts.DOCSTRING_BATCH,
+                              f"Docstring style: {self.style}\n\nFunctions:\n{json.dumps(functions, indent=2)}")
+        response = self.service_for("docstring_batch").create_completion(prompt, task="docstring_batch")
+
+        docstrings = {}
+        parsed = extract_json(response)
+        if isinstance(parsed, list):
+            for item in parsed:
+                if not isinstance(item, dict) or not isinstance(item.get("docstring"), str):
+                    continue
+                if isinstance(item.get("id"), int) and item["docstring"].strip():
+                    docstrings[item["id"]] = item["docstring"].strip()
+        return docstrings
 
     def evaluate(self, node: Node, docstring: str) -> bool:
-        code_snippet = node.text.decode('utf8')
-        return self.llm_service.evaluate_docstring(code_snippet, docstring)
+        code_snippet = self.context.for_node(node)
+        with telemetry_scope(function=self._function_label(node)):
+            return self.service_for("evaluate_docstring").evaluate_docstring(code_snippet, docstring)
+
+    def review(self, node: Node, docstring: str) -> Optional[str]:
+        code_snippet = self.context.for_node(node)
+        with telemetry_scope(function=self._function_label(node)):
+            return self.service_for("review_docstring").review_docstring(code_snippet, docstring, self.style)
 
     def suggest_name(self, node: Node, old_name: str) -> Optional[str]:
-        code_context = node.text.decode('utf8')
+        code_context = self.context.for_node(node)
 
-        if node.type in ['function_definition', 'function_declaration']:
-            return self.llm_service.suggest_function_name(code_context, old_name)
-        elif node.type in ['class_definition', 'class_declaration']:
-            return self.llm_service.suggest_class_name(code_context, old_name)
-        else:
-            return self.llm_service.suggest_name(code_context, old_name)
+        with telemetry_scope(function=self._function_label(node) or old_name):
+            if node.type in ['function_definition', 'function_declaration']:
+                return self.service_for("suggest_function_name").suggest_function_name(code_context, old_name)
+            elif node.type in ['class_definition', 'class_declaration']:
+                return self.service_for("suggest_class_name").suggest_class_name(code_context, old_name)
+            else:
+                return self.service_for("suggest_name").suggest_name(code_context, old_name)
 
     def generate_type_hints(self, node: Node) -> dict:
-        code_snippet = node.text.decode('utf8')
-        return self.llm_service.generate_type_hints(code_snippet)
+        code_snippet = self.context.for_node(node)
+        with telemetry_scope(function=self._function_label(node)):
+            return self.service_for("type_hints").generate_type_hints(code_snippet)
+
+    def complete_type_hints(self, node: Node, known: dict) -> dict:
+        code_snippet = self.context.for_node(node)
+        with telemetry_scope(function=self._function_label(node)):
+            return self.service_for("type_hints").generate_type_hints(code_snippet, known=known)
 
     def suggest_constant_name(self, code_context: str, magic_number: str) -> Optional[str]:
-        return self.llm_service.suggest_constant_name(code_context, magic_number)
+        return self.service_for("constant_name").suggest_constant_name(code_context, magic_number)
+
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        """Names the values in as few requests as the batch token budget allows."""
+        values = list(usages)
+        sizes = [estimate_tokens(json.dumps({value: usages[value]})) for value in values]
+        names: Dict[str, Optional[str]] = {}
+        for group in pack_by_token_budget(sizes, self.batch_token_budget, len(values)):
+            names.update(self.service_for("constant_names").suggest_constant_names(
+                {values[i]: usages[values[i]] for i in group}))
+        return names
 
 
 class GeneratorFactory:
     """A factory to create the appropriate docstring generator."""
     @staticmethod
-    def create_generator(strategy: str, style: str = "google", provider: Optional[str] = None, model: Optional[str] = None) -> IDocstringGenerator:
+    def _http_client(provider: str):
+        """Returns the pooled HTTP client for a provider, sized from [tool.zenco]."""
+        config = load_config()
+        return get_http_client(
+            provider,
+            pool_size=int(config.get("http_pool_size", DEFAULT_POOL_SIZE)),
+            timeout=float(config.get("http_timeout", DEFAULT_TIMEOUT)),
+            http2=bool(config.get("http2", True)),
+        )
+
+    @staticmethod
+    def _rate_limited(adapter: ILLMService, config: dict, limiter_name: Optional[str] = None) -> ILLMService:
+        """
+        Puts an adapter behind its provider's shared RateLimiter. The adapters of a key pool each
+        get a limiter of their own (`limiter_name`), with the provider's [tool.zenco.rate_limits].
+        """
+        rate_settings = config.get("rate_limits", {}).get(adapter.provider, {})
+        limiter = get_rate_limiter(
+            limiter_name or adapter.provider,
+            requests_per_minute=rate_settings.get("requests_per_minute"),
+            tokens_per_minute=rate_settings.get("tokens_per_minute"),
+            max_retries=int(rate_settings.get("max_retries", 5)),
+        )
+        return RateLimitedLLMService(adapter, limiter)
+
+    @staticmethod
+    def _key_pooled(pool: List[ILLMService], config: dict) -> ILLMService:
+        """
+        Rate-limits a provider's adapters, one per API key, and spreads requests over them with a
+        KeyPoolLLMService when there are several. [tool.zenco.key_pool] sets `eviction_seconds`.
+        """
+        if len(pool) == 1:
+            return GeneratorFactory._rate_limited(pool[0], config)
+        members = [GeneratorFactory._rate_limited(adapter, config, limiter_name=f"{adapter.provider}#{i + 1}")
+                   for i, adapter in enumerate(pool)]
+        settings = config.get("key_pool", {})
+        return KeyPoolLLMService(members, eviction_seconds=float(settings.get("eviction_seconds", 300)))
+
+    @staticmethod
+    def _circuit_broken(service: ILLMService, config: dict) -> ILLMService:
+        """Puts a provider behind its shared CircuitBreaker, unless disabled in [tool.zenco.circuit_breaker]."""
+        settings = config.get("circuit_breaker", {})
+        if not settings.get("enabled", True):
+            return service
+        breaker = get_circuit_breaker(
+            service.provider,
+            failure_threshold=int(settings.get("failure_threshold", 5)),
+            error_rate=float(settings.get("error_rate", 0.5)),
+            window=int(settings.get("window", 20)),
+            cooldown_seconds=float(settings.get("cooldown_seconds", 30)),
+        )
+        return CircuitBreakerLLMService(service, breaker)
+
+    @staticmethod
+    def _service_chain(pools: List[List[ILLMService]], config: dict, cache: Optional[ResponseCache],
+                       telemetry: Telemetry, hedge: bool = False,
+                       batch_recorder: Optional[BatchRecorder] = None) -> ILLMService:
+        """
+        Wraps provider adapters in the shared service layers. Each pool holds one provider's
+        adapters, one per API key. The first pool is the primary; any others are fallbacks in
+        priority order. With a batch_recorder, cache misses are recorded for a batch job instead
+        of sent.
+        """
+        services = [GeneratorFactory._circuit_broken(GeneratorFactory._key_pooled(pool, config), config)
+                    for pool in pools]
+        service = services[0]
+        if len(services) > 1 or hedge:
+            service = FailoverLLMService(
+                services,
+                hedge=hedge,
+                hedge_min_samples=int(config.get("hedge_min_samples", 20)),
+            )
+        if batch_recorder is not None:
+            service = RecordingLLMService(pools[0][0], batch_recorder)
+        if cache is not None:
+            service = CachedLLMService(service, cache)
+        if config.get("coalesce_requests", True):
+            # In front of the cache, so concurrent duplicates wait for one request instead of all missing it
+            service = CoalescingLLMService(service)
+        # Outermost, so each record sees cache hits, retries and provider usage from the layers below
+        return TelemetryLLMService(service, telemetry)
+
+    @staticmethod
+    def _build_llm_generator(pools: List[List[ILLMService]], style: str, use_cache: bool, cache_dir: Optional[str],
+                             hedge: bool = False, context_budget: Optional[int] = None,
+                             batch_recorder: Optional[BatchRecorder] = None,
+                             routes: Optional[Dict[str, List[ILLMService]]] = None) -> LLMGenerator:
+        """
+        Builds the service chain for the adapter pools and returns an LLMGenerator.
+        `routes` maps tasks to the adapters of another model; each such model gets its own chain,
+        with the same fallbacks, sharing the response cache and telemetry of the default one.
+        """
+        config = load_config()
+        cache = None
+        if use_cache:
+            cache = ResponseCache(
+                cache_dir=cache_dir or config.get("cache_dir", DEFAULT_CACHE_DIR),
+                max_entries=int(config.get("cache_max_entries", 10000)),
+                max_age_days=float(config.get("cache_max_age_days", 30)),
+            )
+            cache.prune()
+        telemetry = Telemetry(prices=config.get("prices", {}))
+        service = GeneratorFactory._service_chain(pools, config, cache, telemetry, hedge=hedge,
+                                                  batch_recorder=batch_recorder)
+        chains: Dict[int, ILLMService] = {}
+        for pool in (routes or {}).values():
+            if id(pool) not in chains:
+                chains[id(pool)] = GeneratorFactory._service_chain([pool] + pools[1:], config, cache,
+                                                                   telemetry, hedge=hedge)
+        return LLMGenerator(
+            llm_service=service,
+            style=style,
+            batch_token_budget=int(config.get("batch_token_budget", 4000)),
+            batch_max_functions=int(config.get("batch_max_functions", 20)),
+            context=ContextExtractor(
+                budget_tokens=context_budget or int(config.get("context_budget", DEFAULT_CONTEXT_BUDGET)),
+                surrounding_lines=int(config.get("context_lines", DEFAULT_CONTEXT_LINES)),
+            ),
+            routes={task: chains[id(pool)] for task, pool in (routes or {}).items()},
+        )
+
+    @staticmethod
+    def _routed_pools(provider: str, primary: List[ILLMService],
+                      base_url: Optional[str] = None) -> Dict[str, List[ILLMService]]:
+        """
+        Reads [tool.zenco.models] (task = model) and returns the primary provider's adapters
+        (one per API key) for each task routed to a model other than the primary's, one pool per model.
+        """
+        pools = {primary[0].model: primary}
+        routes = {}
+        for task, model in load_config().get("models", {}).items():
+            if task not in ROUTABLE_TASKS:
+                print(f"Warning: unknown task '{task}' in [tool.zenco.models]; expected one of {', '.join(ROUTABLE_TASKS)}")
+                continue
+            if model not in pools:
+                pools[model] = GeneratorFactory._create_adapters(provider, model, base_url)
+            if pools[model] is not primary:
+                routes[task] = pools[model]
+        return routes
+
+    @staticmethod
+    def create_generator(strategy: str, style: str = "google", provider: Optional[str] = None, model: Optional[str] = None,
+                         use_cache: bool = True, cache_dir: Optional[str] = None,
+                         fallbacks: Optional[List[str]] = None, hedge: bool = False,
+                         context_budget: Optional[int] = None, base_url: Optional[str] = None,
+                         batch_recorder: Optional[BatchRecorder] = None,
+                         route_models: bool = True) -> IDocstringGenerator:
         # Strategy controls mock vs real; provider controls which LLM vendor.
+        # use_cache/cache_dir control the on-disk response cache wrapped around the adapter.
+        # fallbacks ("provider[:model]" specs) are tried in order when the primary fails; hedge
+        # races a fallback against a primary that is slower than its usual p95 latency.
+        # context_budget caps the estimated tokens of code context sent per request.
+        # base_url points the primary provider at another endpoint (e.g. `zenco fake-server`).
+        # batch_recorder collects uncached requests for `--batch-submit` instead of sending them.
+        # route_models=False ignores [tool.zenco.models], as `zenco batch apply` must to find the
+        # answers a job recorded under the primary model.
         
         dotenv_path = Path(os.getcwd()) / '.env'
         load_dotenv(dotenv_path=dotenv_path)
@@ -108,10 +446,12 @@ class GeneratorFactory:
         if strategy == "mock":
             # Check if any API keys are available
             api_keys_available = {
-                "groq": os.getenv("GROQ_API_KEY"),
-                "openai": os.getenv("OPENAI_API_KEY"),
-                "anthropic": os.getenv("ANTHROPIC_API_KEY"),
-                "gemini": os.getenv("GEMINI_API_KEY")
+                "groq": os.getenv("GROQ_API_KEY") or os.getenv("GROQ_API_KEYS"),
+                "openai": os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_API_KEYS"),
+                "anthropic": os.getenv("ANTHROPIC_API_KEY") or os.getenv("ANTHROPIC_API_KEYS"),
+                "gemini": os.getenv("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEYS"),
+                # A self-hosted server needs no key, only an address
+                "local": os.getenv("LOCAL_BASE_URL") or (base_url if provider.lower() == "local" else None),
             }
             
             # If the configured provider has an API key, switch to real LLM
@@ -132,40 +472,121 @@ class GeneratorFactory:
             return MockGenerator()
         
         provider = provider.lower()
+        pools = [GeneratorFactory._create_adapters(provider, model, base_url)]
+        for spec in fallbacks or []:
+            # Fallbacks are "provider" or "provider:model"
+            fallback_provider, _, fallback_model = spec.partition(":")
+            pools.append(GeneratorFactory._create_adapters(fallback_provider.strip().lower(), fallback_model.strip() or None))
+        # A batch job is submitted for one model, so routing only applies to live requests
+        routes = {}
+        if route_models and batch_recorder is None:
+            routes = GeneratorFactory._routed_pools(provider, pools[0], base_url)
+        return GeneratorFactory._build_llm_generator(pools, style, use_cache, cache_dir, hedge=hedge,
+                                                     context_budget=context_budget, batch_recorder=batch_recorder,
+                                                     routes=routes)
+
+    @staticmethod
+    def _key_pool(provider: str) -> List[Dict[str, str]]:
+        """
+        The API keys configured for a provider, as adapter credentials: <PROVIDER>_API_KEY, the
+        comma-separated <PROVIDER>_API_KEYS, and the keys in the environment variables that
+        [tool.zenco.key_pool] lists for the provider (e.g. `openai = ["OPENAI_KEY_NIGHTLY"]`).
+        OpenAI entries may be "key:organization:project". Repeated keys are dropped.
+        """
+        prefix = provider.upper()
+        entries = [os.getenv(f"{prefix}_API_KEY") or ""]
+        entries += (os.getenv(f"{prefix}_API_KEYS") or "").split(",")
+        entries += [os.getenv(name) or "" for name in load_config().get("key_pool", {}).get(provider, [])]
 
+        pool: List[Dict[str, str]] = []
+        for entry in entries:
+            api_key, scope = entry.strip(), ""
+            if provider == "openai":
+                api_key, _, scope = api_key.partition(":")
+            if not api_key or any(credentials["api_key"] == api_key for credentials in pool):
+                continue
+            credentials = {"api_key": api_key}
+            if scope:
+                organization, _, project = scope.partition(":")
+                credentials.update({k: v for k, v in (("organization", organization), ("project", project)) if v})
+            pool.append(credentials)
+        return pool
+
+    @staticmethod
+    def _create_adapters(provider: str, model: Optional[str] = None, base_url: Optional[str] = None) -> List[ILLMService]:
+        """
+        Creates a provider's adapters, one per key of its pool (see `_key_pool`). Gemini's SDK
+        holds a single process-wide key, so only its first key is used.
+        """
+        pool = GeneratorFactory._key_pool(provider)
+        if provider == "gemini" and len(pool) > 1:
+            print("Warning: the Gemini SDK supports one API key per process; using the first key of the pool")
+            pool = pool[:1]
+        if len(pool) <= 1:
+            return [GeneratorFactory._create_adapter(provider, model, base_url, **(pool[0] if pool else {}))]
+        return [GeneratorFactory._create_adapter(provider, model, base_url, **credentials) for credentials in pool]
+
+    @staticmethod
+    def _create_adapter(provider: str, model: Optional[str] = None, base_url: Optional[str] = None,
+                        api_key: Optional[str] = None, organization: Optional[str] = None,
+                        project: Optional[str] = None) -> ILLMService:
+        """
+        Creates the raw adapter for a provider, reading its API key and default model from the environment.
+        `api_key` (with an OpenAI `organization` and `project`) overrides the key from the environment.
+        `base_url` overrides the endpoint; otherwise the SDKs honour <PROVIDER>_BASE_URL.
+        The "local" provider targets a self-hosted OpenAI-compatible server at LOCAL_BASE_URL.
+        Per-task request timeouts come from [tool.zenco.timeouts], and per-task generation
+        parameters (max_tokens, stop, temperature, seed) from [tool.zenco.generation].
+        """
+        config = load_config()
+        timeouts = {task: float(seconds) for task, seconds in config.get("timeouts", {}).items()}
+        generation = config.get("generation", {})
         if provider == "groq":
-            api_key = os.getenv("GROQ_API_KEY")
+            api_key = api_key or os.getenv("GROQ_API_KEY")
             if not api_key:
                 raise ValueError("Groq API key not found. Run 'zenco init' to configure your API key, or use '--strategy mock' for testing.")
             model_name = model or os.getenv("GROQ_MODEL_NAME", "llama3-8b-8192")
-            groq_adapter = GroqAdapter(api_key=api_key, model=model_name)
-            return LLMGenerator(llm_service=groq_adapter, style=style)
+            return GroqAdapter(api_key=api_key, model=model_name, http_client=GeneratorFactory._http_client("groq"),
+                               base_url=base_url, timeouts=timeouts,
+                               generation=generation)
 
         if provider == "openai":
             from .llm_services import OpenAIAdapter  # lazy import
-            api_key = os.getenv("OPENAI_API_KEY")
+            api_key = api_key or os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OpenAI API key not found. Run 'zenco init' to configure your API key, or use '--strategy mock' for testing.")
             model_name = model or os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
-            adapter = OpenAIAdapter(api_key=api_key, model=model_name)
-            return LLMGenerator(llm_service=adapter, style=style)
+            return OpenAIAdapter(api_key=api_key, model=model_name, http_client=GeneratorFactory._http_client("openai"),
+                                 base_url=base_url, timeouts=timeouts,
+                                 generation=generation, organization=organization, project=project)
 
         if provider == "anthropic":
             from .llm_services import AnthropicAdapter  # lazy import
-            api_key = os.getenv("ANTHROPIC_API_KEY")
+            api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
             if not api_key:
                 raise ValueError("Anthropic API key not found. Run 'zenco init' to configure your API key, or use '--strategy mock' for testing.")
             model_name = model or os.getenv("ANTHROPIC_MODEL_NAME", "claude-3-5-sonnet-latest")
-            adapter = AnthropicAdapter(api_key=api_key, model=model_name)
-            return LLMGenerator(llm_service=adapter, style=style)
+            return AnthropicAdapter(api_key=api_key, model=model_name, http_client=GeneratorFactory._http_client("anthropic"),
+                                    base_url=base_url, timeouts=timeouts,
+                                    generation=generation)
 
         if provider == "gemini":
             from .llm_services import GeminiAdapter  # lazy import
-            api_key = os.getenv("GEMINI_API_KEY")
+            api_key = api_key or os.getenv("GEMINI_API_KEY")
             if not api_key:
                 raise ValueError("Gemini API key not found. Run 'zenco init' to configure your API key, or use '--strategy mock' for testing.")
             model_name = model or os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-pro")
-            adapter = GeminiAdapter(api_key=api_key, model=model_name)
-            return LLMGenerator(llm_service=adapter, style=style)
+            return GeminiAdapter(api_key=api_key, model=model_name, timeouts=timeouts,
+                                 generation=generation)
+
+        if provider == "local":
+            from .llm_services import LocalAdapter  # lazy import
+            base_url = base_url or os.getenv("LOCAL_BASE_URL")
+            if not base_url:
+                raise ValueError("Local server address not found. Set LOCAL_BASE_URL (e.g. http://localhost:8000/v1) or pass --base-url.")
+            return LocalAdapter(base_url=base_url, model=model or os.getenv("LOCAL_MODEL_NAME"),
+                                api_key=api_key or os.getenv("LOCAL_API_KEY"), auth_header=os.getenv("LOCAL_AUTH_HEADER"),
+                                http_client=GeneratorFactory._http_client("local"), timeouts=timeouts,
+                                generation=generation)
 
-        raise ValueError(f"Unknown provider: {provider}")
\ No newline at end of file
+        raise ValueError(f"Unknown provider: {provider}")
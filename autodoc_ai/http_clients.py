@@ -0,0 +1,98 @@
+"""
+Long-lived HTTP clients shared by the LLM adapters.
+
+Each provider gets one pooled `httpx.Client` for the whole run, so concurrent requests
+reuse keep-alive connections instead of paying a TCP/TLS handshake per call.
+"""
+
+import importlib
+import importlib.util
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT = 60.0
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional `h2` package (pip install 'httpx[http2]')."""
+    return importlib.util.find_spec("h2") is not None
+
+
+# SDK module per provider; each exports the HTTP client class its API client accepts
+# (DefaultHttpxClient) along with the Timeout and Limits types that client takes.
+SDK_MODULES = {
+    "groq": "groq",
+    "openai": "openai",
+    "anthropic": "anthropic",
+    "local": "openai",
+}
+
+
+def _client_types(provider: str) -> Optional[Tuple[Any, Any, Any]]:
+    """
+    The (client, Timeout, Limits) classes the provider's SDK expects, taken from the SDK
+    itself so they always match the HTTP library it is built on; httpx's without the SDK.
+    """
+    module_name = SDK_MODULES.get(provider, "openai")
+    try:
+        sdk = importlib.import_module(module_name)
+        return sdk.DefaultHttpxClient, sdk.Timeout, type(sdk.DEFAULT_CONNECTION_LIMITS)
+    except (ImportError, AttributeError):
+        pass
+    try:
+        import httpx
+        return httpx.Client, httpx.Timeout, httpx.Limits
+    except ImportError:
+        return None
+
+
+def get_http_client(provider: str, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                    http2: bool = True) -> Optional[Any]:
+    """
+    Returns the shared pooled client for a provider, creating it on first use.
+
+    Args:
+        provider: Provider name; one client is kept per provider
+        pool_size: Maximum open (and kept-alive) connections
+        timeout: Default request timeout in seconds
+        http2: Negotiate HTTP/2 when `h2` is installed
+
+    Returns:
+        An HTTP client for the provider's SDK, or None if none could be built
+        (the SDK then creates its own).
+    """
+    with _clients_lock:
+        if provider in _clients:
+            return _clients[provider]
+
+        client_types = _client_types(provider)
+        if client_types is None:
+            return None
+        client_class, timeout_class, limits_class = client_types
+
+        client = client_class(
+            http2=http2 and http2_available(),
+            timeout=timeout_class(timeout, connect=min(timeout, 10.0)),
+            limits=limits_class(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=60.0,
+            ),
+        )
+        _clients[provider] = client
+        return client
+
+
+def close_http_clients() -> None:
+    """Closes every pooled client. Called once at the end of a run."""
+    with _clients_lock:
+        for client in _clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _clients.clear()
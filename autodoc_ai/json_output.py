@@ -1,6 +1,19 @@
 import json
 import sys
+import threading
 from typing import List, Dict, Any, Optional
+
+_event_lock = threading.Lock()
+
+
+def emit_event(event: Dict[str, Any]) -> None:
+    """Write one streaming event as a JSON line on stderr (stdout is reserved for the final JSON)."""
+    line = json.dumps(event)
+    with _event_lock:
+        sys.stderr.write(line + "\n")
+        sys.stderr.flush()
+
+
 class JSONOutput:
     """Handles JSON output formatting for Zenco CLI."""
     
@@ -8,6 +21,14 @@ class JSONOutput:
         self.version = version
         self.results: List[Dict[str, Any]] = []
         self.errors: List[Dict[str, Any]] = []
+        self.cache_stats: Optional[Dict[str, Any]] = None
+        self.fingerprint_stats: Optional[Dict[str, Any]] = None
+        self.dedup_stats: Optional[Dict[str, Any]] = None
+        self.telemetry: Optional[Dict[str, Any]] = None
+        self.batch: Optional[Dict[str, Any]] = None
+        self.circuit_breakers: Dict[str, Any] = {}
+        self.skipped: List[Dict[str, Any]] = []
+        self.deadline: Optional[Dict[str, Any]] = None
     
     def add_file_result(
         self,
@@ -46,16 +67,64 @@ class JSONOutput:
         
         self.errors.append(error)
     
+    def set_cache_stats(self, stats: Dict[str, Any]):
+        """Record LLM response cache hit/miss counters."""
+        self.cache_stats = stats
+
+    def set_fingerprint_stats(self, stats: Dict[str, Any]):
+        """Record how many per-function results were reused from earlier runs."""
+        self.fingerprint_stats = stats
+
+    def set_dedup_stats(self, stats: Dict[str, Any]):
+        """Record how many functions were handled and how many LLM requests they needed."""
+        self.dedup_stats = stats
+
+    def set_telemetry(self, summary: Dict[str, Any]):
+        """Record aggregated LLM call telemetry (totals, per task and per file)."""
+        self.telemetry = summary
+
+    def set_batch(self, info: Dict[str, Any]):
+        """Record the batch job a `--batch-submit` run created (id, backend, request count)."""
+        self.batch = info
+    
+    def set_circuit_breakers(self, breakers: Dict[str, Any], skipped: List[Dict[str, Any]]):
+        """Record provider circuit breaker states and the requests skipped while a circuit was open."""
+        self.circuit_breakers = breakers
+        self.skipped = skipped
+    
+    def set_deadline(self, info: Dict[str, Any]):
+        """Record the run deadline, whether it was hit and which files it left unfinished."""
+        self.deadline = info
+    
     def output(self, mode: str, in_place: bool):
         """Output the final JSON to stdout."""
         output = {
             "success": len(self.errors) == 0,
+            # "partial" when requests were skipped (open circuit breaker) or the deadline left files unfinished
+            "status": "partial" if self.skipped or (self.deadline and self.deadline["unfinished_files"]) else "complete",
             "version": self.version,
             "files_processed": len(self.results),
             "mode": "apply" if in_place else "preview",
             "results": self.results
         }
         
+        if self.cache_stats is not None:
+            output["cache"] = self.cache_stats
+        if self.fingerprint_stats is not None:
+            output["fingerprints"] = self.fingerprint_stats
+        if self.dedup_stats is not None:
+            output["dedup"] = self.dedup_stats
+        if self.telemetry is not None:
+            output["telemetry"] = self.telemetry
+        if self.batch is not None:
+            output["batch"] = self.batch
+        if self.circuit_breakers:
+            output["circuit_breakers"] = self.circuit_breakers
+        if self.skipped:
+            output["skipped"] = self.skipped
+        if self.deadline is not None:
+            output["deadline"] = self.deadline
+        
         if self.errors:
             output["errors"] = self.errors
         
@@ -1,8 +1,223 @@
 import abc
+import ast
 from cmd import PROMPT
+import json
 import os
-from typing import Optional
+import random
+import re
+import threading
+import time
+from collections import deque
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional
 from groq import Groq
+from . import prompts
+from .concurrency import DeadlineExceeded, check_deadline
+from .prompts import build_prompt, chat_messages, code_block, split_prompt
+from .utils import estimate_tokens
+from .telemetry import (
+    CallRecord,
+    Telemetry,
+    active_call,
+    current_labels,
+    record_retry,
+    record_throttle,
+    record_usage,
+    start_call,
+)
+
+
+def extract_json(response: str) -> Optional[Any]:
+    """
+    Parses a JSON value out of an LLM response, unwrapping markdown code fences.
+    Near-misses are repaired with `repair_json` before giving up.
+    Returns None when the response does not contain a JSON value.
+    """
+    text = (response or "").strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+    try:
+        return json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return repair_json(text)
+
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PYTHON_LITERALS = {"true": "True", "false": "False", "null": "None"}
+
+
+def _json_span(text: str) -> Optional[str]:
+    """
+    The first JSON object or array in `text`, skipping any prose around it. Brackets left
+    open by a truncated response are closed.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None
+    start = min(starts)
+    closers = {"{": "}", "[": "]"}
+    stack: List[str] = []
+    quote = None
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in closers:
+            stack.append(closers[char])
+        elif stack and char == stack[-1]:
+            stack.pop()
+            if not stack:
+                return text[start:i + 1]
+    tail = quote or ""
+    return text[start:].rstrip().rstrip(",") + tail + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """
+    Lenient parse for almost-JSON LLM output: prose around the value, trailing commas,
+    single-quoted strings or Python literals (True/None), and brackets left open by a
+    truncated response. Returns None when nothing can be recovered.
+    """
+    span = _json_span(text or "")
+    if span is None:
+        return None
+    span = _TRAILING_COMMA.sub(r"\1", span)
+    try:
+        return json.loads(span)
+    except json.JSONDecodeError:
+        pass
+    # Single quotes and True/False/None make it a Python literal rather than JSON
+    literal = re.sub(r"\b(true|false|null)\b", lambda m: _PYTHON_LITERALS[m.group(1)], span)
+    try:
+        value = ast.literal_eval(literal)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, (dict, list)) else None
+
+def clean_constant_name(response: Optional[str]) -> Optional[str]:
+    """
+    Validates a suggested constant name: quotes and backticks are stripped, and anything
+    that is not UPPER_SNAKE_CASE (including the model's "SKIP") yields None.
+    """
+    name = (response or "").replace('`', '').replace('"', '').replace("'", '').strip()
+    if not name or name.upper() == "SKIP":
+        return None
+    if name.isupper() and name.replace('_', '').isalnum():
+        return name
+    return None
+
+def known_types_note(known: Optional[dict]) -> str:
+    """Prompt input listing type hints already inferred locally, so the model only fills in the rest."""
+    if not known or not (known.get("parameters") or known.get("return_type")):
+        return ""
+    return f"\n\nAlready known types:\n{json.dumps(known)}"
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens an OpenAI-compatible provider (OpenAI, Groq) served from its prompt cache."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        return details.get("cached_tokens") or 0
+    return getattr(details, "cached_tokens", None) or 0
+
+def request_timeout(timeouts: Optional[Dict[str, float]], task: str) -> Optional[float]:
+    """
+    Seconds one request of `task` may take: its entry in `timeouts` (else "default"), capped
+    by the time left before the run deadline. None keeps the HTTP client's own timeout.
+    Raises DeadlineExceeded once the deadline has passed.
+    """
+    timeouts = timeouts or {}
+    timeout = timeouts.get(task, timeouts.get("default"))
+    remaining = check_deadline()
+    if remaining is not None:
+        timeout = min(float(timeout), remaining) if timeout else remaining
+    return float(timeout) if timeout else None
+
+def timeout_args(timeouts: Optional[Dict[str, float]], task: str) -> Dict[str, float]:
+    """`timeout=` for an OpenAI-style SDK call, omitted when unset (the SDKs read None as "no timeout")."""
+    timeout = request_timeout(timeouts, task)
+    return {"timeout": timeout} if timeout else {}
+
+# Built-in generation profiles: output limits sized to each task's answer, and temperature 0 so
+# repeated runs give the same answers the response cache already holds. YES/NO verdicts and
+# names finish in a handful of tokens; a blank line ends a name, since it is a single line.
+# [tool.zenco.generation] overrides these per task (and in its `default` table for all tasks).
+GENERATION_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {"max_tokens": 1024, "temperature": 0},
+    "docstring": {"max_tokens": 1024},
+    "docstring_batch": {"max_tokens": 4096},
+    "review_docstring": {"max_tokens": 1024},
+    "evaluate_docstring": {"max_tokens": 8},
+    "evaluate_name": {"max_tokens": 8},
+    "suggest_name": {"max_tokens": 24, "stop": ["\n\n"]},
+    "suggest_function_name": {"max_tokens": 24, "stop": ["\n\n"]},
+    "suggest_class_name": {"max_tokens": 24, "stop": ["\n\n"]},
+    "constant_name": {"max_tokens": 24, "stop": ["\n\n"]},
+    "constant_names": {"max_tokens": 1024},
+    "type_hints": {"max_tokens": 512},
+}
+
+def generation_profile(profiles: Optional[Dict[str, Dict[str, Any]]], task: str) -> Dict[str, Any]:
+    """
+    Generation parameters for one request of `task` (max_tokens, stop, temperature, seed):
+    the built-in profile, then the `default` entry of `profiles`, then the task's own entry.
+    """
+    profile = dict(GENERATION_PROFILES["default"])
+    profile.update(GENERATION_PROFILES.get(task, {}))
+    profiles = profiles or {}
+    profile.update(profiles.get("default", {}))
+    profile.update(profiles.get(task, {}))
+    return profile
+
+def chat_generation_args(profiles: Optional[Dict[str, Dict[str, Any]]], task: str) -> Dict[str, Any]:
+    """A generation profile as Chat Completions arguments (OpenAI, Groq, local servers and batch jobs)."""
+    profile = generation_profile(profiles, task)
+    return {name: profile[name] for name in ("max_tokens", "stop", "temperature", "seed") if name in profile}
+
+def parse_type_hints(response: Optional[str]) -> dict:
+    """Type hints from a `generate_type_hints` response; empty hints when none can be recovered."""
+    data = extract_json(response)
+    if not isinstance(data, dict):
+        if response:
+            print("Error parsing type hints: response was not a JSON object")
+        return {"parameters": {}, "return_type": None}
+    if not isinstance(data.get("parameters"), dict):
+        data["parameters"] = {}
+    data.setdefault("return_type", None)
+    return data
+
+def is_unsupported_parameter(error: Exception, parameter: str) -> bool:
+    """Whether a provider rejected a request because it does not support `parameter`."""
+    return getattr(error, "status_code", None) in (400, 422) and parameter in str(error)
+
+def failed_generation(error: Exception) -> Optional[str]:
+    """
+    The output Groq rejected in JSON mode because it did not parse ("json_validate_failed").
+    It is usually one `repair_json` away from usable, so it is returned rather than retried.
+    """
+    body = getattr(error, "body", None)
+    if isinstance(body, dict):
+        body = body.get("error", body)
+    if isinstance(body, dict) and body.get("code") == "json_validate_failed":
+        return body.get("failed_generation")
+    return None
+
+# A YES/NO verdict is final once a non-letter follows it ("no" must not match "not")
+VERDICT_PATTERN = re.compile(r"\b(yes|no)(?=[^a-z])")
+
+# Verdict tasks are read only up to the verdict word; their truncated streams are still complete answers
+VERDICT_TASKS = {"evaluate_docstring", "evaluate_name"}
 
 # ---- Interface (Contract) ----
 
@@ -11,13 +226,50 @@ class ILLMService(abc.ABC):
     An interface for a service that can make requests to an LLM.
     This defines our internal, application-specific contract, supporting both generation and evaluation tasks.
     """
+    provider: str = ""
+    model: str = ""
+
     @abc.abstractmethod
-    def create_completion(self, prompt: str) -> str:
+    def create_completion(self, prompt: str, task: str = "completion") -> str:
         """
         Generates a text completion based on the input prompt.
+        `task` names the kind of request (e.g. "docstring", "type_hints") so that
+        wrapping services such as the response cache can tell requests apart.
         """
         pass
 
+    def _complete(self, prompt: str, task: str) -> str:
+        """
+        Raising variant of `create_completion` used by wrapping services. Adapters override it
+        to let SDK errors propagate; the default simply defers to `create_completion`.
+        """
+        return self.create_completion(prompt, task=task)
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        """
+        Yields the completion in chunks as the provider produces them. Like `_complete` it raises
+        provider errors. Closing the iterator early abandons the rest of the response.
+        The default yields the whole completion as a single chunk.
+        """
+        yield self._complete(prompt, task)
+
+    def _stream_verdict(self, prompt: str, task: str) -> bool:
+        """
+        Streams a YES/NO prompt and stops reading as soon as the verdict word has arrived,
+        instead of waiting for the full response body.
+        """
+        text = ""
+        stream = self.stream_completion(prompt, task=task)
+        try:
+            for chunk in stream:
+                text += chunk or ""
+                match = VERDICT_PATTERN.search(text.lower())
+                if match:
+                    return match.group(1) == "yes"
+        finally:
+            stream.close()
+        return "yes" in text.lower().strip()
+
     @abc.abstractmethod
     def evaluate_docstring(self, code: str, docstring: str) -> bool:
         """
@@ -26,6 +278,15 @@ class ILLMService(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def review_docstring(self, code: str, docstring: str, style: str = "google") -> Optional[str]:
+        """
+        Judges a docstring and, if it is poor, rewrites it in the same request.
+        Returns the docstring to use (`docstring` itself when it is good enough, otherwise
+        the rewrite), or None if the review failed.
+        """
+        pass
+
     @abc.abstractmethod
     def suggest_name(self, code_context: str, old_name: str) -> Optional[str]:
         """
@@ -44,10 +305,11 @@ class ILLMService(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def generate_type_hints(self, code_context: str) -> dict:
+    def generate_type_hints(self, code_context: str, known: Optional[dict] = None) -> dict:
         """
         Generates type hints for a function.
         Returns a dict with 'parameters' (dict of param_name: type_hint) and 'return_type' (str).
+        `known` holds hints already inferred locally, in the same shape; only the rest is asked for.
         """
         pass
 
@@ -59,102 +321,119 @@ class ILLMService(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        """
+        Names several magic numbers in one request. `usages` maps each value to short
+        snippets of the code using it. Returns value -> name (None when the model declined
+        to name it, or for every value when no response came back); values missing from the
+        result were left out of the response.
+        """
+        pass
+
 # --- Implementation (Adapter) ---
 
 class GroqAdapter(ILLMService):
     """
     An adapter for the Groq API. It "adapts" the `groq` library to fit the simple `ILLMService` interface our applciation uses.
     """
+    provider = "groq"
+    # Cleared when the API rejects `response_format`; later requests fall back to plain prompts
+    structured_output = True
 
-    def __init__(self, api_key: str, model: str = "llama-3.3-70b-versatile"):
+    def __init__(self, api_key: str, model: str = "llama-3.3-70b-versatile", http_client: Optional[Any] = None,
+                 base_url: Optional[str] = None, timeouts: Optional[Dict[str, float]] = None,
+                 generation: Optional[Dict[str, Dict[str, Any]]] = None):
         if not api_key:
             raise ValueError("Groq API key is required.")
-        self.client = Groq(api_key=api_key)
+        # Retries are left to RateLimitedLLMService so they share one backoff and show up in telemetry
+        self.client = Groq(api_key=api_key, http_client=http_client, base_url=base_url, max_retries=0)
         self.model = model
+        # Per-task request timeouts in seconds, see `request_timeout`
+        self.timeouts = timeouts or {}
+        # Per-task overrides of GENERATION_PROFILES, see `generation_profile`
+        self.generation = generation or {}
+
+    def create_completion(self, prompt: str, task: str = "completion") -> str:
+        try:
+            return self._complete(prompt, task)
+        except Exception as e:
+            print(f"Error calling Groq API: {e}")
+            return ""
 
-    def create_completion(self, prompt: str) -> str:
+    def _complete(self, prompt: str, task: str) -> str:
         """
         Handles the specific logic for calling the Groq Chat Completions endpoint.
+        Raises the SDK's exceptions so wrapping services can retry or fail over.
         """
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
-                model=self.model
+            chat_completion = OpenAIAdapter._chat_completion(
+                self, task,
+                messages=chat_messages(prompt),
+                model=self.model,
+                **chat_generation_args(self.generation, task),
+                **timeout_args(self.timeouts, task),
             )
-            return chat_completion.choices[0].message.content
         except Exception as e:
-            print(f"Error calling Groq API: {e}")
-            return ""
+            rejected = failed_generation(e)
+            if rejected is None:
+                raise
+            return rejected
+        if chat_completion.usage:
+            record_usage(chat_completion.usage.prompt_tokens, chat_completion.usage.completion_tokens,
+                         cached_prompt_tokens(chat_completion.usage))
+        return chat_completion.choices[0].message.content
+
+    def _response_format(self, task: str) -> Optional[Dict[str, Any]]:
+        """Groq's JSON mode for tasks answering with a JSON object (Groq models do not all take a schema)."""
+        if task not in prompts.RESPONSE_SCHEMAS or not self.structured_output:
+            return None
+        return {"type": "json_object"}
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            messages=chat_messages(prompt),
+            model=self.model,
+            stream=True,
+            **chat_generation_args(self.generation, task),
+            **timeout_args(self.timeouts, task),
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response tells the server to stop generating
+            stream.close()
 
     def evaluate_docstring(self, code: str, docstring: str) -> bool:
         """
         Implements the LLM-powered evaluation logic using a specific prompt.
         """
-        prompt = f"""
-        Analyze the following Python code and its docstring.
-        Is the docstring a high-quality, descriptive, and helpful documentation for the code?
-        A good docstring explains what the code does, its arguments (if any), what it returns. A bad docstring is either too generic or completely irrevalent.
-
-        Code:
-        ```python
-        {code}
-        ```
-
-        Docstring:
-        ```
-        {docstring}
-        ```
-
-        Answer with a single word: YES or NO.
-        """
+        prompt = build_prompt(prompts.EVALUATE_DOCSTRING, f"Code:\n{code_block(code)}\n\nDocstring:\n{code_block(docstring, '')}")
         try:
-            response = self.create_completion(prompt)
-            return "yes" in response.lower().strip()
+            return self._stream_verdict(prompt, task="evaluate_docstring")
             
         except Exception as e:
             print(f"Error during docstring evaluation: {e}")
             return True
 
-    def evaluate_name(self, code_context: str, name: str) -> bool:
-        prompt = f"""
-        Analyze the Python code and the name `{name}`. Is this name high-quality and descriptive?
-
-        **Be very conservative.** Only answer NO if the name is clearly poor.
-        - **GOOD names** are descriptive and conventional (e.g., `user_profile`, `calculate_interest`, `first_number`, `item_count`, `MyCoolClass`). Do NOT flag these. These are YES.
-        - **BAD names** are too short (e.g., 'x', 'd'), too generic (e.g., 'data', 'temp'), or misleading. These are NO.
+    def review_docstring(self, code: str, docstring: str, style: str = "google") -> Optional[str]:
+        return OpenAIAdapter.review_docstring(self, code, docstring, style)
 
-        Code:
-        {code_context}        
-        Is `{name}` a high-quality name in this context? Answer with a single word: YES or NO.
-        """
+    def evaluate_name(self, code_context: str, name: str) -> bool:
+        prompt = build_prompt(prompts.EVALUATE_NAME, f"Name: `{name}`\n\nCode:\n{code_context}")
         try:
-            response = self.create_completion(prompt)
-            return "yes" in response.lower().strip()
+            return self._stream_verdict(prompt, task="evaluate_name")
         except Exception as e:
             print(f"Error during name evaluation: {e}")
             return True 
 
     
     def suggest_name(self, code_context: str, old_name: str) -> Optional[str]:
-        prompt = f"""
-        Analyze the following Python code. The variable `{old_name}` has been flagged for a potential naming issue.
-        Suggest a better, more descriptive variable name based on its usage.
-
-        Code:
-        {code_context}        
-        A good name is descriptive and follows Python's snake_case convention.
-        
-        **IMPORTANT: If you believe the original name `{old_name}` is already a good and descriptive name, then simply return the original name itself.**
-
-        Return only the new variable name, and nothing else.
-        """
+        prompt = build_prompt(prompts.SUGGEST_NAME, f"Name: `{old_name}`\n\nCode:\n{code_context}")
         try: 
-            response = self.create_completion(prompt=prompt).strip()
+            response = self.create_completion(prompt=prompt, task="suggest_name").strip()
             # basic validation
             if response and response.isidentifier():
                 return response
@@ -164,19 +443,9 @@ class GroqAdapter(ILLMService):
             return None
 
     def suggest_function_name(self, code_context: str, old_name: str) -> Optional[str]:
-        prompt = f"""
-        Analyze the following Python function/method. The name `{old_name}` has been flagged for a potential naming issue.
-        Suggest a better, more descriptive name that follows Python's snake_case convention.
-
-        Code:
-        {code_context}        
-        
-        **IMPORTANT: If you believe the original name `{old_name}` is already a good and descriptive name, then simply return the original name itself.**
-
-        Return only the new function name, and nothing else.
-        """
+        prompt = build_prompt(prompts.SUGGEST_FUNCTION_NAME, f"Name: `{old_name}`\n\nCode:\n{code_context}")
         try:
-            response = self.create_completion(prompt).strip()
+            response = self.create_completion(prompt, task="suggest_function_name").strip()
             if response and response.isidentifier():
                 return response
             return None
@@ -185,19 +454,9 @@ class GroqAdapter(ILLMService):
             return None
 
     def suggest_class_name(self, code_context: str, old_name: str) -> Optional[str]:
-        prompt = f"""
-        Analyze the following Python class. The name `{old_name}` has been flagged for a potential naming issue.
-        Suggest a better, more descriptive name that follows Python's PascalCase convention.
-
-        Code:
-        {code_context}        
-        
-        **IMPORTANT: If you believe the original name `{old_name}` is already a good and descriptive name, then simply return the original name itself.**
-
-        Return only the new class name, and nothing else.
-        """
+        prompt = build_prompt(prompts.SUGGEST_CLASS_NAME, f"Name: `{old_name}`\n\nCode:\n{code_context}")
         try:
-            response = self.create_completion(prompt).strip()
+            response = self.create_completion(prompt, task="suggest_class_name").strip()
             if response and response.isidentifier():
                 return response
             return None
@@ -205,61 +464,14 @@ class GroqAdapter(ILLMService):
             print(f"Error suggesting class name: {e}")
             return None
 
-    def generate_type_hints(self, code_context: str) -> dict:
+    def generate_type_hints(self, code_context: str, known: Optional[dict] = None) -> dict:
         """
         Generates type hints for a Python function by analyzing its implementation.
         Returns a dict with 'parameters' and 'return_type'.
         """
-        prompt = f"""
-        Analyze the following Python function and infer appropriate type hints for its parameters and return type.
-
-        Code:
-        ```python
-        {code_context}
-        ```
-
-        Based on the function's implementation, variable usage, and operations:
-        1. Infer the type for each parameter
-        2. Infer the return type
-        3. Use standard Python type hints (str, int, float, bool, list, dict, tuple, None, Any, Optional, etc.)
-        4. For complex types, use typing module annotations (List[str], Dict[str, int], Optional[int], etc.)
-
-        Return ONLY a valid JSON object in this exact format (no markdown, no extra text):
-        {{
-            "parameters": {{"param_name": "type_hint", "another_param": "type_hint"}},
-            "return_type": "return_type_hint"
-        }}
-
-        If a parameter type cannot be inferred confidently, use "Any".
-        If the function returns nothing, use "None".
-        """
+        prompt = build_prompt(prompts.TYPE_HINTS, f"Code:\n{code_block(code_context)}{known_types_note(known)}")
         try:
-            response = self.create_completion(prompt).strip()
-            
-            # Try to extract JSON from the response
-            # Sometimes LLMs wrap JSON in markdown code blocks
-            if "```json" in response:
-                response = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                response = response.split("```")[1].split("```")[0].strip()
-            
-            import json
-            type_hints = json.loads(response)
-            
-            # Validate the structure
-            if not isinstance(type_hints, dict):
-                return {"parameters": {}, "return_type": None}
-            
-            if "parameters" not in type_hints:
-                type_hints["parameters"] = {}
-            if "return_type" not in type_hints:
-                type_hints["return_type"] = None
-                
-            return type_hints
-            
-        except json.JSONDecodeError as e:
-            print(f"Error parsing type hints JSON: {e}")
-            print(f"Response was: {response}")
+            return parse_type_hints(self.create_completion(prompt, task="type_hints"))
         except Exception as e:
             print(f"Error generating type hints: {e}")
             return {"parameters": {}, "return_type": None}
@@ -268,51 +480,43 @@ class GroqAdapter(ILLMService):
         """
         Suggests a descriptive constant name for a magic number based on its usage context.
         """
-        prompt = f"""
-        Analyze the following Python code and suggest a descriptive constant name for the magic number `{magic_number}`.
-
-        Code:
-        ```python
-        {code_context}
-        ```
-
-        Based on how the number `{magic_number}` is used in the code:
-        1. Suggest a clear, descriptive constant name in UPPER_SNAKE_CASE
-        2. The name should explain what the number represents
-        3. Follow Python naming conventions
-
-        Examples of good constant names:
-        - MAX_RETRIES (for 3 in retry logic)
-        - TAX_RATE (for 0.15 in tax calculations)
-        - DEFAULT_TIMEOUT_SECONDS (for 30 in timeout logic)
-        - DAYS_IN_WEEK (for 7)
-
-        Return ONLY the constant name, nothing else. No explanations, no markdown.
-        If the number is too generic to name meaningfully, return "SKIP".
-        """
+        prompt = build_prompt(prompts.CONSTANT_NAME, f"Magic number: `{magic_number}`\n\nCode:\n{code_block(code_context)}")
         try:
-            response = self.create_completion(prompt).strip()
-            
-            # Clean up response
-            response = response.replace('`', '').replace('"', '').replace("'", '').strip()
-            
-            # Skip if LLM says it's too generic
-            if response.upper() == "SKIP" or not response:
-                return None
-            
-            # Validate it's a valid Python identifier in UPPER_SNAKE_CASE
-            if response.isupper() and response.replace('_', '').isalnum():
-                return response
-            
-            return None
+            response = self.create_completion(prompt, task="constant_name")
+            return clean_constant_name(response)
         except Exception as e:
             print(f"Error suggesting constant name: {e}")
             return None
 
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        """
+        Names every magic number of a file in one request (JSON object in, JSON object out).
+        """
+        prompt = build_prompt(prompts.CONSTANT_NAMES, f"Numbers:\n{json.dumps(usages, indent=2)}")
+        response = self.create_completion(prompt, task="constant_names")
+        if not response:
+            # Failed or only recorded for a batch job: asking again per value would not help
+            return dict.fromkeys(usages)
+        parsed = extract_json(response)
+        if not isinstance(parsed, dict):
+            return {}
+        return {
+            value: clean_constant_name(name)
+            for value, name in parsed.items()
+            if value in usages and isinstance(name, str)
+        }
+
 
 class OpenAIAdapter(ILLMService):
     """Adapter for OpenAI Chat Completions API (lazy import)."""
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
+    provider = "openai"
+    # Cleared when the server rejects `response_format`; later requests fall back to plain prompts
+    structured_output = True
+
+    def __init__(self, api_key: str, model: str = "gpt-4o-mini", http_client: Optional[Any] = None,
+                 base_url: Optional[str] = None, timeouts: Optional[Dict[str, float]] = None,
+                 generation: Optional[Dict[str, Dict[str, Any]]] = None, organization: Optional[str] = None,
+                 project: Optional[str] = None):
         if not api_key:
             raise ValueError("OpenAI API key is required.")
         try:
@@ -320,60 +524,101 @@ class OpenAIAdapter(ILLMService):
         except Exception:
             raise ImportError("openai package not installed. pip install openai")
         self.OpenAI = OpenAI
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, http_client=http_client, base_url=base_url, max_retries=0,
+                             organization=organization, project=project)
         self.model = model
+        self.timeouts = timeouts or {}
+        self.generation = generation or {}
 
-    def create_completion(self, prompt: str) -> str:
+    def create_completion(self, prompt: str, task: str = "completion") -> str:
         try:
-            resp = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            return resp.choices[0].message.content
+            return self._complete(prompt, task)
         except Exception as e:
             print(f"Error calling OpenAI API: {e}")
             return ""
 
-    def evaluate_docstring(self, code: str, docstring: str) -> bool:
-        prompt = f"""
-        Analyze the following Python code and its docstring.
-        Is the docstring a high-quality, descriptive, and helpful documentation for the code?
-        A good docstring explains what the code does, its arguments (if any), what it returns. A bad docstring is either too generic or completely irrevalent.
-
-        Code:
-        ```python
-        {code}
-        ```
-
-        Docstring:
-        ```
-        {docstring}
-        ```
+    def _response_format(self, task: str) -> Optional[Dict[str, Any]]:
+        """Schema-constrained output for tasks answering with a JSON object, see `prompts.RESPONSE_SCHEMAS`."""
+        schema = prompts.RESPONSE_SCHEMAS.get(task)
+        if schema is None or not self.structured_output:
+            return None
+        return {"type": "json_schema", "json_schema": {"name": task, "schema": schema}}
 
-        Answer with a single word: YES or NO.
+    def _chat_completion(self, task: str, **args: Any) -> Any:
         """
+        Chat completion with the task's `response_format`. A server that does not support it
+        (older models, some self-hosted servers) gets the request again without, and is not
+        asked for structured output again.
+        """
+        response_format = self._response_format(task)
+        if response_format is None:
+            return self.client.chat.completions.create(**args)
+        try:
+            return self.client.chat.completions.create(response_format=response_format, **args)
+        except Exception as e:
+            if not is_unsupported_parameter(e, "response_format"):
+                raise
+            print(f"{self.provider} rejected structured output; falling back to plain JSON prompts.")
+            self.structured_output = False
+            return self.client.chat.completions.create(**args)
+
+    def _complete(self, prompt: str, task: str) -> str:
+        resp = self._chat_completion(
+            task,
+            model=self.model,
+            messages=chat_messages(prompt),
+            **chat_generation_args(self.generation, task),
+            **timeout_args(self.timeouts, task),
+        )
+        if resp.usage:
+            # Prompts over 1024 tokens are cached automatically; the shared system prefix is what gets reused
+            record_usage(resp.usage.prompt_tokens, resp.usage.completion_tokens, cached_prompt_tokens(resp.usage))
+        return resp.choices[0].message.content
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=chat_messages(prompt),
+            stream=True,
+            **chat_generation_args(self.generation, task),
+            **timeout_args(self.timeouts, task),
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
+    def evaluate_docstring(self, code: str, docstring: str) -> bool:
+        prompt = build_prompt(prompts.EVALUATE_DOCSTRING, f"Code:\n{code_block(code)}\n\nDocstring:\n{code_block(docstring, '')}")
         try:
-            response = self.create_completion(prompt)
-            return "yes" in response.lower().strip()
+            return self._stream_verdict(prompt, task="evaluate_docstring")
         except Exception as e:
             print(f"Error during docstring evaluation: {e}")
             return True
 
-    def suggest_name(self, code_context: str, old_name: str) -> Optional[str]:
-        prompt = f"""
-        Analyze the following Python code. The variable `{old_name}` has been flagged for a potential naming issue.
-        Suggest a better, more descriptive variable name based on its usage.
-
-        Code:
-        {code_context}        
-        A good name is descriptive and follows Python's snake_case convention.
-        
-        **IMPORTANT: If you believe the original name `{old_name}` is already a good and descriptive name, then simply return the original name itself.**
+    def review_docstring(self, code: str, docstring: str, style: str = "google") -> Optional[str]:
+        prompt = build_prompt(prompts.REVIEW_DOCSTRING, f"Docstring style: {style}\n\n"
+                                                        f"Code:\n{code_block(code)}\n\nDocstring:\n{code_block(docstring, '')}")
+        response = self.create_completion(prompt, task="review_docstring")
+        parsed = extract_json(response)
+        if not isinstance(parsed, dict):
+            if response:
+                print("Error during docstring review: response was not a JSON object")
+            return None
+        if parsed.get("verdict") == "keep":
+            return docstring
+        replacement = parsed.get("docstring")
+        if parsed.get("verdict") == "rewrite" and isinstance(replacement, str) and replacement.strip():
+            return replacement.strip()
+        print("Error during docstring review: unexpected verdict")
+        return None
 
-        Return only the new variable name, and nothing else.
-        """
+    def suggest_name(self, code_context: str, old_name: str) -> Optional[str]:
+        prompt = build_prompt(prompts.SUGGEST_NAME, f"Name: `{old_name}`\n\nCode:\n{code_context}")
         try:
-            response = self.create_completion(prompt=prompt).strip()
+            response = self.create_completion(prompt=prompt, task="suggest_name").strip()
             if response and response.isidentifier():
                 return response
             return None
@@ -382,19 +627,9 @@ class OpenAIAdapter(ILLMService):
             return None
 
     def suggest_function_name(self, code_context: str, old_name: str) -> Optional[str]:
-        prompt = f"""
-        Analyze the following Python function/method. The name `{old_name}` has been flagged for a potential naming issue.
-        Suggest a better, more descriptive name that follows Python's snake_case convention.
-
-        Code:
-        {code_context}        
-        
-        **IMPORTANT: If you believe the original name `{old_name}` is already a good and descriptive name, then simply return the original name itself.**
-
-        Return only the new function name, and nothing else.
-        """
+        prompt = build_prompt(prompts.SUGGEST_FUNCTION_NAME, f"Name: `{old_name}`\n\nCode:\n{code_context}")
         try:
-            response = self.create_completion(prompt).strip()
+            response = self.create_completion(prompt, task="suggest_function_name").strip()
             if response and response.isidentifier():
                 return response
             return None
@@ -403,19 +638,9 @@ class OpenAIAdapter(ILLMService):
             return None
 
     def suggest_class_name(self, code_context: str, old_name: str) -> Optional[str]:
-        prompt = f"""
-        Analyze the following Python class. The name `{old_name}` has been flagged for a potential naming issue.
-        Suggest a better, more descriptive name that follows Python's PascalCase convention.
-
-        Code:
-        {code_context}        
-        
-        **IMPORTANT: If you believe the original name `{old_name}` is already a good and descriptive name, then simply return the original name itself.**
-
-        Return only the new class name, and nothing else.
-        """
+        prompt = build_prompt(prompts.SUGGEST_CLASS_NAME, f"Name: `{old_name}`\n\nCode:\n{code_context}")
         try:
-            response = self.create_completion(prompt).strip()
+            response = self.create_completion(prompt, task="suggest_class_name").strip()
             if response and response.isidentifier():
                 return response
             return None
@@ -424,62 +649,17 @@ class OpenAIAdapter(ILLMService):
             return None
 
     def evaluate_name(self, code_context: str, name: str) -> bool:
-        prompt = f"""
-        Analyze the Python code and the name `{name}`. Is this name high-quality and descriptive?
-
-        **Be very conservative.** Only answer NO if the name is clearly poor.
-        - **GOOD names** are descriptive and conventional (e.g., `user_profile`, `calculate_interest`, `first_number`, `item_count`, `MyCoolClass`). Do NOT flag these. These are YES.
-        - **BAD names** are too short (e.g., 'x', 'd'), too generic (e.g., 'data', 'temp'), or misleading. These are NO.
-
-        Code:
-        {code_context}        
-        Is `{name}` a high-quality name in this context? Answer with a single word: YES or NO.
-        """
+        prompt = build_prompt(prompts.EVALUATE_NAME, f"Name: `{name}`\n\nCode:\n{code_context}")
         try:
-            response = self.create_completion(prompt)
-            return "yes" in response.lower().strip()
+            return self._stream_verdict(prompt, task="evaluate_name")
         except Exception as e:
             print(f"Error during name evaluation: {e}")
             return True
 
-    def generate_type_hints(self, code_context: str) -> dict:
-        prompt = f"""
-        Analyze the following Python function and infer appropriate type hints for its parameters and return type.
-
-        Code:
-        ```python
-        {code_context}
-        ```
-
-        Based on the function's implementation, variable usage, and operations:
-        1. Infer the type for each parameter
-        2. Infer the return type
-        3. Use standard Python type hints (str, int, float, bool, list, dict, tuple, None, Any, Optional, etc.)
-        4. For complex types, use typing module annotations (List[str], Dict[str, int], Optional[int], etc.)
-
-        Return ONLY a valid JSON object in this exact format (no markdown, no extra text):
-        {{
-            "parameters": {{"param_name": "type_hint", "another_param": "type_hint"}},
-            "return_type": "return_type_hint"
-        }}
-
-        If a parameter type cannot be inferred confidently, use "Any".
-        If the function returns nothing, use "None".
-        """
-        try:
-            response = self.create_completion(prompt).strip()
-            # unwrap markdown
-            if "```json" in response:
-                response = response.split("```json")[1].split("```")[0].strip()
-            elif "```" in response:
-                response = response.split("```")[1].split("```")[0].strip()
-            import json
-            data = json.loads(response)
-            if not isinstance(data, dict):
-                return {"parameters": {}, "return_type": None}
-            data.setdefault("parameters", {})
-            data.setdefault("return_type", None)
-            return data
+    def generate_type_hints(self, code_context: str, known: Optional[dict] = None) -> dict:
+        prompt = build_prompt(prompts.TYPE_HINTS, f"Code:\n{code_block(code_context)}{known_types_note(known)}")
+        try:
+            return parse_type_hints(self.create_completion(prompt, task="type_hints"))
         except Exception as e:
             print(f"Error generating type hints: {e}")
             return {"parameters": {}, "return_type": None}
@@ -488,34 +668,151 @@ class OpenAIAdapter(ILLMService):
         """Reuse GroqAdapter implementation."""
         return GroqAdapter.suggest_constant_name(self, code_context, magic_number)
 
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        return GroqAdapter.suggest_constant_names(self, usages)
+
+class LocalAdapter(OpenAIAdapter):
+    """
+    Adapter for self-hosted OpenAI-compatible endpoints (llama.cpp server, vLLM, Ollama, LM Studio).
+    Authentication is optional: `api_key` is sent as a bearer token, or in `auth_header` for
+    servers that expect another header. Without a model, the first one the server lists is used.
+    """
+    provider = "local"
+
+    def __init__(self, base_url: str, model: Optional[str] = None, api_key: Optional[str] = None,
+                 auth_header: Optional[str] = None, http_client: Optional[Any] = None,
+                 timeouts: Optional[Dict[str, float]] = None, generation: Optional[Dict[str, Dict[str, Any]]] = None):
+        if not base_url:
+            raise ValueError("A base URL is required for the local provider.")
+        try:
+            from openai import OpenAI  # type: ignore
+        except Exception:
+            raise ImportError("openai package not installed. pip install openai")
+        headers = {}
+        if api_key and auth_header and auth_header.lower() != "authorization":
+            headers[auth_header] = api_key
+            api_key = None
+        self.OpenAI = OpenAI
+        # The SDK requires a key; servers without authentication ignore the placeholder
+        self.client = OpenAI(api_key=api_key or "not-needed", base_url=base_url, http_client=http_client,
+                             default_headers=headers or None, max_retries=0)
+        self.timeouts = timeouts or {}
+        self.generation = generation or {}
+        self.model = model or self._served_model()
+
+    def _served_model(self) -> str:
+        try:
+            models = self.client.models.list().data
+        except Exception as e:
+            raise ValueError(f"Could not list the models of the local server; pass --model. ({e})")
+        if not models:
+            raise ValueError("The local server lists no models; pass --model.")
+        return models[0].id
+
+    def create_completion(self, prompt: str, task: str = "completion") -> str:
+        try:
+            return self._complete(prompt, task)
+        except Exception as e:
+            print(f"Error calling local LLM server: {e}")
+            return ""
+
 class AnthropicAdapter(ILLMService):
     """Adapter for Anthropic Messages API (Claude) with lazy import."""
-    def __init__(self, api_key: str, model: str = "claude-3-5-sonnet-latest"):
+    provider = "anthropic"
+
+    def __init__(self, api_key: str, model: str = "claude-3-5-sonnet-latest", http_client: Optional[Any] = None,
+                 base_url: Optional[str] = None, timeouts: Optional[Dict[str, float]] = None,
+                 generation: Optional[Dict[str, Dict[str, Any]]] = None):
         if not api_key:
             raise ValueError("Anthropic API key is required.")
         try:
             import anthropic  # lazy import
         except Exception:
             raise ImportError("anthropic package not installed. pip install anthropic")
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = anthropic.Anthropic(api_key=api_key, http_client=http_client, base_url=base_url,
+                                          max_retries=0)
         self.model = model
+        self.timeouts = timeouts or {}
+        self.generation = generation or {}
 
-    def create_completion(self, prompt: str) -> str:
+    def create_completion(self, prompt: str, task: str = "completion") -> str:
         try:
-            msg = self.client.messages.create(
-                model=self.model,
-                max_tokens=2048,
-                messages=[{"role": "user", "content": prompt}],
-            )
-            # content is a list of blocks; take first text
-            return "".join(block.text for block in msg.content if hasattr(block, "text"))
+            return self._complete(prompt, task)
         except Exception as e:
             print(f"Error calling Anthropic API: {e}")
             return ""
 
+    @staticmethod
+    def _message_args(prompt: str) -> Dict[str, Any]:
+        """
+        The task instructions go into a system block marked with `cache_control`, so Anthropic
+        caches them and later requests of the task pay the cache-read rate for that prefix.
+        """
+        instructions, content = split_prompt(prompt)
+        args: Dict[str, Any] = {"messages": [{"role": "user", "content": content}]}
+        if instructions is not None:
+            args["system"] = [{"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}}]
+        return args
+
+    @staticmethod
+    def _tool_args(task: str) -> Dict[str, Any]:
+        """
+        Anthropic has no JSON mode; for tasks answering with a JSON object the model is made to
+        call a tool whose input schema is the answer's, and the tool input is the answer.
+        """
+        schema = prompts.RESPONSE_SCHEMAS.get(task)
+        if schema is None:
+            return {}
+        return {"tools": [{"name": task, "description": "Records the answer.", "input_schema": schema}],
+                "tool_choice": {"type": "tool", "name": task}}
+
+    def _generation_args(self, task: str) -> Dict[str, Any]:
+        """The task's generation profile as Messages API arguments (`max_tokens` is required there)."""
+        profile = generation_profile(self.generation, task)
+        args: Dict[str, Any] = {"max_tokens": profile.get("max_tokens", 1024)}
+        if "temperature" in profile:
+            args["temperature"] = profile["temperature"]
+        # Anthropic rejects whitespace-only stop sequences
+        stop = [sequence for sequence in profile.get("stop", []) if sequence.strip()]
+        if stop:
+            args["stop_sequences"] = stop
+        return args
+
+    def _complete(self, prompt: str, task: str) -> str:
+        msg = self.client.messages.create(
+            model=self.model,
+            **self._generation_args(task),
+            **self._message_args(prompt),
+            **self._tool_args(task),
+            **timeout_args(self.timeouts, task),
+        )
+        # content is a list of blocks; take first text
+        if msg.usage:
+            # input_tokens excludes the tokens written to or read from the prompt cache
+            cache_read = getattr(msg.usage, "cache_read_input_tokens", None) or 0
+            cache_write = getattr(msg.usage, "cache_creation_input_tokens", None) or 0
+            record_usage(msg.usage.input_tokens + cache_read + cache_write, msg.usage.output_tokens, cache_read)
+        for block in msg.content:
+            if getattr(block, "type", None) == "tool_use":
+                return json.dumps(block.input)
+        return "".join(block.text for block in msg.content if hasattr(block, "text"))
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        with self.client.messages.stream(
+            model=self.model,
+            **self._generation_args(task),
+            **self._message_args(prompt),
+            **timeout_args(self.timeouts, task),
+        ) as stream:
+            for text in stream.text_stream:
+                yield text
+
     # Delegate to OpenAIAdapter's implementation by creating a helper instance
     def evaluate_docstring(self, code: str, docstring: str) -> bool:
         return OpenAIAdapter.evaluate_docstring(self, code, docstring)
+
+    def review_docstring(self, code: str, docstring: str, style: str = "google") -> Optional[str]:
+        return OpenAIAdapter.review_docstring(self, code, docstring, style)
     
     def suggest_name(self, code_context: str, old_name: str) -> Optional[str]:
         return OpenAIAdapter.suggest_name(self, code_context, old_name)
@@ -529,16 +826,22 @@ class AnthropicAdapter(ILLMService):
     def evaluate_name(self, code_context: str, name: str) -> bool:
         return OpenAIAdapter.evaluate_name(self, code_context, name)
     
-    def generate_type_hints(self, code_context: str) -> dict:
-        return OpenAIAdapter.generate_type_hints(self, code_context)
+    def generate_type_hints(self, code_context: str, known: Optional[dict] = None) -> dict:
+        return OpenAIAdapter.generate_type_hints(self, code_context, known)
     
     def suggest_constant_name(self, code_context: str, magic_number: str) -> Optional[str]:
         return GroqAdapter.suggest_constant_name(self, code_context, magic_number)
 
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        return GroqAdapter.suggest_constant_names(self, usages)
+
 
 class GeminiAdapter(ILLMService):
     """Adapter for Google Gemini (google-generativeai) with lazy import."""
-    def __init__(self, api_key: str, model: str = "gemini-1.5-pro"):
+    provider = "gemini"
+
+    def __init__(self, api_key: str, model: str = "gemini-1.5-pro", timeouts: Optional[Dict[str, float]] = None,
+                 generation: Optional[Dict[str, Dict[str, Any]]] = None):
         if not api_key:
             raise ValueError("Gemini API key is required.")
         try:
@@ -548,19 +851,82 @@ class GeminiAdapter(ILLMService):
         genai.configure(api_key=api_key)
         self.genai = genai
         self.model_name = model
+        self.model = model
+        self.timeouts = timeouts or {}
+        self.generation = generation or {}
+        # GenerativeModel handles are reusable; build each one once instead of per call
+        self._model_handles: Dict[Any, Any] = {}
+        self._model_handles_lock = threading.Lock()
 
-    def create_completion(self, prompt: str) -> str:
+    def _get_model_handle(self, model_name: str, instructions: Optional[str] = None) -> Any:
+        """
+        Returns the handle for a model and system instruction. Each task's instructions get their
+        own handle, so they are sent as `system_instruction`, the prefix Gemini's implicit cache reuses.
+        """
+        key = (model_name, instructions)
+        with self._model_handles_lock:
+            if key not in self._model_handles:
+                if instructions is None:
+                    self._model_handles[key] = self.genai.GenerativeModel(model_name)
+                else:
+                    self._model_handles[key] = self.genai.GenerativeModel(model_name, system_instruction=instructions)
+            return self._model_handles[key]
+
+    def _request_options(self, task: str) -> Dict[str, float]:
+        timeout = request_timeout(self.timeouts, task)
+        return {"timeout": timeout} if timeout else {}
+
+    def _generation_config(self, task: str) -> Dict[str, Any]:
+        """The task's generation profile as a GenerationConfig, with JSON mode for tasks answering with a JSON object."""
+        profile = generation_profile(self.generation, task)
+        config: Dict[str, Any] = {}
+        if "max_tokens" in profile:
+            config["max_output_tokens"] = profile["max_tokens"]
+        if "stop" in profile:
+            config["stop_sequences"] = profile["stop"]
+        if "temperature" in profile:
+            config["temperature"] = profile["temperature"]
+        if task in prompts.RESPONSE_SCHEMAS:
+            config["response_mime_type"] = "application/json"
+        return config
+
+    def create_completion(self, prompt: str, task: str = "completion") -> str:
         try:
-            model = self.genai.GenerativeModel(self.model_name)
-            resp = model.generate_content(prompt)
-            return resp.text or ""
+            return self._complete(prompt, task)
         except Exception as e:
             print(f"Error calling Gemini API: {e}")
             return ""
 
+    def _complete(self, prompt: str, task: str) -> str:
+        instructions, content = split_prompt(prompt)
+        model = self._get_model_handle(self.model_name, instructions)
+        resp = model.generate_content(content, generation_config=self._generation_config(task),
+                                      request_options=self._request_options(task))
+        usage = getattr(resp, "usage_metadata", None)
+        if usage:
+            record_usage(usage.prompt_token_count, usage.candidates_token_count,
+                         getattr(usage, "cached_content_token_count", None) or 0)
+        return resp.text or ""
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        instructions, content = split_prompt(prompt)
+        model = self._get_model_handle(self.model_name, instructions)
+        for chunk in model.generate_content(content, stream=True, generation_config=self._generation_config(task),
+                                            request_options=self._request_options(task)):
+            # Chunks without text parts (e.g. safety metadata) raise on `.text`
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
     # Delegate to OpenAIAdapter's implementation
     def evaluate_docstring(self, code: str, docstring: str) -> bool:
         return OpenAIAdapter.evaluate_docstring(self, code, docstring)
+
+    def review_docstring(self, code: str, docstring: str, style: str = "google") -> Optional[str]:
+        return OpenAIAdapter.review_docstring(self, code, docstring, style)
     
     def suggest_name(self, code_context: str, old_name: str) -> Optional[str]:
         return OpenAIAdapter.suggest_name(self, code_context, old_name)
@@ -574,8 +940,776 @@ class GeminiAdapter(ILLMService):
     def evaluate_name(self, code_context: str, name: str) -> bool:
         return OpenAIAdapter.evaluate_name(self, code_context, name)
     
-    def generate_type_hints(self, code_context: str) -> dict:
-        return OpenAIAdapter.generate_type_hints(self, code_context)
+    def generate_type_hints(self, code_context: str, known: Optional[dict] = None) -> dict:
+        return OpenAIAdapter.generate_type_hints(self, code_context, known)
     
     def suggest_constant_name(self, code_context: str, magic_number: str) -> Optional[str]:
         return GroqAdapter.suggest_constant_name(self, code_context, magic_number)
+
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        return GroqAdapter.suggest_constant_names(self, usages)
+
+
+# --- Decorators (Wrappers) ---
+
+class LLMServiceWrapper(ILLMService):
+    """
+    Base class for services that decorate another ILLMService (caching, rate limiting, ...).
+    Subclasses override `_complete`, the raising request path shared by adapters and wrappers;
+    `create_completion` keeps the public contract of printing errors and returning "". The
+    prompt-level methods reuse the shared adapter prompts so every request made through the
+    wrapper passes through the override.
+    Unknown attributes are looked up on the wrapped service.
+    """
+
+    def __init__(self, inner: ILLMService):
+        self.inner = inner
+
+    @property
+    def provider(self) -> str:
+        return self.inner.provider
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    def __getattr__(self, name: str):
+        # Only called when normal lookup fails; guard against recursion before `inner` is set.
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def create_completion(self, prompt: str, task: str = "completion") -> str:
+        try:
+            return self._complete(prompt, task)
+        except (CircuitOpenError, DeadlineExceeded):
+            # Reported once for the whole run; skipped requests and unfinished files are listed at the end
+            return ""
+        except Exception as e:
+            print(f"Error calling {self.provider} API: {e}")
+            return ""
+
+    def _complete(self, prompt: str, task: str) -> str:
+        """Raising request path; subclasses override this and call `self.inner._complete`."""
+        return self.inner._complete(prompt, task)
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        return self.inner.stream_completion(prompt, task=task)
+
+    def evaluate_docstring(self, code: str, docstring: str) -> bool:
+        return OpenAIAdapter.evaluate_docstring(self, code, docstring)
+
+    def review_docstring(self, code: str, docstring: str, style: str = "google") -> Optional[str]:
+        return OpenAIAdapter.review_docstring(self, code, docstring, style)
+
+    def suggest_name(self, code_context: str, old_name: str) -> Optional[str]:
+        return OpenAIAdapter.suggest_name(self, code_context, old_name)
+
+    def suggest_function_name(self, code_context: str, old_name: str) -> Optional[str]:
+        return OpenAIAdapter.suggest_function_name(self, code_context, old_name)
+
+    def suggest_class_name(self, code_context: str, old_name: str) -> Optional[str]:
+        return OpenAIAdapter.suggest_class_name(self, code_context, old_name)
+
+    def evaluate_name(self, code_context: str, name: str) -> bool:
+        return OpenAIAdapter.evaluate_name(self, code_context, name)
+
+    def generate_type_hints(self, code_context: str, known: Optional[dict] = None) -> dict:
+        return OpenAIAdapter.generate_type_hints(self, code_context, known)
+
+    def suggest_constant_name(self, code_context: str, magic_number: str) -> Optional[str]:
+        return GroqAdapter.suggest_constant_name(self, code_context, magic_number)
+
+    def suggest_constant_names(self, usages: Dict[str, List[str]]) -> Dict[str, Optional[str]]:
+        return GroqAdapter.suggest_constant_names(self, usages)
+
+
+# --- Rate limiting ---
+
+RETRYABLE_STATUS_CODES = {429, 529}
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for provider errors that mean "slow down": HTTP 429 and Anthropic's 529 overloaded."""
+    for attr in ("status_code", "code"):
+        if getattr(error, attr, None) in RETRYABLE_STATUS_CODES:
+            return True
+    # google.api_core raises ResourceExhausted for quota errors
+    return type(error).__name__ in {"RateLimitError", "ResourceExhausted", "OverloadedError"}
+
+
+TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504}
+
+
+def is_key_error(error: Exception) -> bool:
+    """
+    True for errors about the API key itself: rejected credentials (401/403) or an exhausted
+    quota (a 429 saying "insufficient_quota"). Retrying with the same key cannot help.
+    """
+    if getattr(error, "status_code", None) in {401, 403} or type(error).__name__ in {
+        "AuthenticationError", "PermissionDeniedError",
+    }:
+        return True
+    # Per-minute quota errors (e.g. Gemini's "Quota exceeded") clear on their own and are retried instead
+    return is_rate_limit_error(error) and "insufficient_quota" in str(error)
+
+
+def is_transient_error(error: Exception) -> bool:
+    """True for errors worth retrying as-is: timeouts, dropped connections and 5xx responses."""
+    if getattr(error, "status_code", None) in TRANSIENT_STATUS_CODES:
+        return True
+    return type(error).__name__ in {
+        "APIConnectionError", "APITimeoutError", "InternalServerError", "ServiceUnavailable", "DeadlineExceeded",
+    }
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Reads the `Retry-After` / `retry-after-ms` header from an SDK error's HTTP response, in seconds."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class TokenBucket:
+    """A thread-safe token bucket refilled continuously at `per_minute` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = float(per_minute)
+        self.capacity = self.per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> None:
+        """Blocks until `amount` units are available, then takes them."""
+        # Requests larger than the bucket would never fit; let them drain it instead.
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.level = min(self.capacity, self.level + (now - self.updated) * self.per_minute / 60)
+                self.updated = now
+                if self.level >= amount:
+                    self.level -= amount
+                    return
+                wait = (amount - self.level) * 60 / self.per_minute
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Shared request/token budgets for one provider, plus 429-aware backoff.
+
+    When any caller hits a rate limit the whole limiter cools down until the provider's
+    `Retry-After` (or a jittered exponential delay) has passed, so concurrent workers stop
+    hammering the API together instead of each discovering the limit on its own.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limited_count = 0
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens: int = 0) -> None:
+        """Waits out any cool-down, then takes one request and `estimated_tokens` from the buckets."""
+        while True:
+            with self._lock:
+                wait = self._resume_at - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        if self.request_bucket:
+            self.request_bucket.acquire(1)
+        if self.token_bucket and estimated_tokens:
+            self.token_bucket.acquire(estimated_tokens)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Starts a shared cool-down after a rate-limit error and returns its length in seconds."""
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay)
+        else:
+            # Full jitter keeps retrying workers from synchronising
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        with self._lock:
+            self.rate_limited_count += 1
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        return delay
+
+    def retry_delay(self, attempt: int) -> float:
+        """Jittered exponential delay before retrying a transient (non rate-limit) failure."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def cooldown_remaining(self) -> float:
+        """Seconds left of the current rate-limit cool-down, 0.0 when requests may go out."""
+        with self._lock:
+            return max(0.0, self._resume_at - time.monotonic())
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, **settings) -> RateLimiter:
+    """Returns the process-wide RateLimiter for a provider, creating it with `settings` on first use."""
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            _rate_limiters[provider] = RateLimiter(**settings)
+        return _rate_limiters[provider]
+
+
+class RateLimitedLLMService(LLMServiceWrapper):
+    """
+    Throttles requests through a RateLimiter and retries rate-limit errors with a shared
+    backoff, and transient failures (timeouts, 5xx) with a per-request jittered delay.
+    """
+
+    def __init__(self, inner: ILLMService, limiter: RateLimiter):
+        super().__init__(inner)
+        self.limiter = limiter
+
+    def _acquire(self, prompt: str) -> None:
+        # Never start, or retry, a request after the run deadline
+        check_deadline()
+        waited_from = time.monotonic()
+        self.limiter.acquire(estimate_tokens(prompt))
+        record_throttle(time.monotonic() - waited_from)
+
+    def _complete(self, prompt: str, task: str) -> str:
+        attempt = 0
+        while True:
+            self._acquire(prompt)
+            try:
+                return self.inner._complete(prompt, task)
+            except Exception as e:
+                if attempt >= self.limiter.max_retries or not self._retry(e, attempt):
+                    raise
+                attempt += 1
+
+    def _retry(self, error: Exception, attempt: int) -> bool:
+        """Waits (or schedules a shared cool-down) before retrying `error`; False if it is not retryable."""
+        if isinstance(error, DeadlineExceeded) or is_key_error(error):
+            return False
+        if is_rate_limit_error(error):
+            delay = self.limiter.backoff(attempt, get_retry_after(error))
+            print(f"  [RATE LIMIT] {self.provider} asked us to slow down; retrying in {delay:.1f}s")
+        elif is_transient_error(error):
+            delay = self.limiter.retry_delay(attempt)
+            remaining = check_deadline()
+            if remaining is not None and delay >= remaining:
+                # The retry could not start before the deadline anyway
+                return False
+            print(f"  [RETRY] {self.provider} request failed ({type(error).__name__}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+            record_throttle(delay)
+        else:
+            return False
+        record_retry()
+        return True
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        attempt = 0
+        while True:
+            self._acquire(prompt)
+            started = False
+            stream = self.inner.stream_completion(prompt, task=task)
+            try:
+                for chunk in stream:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                # Once chunks have been handed out a retry would duplicate them
+                if started or attempt >= self.limiter.max_retries or not self._retry(e, attempt):
+                    raise
+                attempt += 1
+            finally:
+                stream.close()
+
+
+# --- Key pools ---
+
+class KeyPoolExhausted(Exception):
+    """Raised when every API key of a provider's pool is evicted."""
+
+
+class KeyPoolLLMService(LLMServiceWrapper):
+    """
+    Spreads requests round-robin over one provider's API keys. Each member is the adapter for
+    one key behind its own RateLimiter, so request/token budgets and 429 cool-downs are kept
+    per key, and keys that are cooling down are tried last.
+
+    A key whose request fails with an auth or quota error (see `is_key_error`) is evicted for
+    `eviction_seconds` and the request moves on to the next key. When no key is left the
+    request raises KeyPoolExhausted (or the last key's error).
+    """
+
+    def __init__(self, members: List[ILLMService], eviction_seconds: float = 300.0):
+        super().__init__(members[0])
+        self.members = members
+        self.eviction_seconds = eviction_seconds
+        self.evictions = 0
+        self._evicted_until = [0.0] * len(members)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _order(self) -> List[int]:
+        """Members to try for one request, starting from the next in turn and skipping evicted keys."""
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.members)
+            now = time.monotonic()
+            available = [(start + i) % len(self.members) for i in range(len(self.members))]
+            available = [i for i in available if self._evicted_until[i] <= now]
+        # A stable sort keeps the round-robin order among keys that are not cooling down
+        return sorted(available, key=lambda i: self._cooldown(i) > 0)
+
+    def _cooldown(self, index: int) -> float:
+        limiter = getattr(self.members[index], "limiter", None)
+        return limiter.cooldown_remaining() if limiter else 0.0
+
+    def _evict(self, index: int, error: Exception) -> None:
+        with self._lock:
+            self._evicted_until[index] = time.monotonic() + self.eviction_seconds
+            self.evictions += 1
+        print(f"  [KEY POOL] {self.provider} key {index + 1} of {len(self.members)} failed "
+              f"({type(error).__name__}); evicted for {self.eviction_seconds:.0f}s")
+
+    def available_keys(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for until in self._evicted_until if until <= now)
+
+    def _complete(self, prompt: str, task: str) -> str:
+        last_error: Optional[Exception] = None
+        for index in self._order():
+            try:
+                return self.members[index]._complete(prompt, task)
+            except Exception as e:
+                if not is_key_error(e):
+                    raise
+                self._evict(index, e)
+                last_error = e
+        raise last_error or KeyPoolExhausted(f"Every {self.provider} API key is evicted")
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        last_error: Optional[Exception] = None
+        for index in self._order():
+            started = False
+            stream = self.members[index].stream_completion(prompt, task=task)
+            try:
+                for chunk in stream:
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not is_key_error(e):
+                    raise
+                self._evict(index, e)
+                last_error = e
+            finally:
+                stream.close()
+        raise last_error or KeyPoolExhausted(f"Every {self.provider} API key is evicted")
+
+
+# --- Circuit breaking ---
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+# Circuit states: closed (calls flow), open (calls fail fast), half_open (one probe call allowed)
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """
+    True for errors that say the provider itself is unhealthy or unusable (outages, timeouts,
+    exhausted rate-limit retries, rejected credentials), as opposed to a problem with one request.
+    """
+    if is_rate_limit_error(error) or is_transient_error(error):
+        return True
+    return getattr(error, "status_code", None) in {401, 403} or type(error).__name__ in {
+        "AuthenticationError", "PermissionDeniedError", "KeyPoolExhausted",
+    }
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a provider that keeps failing.
+
+    The circuit opens after `failure_threshold` consecutive provider failures, or once the
+    failure rate over the last `window` calls reaches `error_rate`. While open, calls fail
+    immediately with CircuitOpenError. After `cooldown_seconds` a single probe call is let
+    through (half-open): success closes the circuit, failure opens it for another cool-down.
+    Requests refused while the circuit is not closed are kept in `skipped`.
+    """
+
+    def __init__(self, name: str = "", failure_threshold: int = 5, error_rate: float = 0.5, window: int = 20,
+                 cooldown_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.window = window
+        self.cooldown_seconds = cooldown_seconds
+        self.state = CIRCUIT_CLOSED
+        self.opened_count = 0
+        self.skipped: List[Dict[str, Any]] = []
+        self._outcomes = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self, task: str) -> None:
+        """Raises CircuitOpenError (and records the skipped request) unless a call may proceed."""
+        with self._lock:
+            if self.state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self.state = CIRCUIT_HALF_OPEN
+            if self.state == CIRCUIT_CLOSED:
+                return
+            if self.state == CIRCUIT_HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            labels = current_labels()
+            self.skipped.append({"provider": self.name, "task": task,
+                                 "file": labels.get("file"), "function": labels.get("function")})
+        raise CircuitOpenError(f"{self.name} circuit breaker is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+            if self.state == CIRCUIT_HALF_OPEN:
+                self.state = CIRCUIT_CLOSED
+                self._probing = False
+                self._outcomes.clear()
+                print(f"  [CIRCUIT] {self.name} recovered; resuming requests")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            failures = self._outcomes.count(False)
+            tripped = (self._consecutive_failures >= self.failure_threshold
+                       or (len(self._outcomes) == self.window and failures / self.window >= self.error_rate))
+            if self.state == CIRCUIT_HALF_OPEN or (self.state == CIRCUIT_CLOSED and tripped):
+                self.state = CIRCUIT_OPEN
+                self.opened_count += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+                print(f"  [CIRCUIT] {self.name} is failing; skipping its requests for {self.cooldown_seconds:.0f}s")
+
+    def release_probe(self) -> None:
+        """Ends a half-open probe that neither succeeded nor failed as a provider failure."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "opened": self.opened_count, "skipped": len(self.skipped)}
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str, **settings) -> CircuitBreaker:
+    """Returns the process-wide CircuitBreaker for a provider, creating it with `settings` on first use."""
+    with _circuit_breakers_lock:
+        if provider not in _circuit_breakers:
+            _circuit_breakers[provider] = CircuitBreaker(name=provider, **settings)
+        return _circuit_breakers[provider]
+
+
+def circuit_breakers() -> Dict[str, CircuitBreaker]:
+    """All circuit breakers created in this process, by provider."""
+    with _circuit_breakers_lock:
+        return dict(_circuit_breakers)
+
+
+class CircuitBreakerLLMService(LLMServiceWrapper):
+    """
+    Guards a provider with a CircuitBreaker. It sits outside the rate limiter, so a failure is
+    only counted once that layer's retries are exhausted, and inside failover, so an open
+    circuit sends requests straight to the fallbacks.
+    """
+
+    def __init__(self, inner: ILLMService, breaker: CircuitBreaker):
+        super().__init__(inner)
+        self.breaker = breaker
+
+    def _record(self, error: Optional[Exception]) -> None:
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, DeadlineExceeded):
+            # The run's own deadline refused the request; google.api_core's same-named timeout
+            # would otherwise count it as a provider failure
+            self.breaker.release_probe()
+        elif is_provider_failure(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_probe()
+
+    def _complete(self, prompt: str, task: str) -> str:
+        self.breaker.allow(task)
+        try:
+            response = self.inner._complete(prompt, task)
+        except Exception as e:
+            self._record(e)
+            raise
+        self._record(None)
+        return response
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        self.breaker.allow(task)
+        stream = self.inner.stream_completion(prompt, task=task)
+        error: Optional[Exception] = None
+        try:
+            for chunk in stream:
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            stream.close()
+            self._record(error)
+
+
+# --- Failover & hedging ---
+
+class LatencyTracker:
+    """A rolling window of recent successful call latencies for one backend."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Returns the `pct` percentile of the window, or None if it is empty."""
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class FailoverLLMService(LLMServiceWrapper):
+    """
+    A composite service over an ordered list of backends.
+
+    Requests go to the first backend and fail over down the list on errors or empty answers.
+    With `hedge=True`, once the primary has enough latency samples, a request that outlives the
+    primary's p95 latency is duplicated to the second backend and the first valid answer wins.
+    """
+
+    def __init__(self, services: List[ILLMService], hedge: bool = False, hedge_min_samples: int = 20):
+        if not services:
+            raise ValueError("FailoverLLMService needs at least one service.")
+        super().__init__(services[0])
+        self.services = services
+        self.hedge = hedge and len(services) > 1
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = [LatencyTracker() for _ in services]
+        self.failover_count = 0
+        self.hedged_count = 0
+        self.hedge_wins = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Hedged calls get their own threads so they never wait on the RequestEngine's pool
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="zenco-hedge")
+            return self._executor
+
+    def _call(self, index: int, prompt: str, task: str) -> str:
+        start = time.monotonic()
+        response = self.services[index]._complete(prompt, task)
+        if not response:
+            raise ValueError(f"{self.services[index].provider} returned an empty response")
+        self.latencies[index].record(time.monotonic() - start)
+        return response
+
+    def _complete(self, prompt: str, task: str) -> str:
+        last_error: Optional[Exception] = None
+        start_index = 0
+        if self.hedge:
+            try:
+                return self._hedged_complete(prompt, task)
+            except Exception as e:
+                last_error = e
+                start_index = 2
+
+        for index in range(start_index, len(self.services)):
+            try:
+                return self._call(index, prompt, task)
+            except DeadlineExceeded:
+                # Out of time for every backend, not just this one
+                raise
+            except Exception as e:
+                last_error = e
+                if index + 1 < len(self.services):
+                    with self._lock:
+                        self.failover_count += 1
+                    print(f"  [FAILOVER] {self.services[index].provider} failed ({e}); trying {self.services[index + 1].provider}")
+        raise last_error
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        """Streams from the first backend that produces output; streams are never hedged."""
+        last_error: Optional[Exception] = None
+        for index, service in enumerate(self.services):
+            started = False
+            stream = service.stream_completion(prompt, task=task)
+            try:
+                for chunk in stream:
+                    started = True
+                    yield chunk
+                if started:
+                    return
+                raise ValueError(f"{service.provider} returned an empty response")
+            except Exception as e:
+                if started:
+                    raise
+                last_error = e
+                if index + 1 < len(self.services):
+                    with self._lock:
+                        self.failover_count += 1
+                    print(f"  [FAILOVER] {service.provider} failed ({e}); trying {self.services[index + 1].provider}")
+            finally:
+                stream.close()
+        raise last_error
+
+    def _hedged_complete(self, prompt: str, task: str) -> str:
+        """Runs the primary, hedging to the secondary once the primary exceeds its p95 latency."""
+        hedge_after = None
+        if len(self.latencies[0]) >= self.hedge_min_samples:
+            hedge_after = self.latencies[0].percentile(95)
+
+        executor = self._get_executor()
+        # Each attempt runs in a copy of the caller's context so telemetry still sees the call
+        primary = executor.submit(contextvars.copy_context().run, self._call, 0, prompt, task)
+        # Without enough samples we cannot tell "slow" from "normal", so just wait
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            try:
+                return primary.result()
+            except Exception as e:
+                with self._lock:
+                    self.failover_count += 1
+                print(f"  [FAILOVER] {self.services[0].provider} failed ({e}); trying {self.services[1].provider}")
+                return self._call(1, prompt, task)
+
+        with self._lock:
+            self.hedged_count += 1
+        secondary = executor.submit(contextvars.copy_context().run, self._call, 1, prompt, task)
+        pending = {primary, secondary}
+        last_error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if future is secondary:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return response
+        raise last_error
+
+
+# --- Telemetry ---
+
+class TelemetryLLMService(LLMServiceWrapper):
+    """Outermost wrapper that measures every request and hands its CallRecord to a Telemetry collector."""
+
+    def __init__(self, inner: ILLMService, telemetry: "Telemetry"):
+        super().__init__(inner)
+        self.telemetry = telemetry
+
+    def _finish(self, record: "CallRecord", prompt: str, response: str, started: float) -> None:
+        record.latency_ms = round((time.monotonic() - started) * 1000, 1)
+        # Cache hits and coalesced requests sent nothing to the provider
+        if record.cache not in ("hit", "coalesced") and not record.input_tokens and not record.output_tokens:
+            # The provider reported no usage (e.g. a stream); fall back to the local estimate
+            record.input_tokens = estimate_tokens(prompt)
+            record.output_tokens = estimate_tokens(response)
+            record.tokens_estimated = True
+        self.telemetry.add(record)
+
+    def _complete(self, prompt: str, task: str) -> str:
+        record = start_call(task, self.provider, self.model)
+        started = time.monotonic()
+        response = ""
+        try:
+            with active_call(record):
+                response = self.inner._complete(prompt, task)
+            return response
+        except Exception as e:
+            record.ok = False
+            record.error = str(e)[:200]
+            raise
+        finally:
+            self._finish(record, prompt, response or "", started)
+
+    def stream_completion(self, prompt: str, task: str = "completion") -> Iterator[str]:
+        record = start_call(task, self.provider, self.model)
+        record.streamed = True
+        started = time.monotonic()
+        chunks: List[str] = []
+        with active_call(record):
+            stream = self.inner.stream_completion(prompt, task=task)
+        try:
+            while True:
+                # The record is only current while the inner stream runs, never across our yield
+                with active_call(record):
+                    chunk = next(stream, None)
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            record.ok = False
+            record.error = str(e)[:200]
+            raise
+        finally:
+            with active_call(record):
+                stream.close()
+            self._finish(record, prompt, "".join(chunks), started)
@@ -5,6 +5,9 @@ Base processor class for code enhancement features.
 from abc import ABC, abstractmethod
 from typing import Optional, Set, Any
 from ..transformers import CodeTransformer
+from ..concurrency import RequestEngine
+from ..fingerprints import FingerprintStore
+from ..dedup import FunctionDeduplicator
 
 
 class BaseProcessor(ABC):
@@ -15,7 +18,9 @@ class BaseProcessor(ABC):
     (docstrings, type hints, magic numbers, dead code detection).
     """
     
-    def __init__(self, lang: str, tree: Any, source_bytes: bytes, transformer: CodeTransformer):
+    def __init__(self, lang: str, tree: Any, source_bytes: bytes, transformer: CodeTransformer,
+                 engine: Optional[RequestEngine] = None, fingerprints: Optional[FingerprintStore] = None,
+                 dedup: Optional[FunctionDeduplicator] = None):
         """
         Initialize the processor.
         
@@ -24,13 +29,39 @@ class BaseProcessor(ABC):
             tree: Tree-sitter parse tree
             source_bytes: Source code as bytes
             transformer: Code transformation utility
+            engine: Executor for LLM requests (defaults to sequential execution)
+            fingerprints: Store of results from earlier runs for unchanged functions
+            dedup: Run-wide grouping of structurally identical functions
         """
         self.lang = lang
         self.tree = tree
         self.source_bytes = source_bytes
         self.transformer = transformer
+        self.engine = engine or RequestEngine()
+        self.fingerprints = fingerprints
+        self.dedup = dedup
         self.source_text = source_bytes.decode('utf8')
     
+    def recall(self, feature: str, code: str) -> Optional[Any]:
+        """Returns the result recorded for this exact (normalized) code on an earlier run, if any."""
+        if self.fingerprints is None:
+            return None
+        return self.fingerprints.get(self.lang, feature, code)
+    
+    def remember(self, feature: str, code: str, result: Any) -> None:
+        """Records a result so later runs can skip this code while it stays unchanged."""
+        if self.fingerprints is not None:
+            self.fingerprints.put(self.lang, feature, code, result)
+    
+    def request_unique(self, feature: str, func_nodes: list, request, keep=bool) -> list:
+        """
+        Runs `request(func_nodes)`, sending one representative per group of identical
+        functions when deduplicating. `keep(result)` decides which results other copies may reuse.
+        """
+        if self.dedup is None:
+            return request(func_nodes)
+        return self.dedup.run(feature, self.lang, func_nodes, request, keep)
+    
     @abstractmethod
     def process(self, **kwargs) -> Optional[Set[Any]]:
         """
@@ -4,7 +4,7 @@ Handles generating and improving docstrings for all supported languages.
 """
 
 import textwrap
-from typing import Set, Any, Optional, Dict
+from typing import Set, Any, Optional, Dict, List, Tuple
 from .base import BaseProcessor
 from ..formatters import FormatterFactory
 
@@ -19,7 +19,7 @@ class DocstringProcessor(BaseProcessor):
     """Generates docstrings for undocumented functions, skipping dead code."""
     
     def process(self, generator: Any, overwrite_existing: bool = False, 
-                dead_functions: Optional[Set[str]] = None):
+                dead_functions: Optional[Set[str]] = None, batch: bool = False):
         """
         Generate docstrings for functions, skipping dead code.
         
@@ -27,7 +27,9 @@ class DocstringProcessor(BaseProcessor):
             generator: Docstring generator instance
             overwrite_existing: Whether to improve existing docstrings
             dead_functions: Set of dead function names to skip
+            batch: Pack several functions into each LLM request
         """
+        self.batch = batch
         changes = []
         dead_functions = dead_functions or set()
         
@@ -54,7 +56,8 @@ class DocstringProcessor(BaseProcessor):
         processed_count = 0
         skipped_count = 0
         
-        for func_node in undocumented_functions:
+        pending = []
+        for func_node in sorted(undocumented_functions, key=lambda n: n.start_byte):
             func_name = self.get_function_name(func_node)
             
             # Skip dead functions!
@@ -63,11 +66,12 @@ class DocstringProcessor(BaseProcessor):
                 continue
             
             if func_name:
-                change = self._generate_docstring_for_function(func_node, func_name, generator)
-                if change:
-                    changes.append(change)
+                pending.append((func_node, func_name))
                 processed_count += 1
         
+        # Request every docstring up front, then insert them in source order
+        changes.extend(self._generate_docstrings(pending, generator))
+        
         # Process existing docstrings if overwrite is enabled
         if overwrite_existing:
             improved_changes = self._improve_existing_docstrings(
@@ -82,12 +86,80 @@ class DocstringProcessor(BaseProcessor):
         
         return changes
     
-    def _generate_docstring_for_function(self, func_node: Any, func_name: str, generator: Any):
-        """Generate and insert docstring for a single function.
+    def _generate_docstrings(self, pending: List[Tuple[Any, str]], generator: Any) -> List[Dict[str, Any]]:
+        """Generate docstrings for (func_node, func_name) pairs concurrently and insert them.
         
         Returns:
-            dict: Change metadata if successful, None otherwise
+            list: Change metadata for every inserted docstring
         """
+        targets = []
+        for func_node, func_name in pending:
+            name_node = self._get_name_node(func_node)
+            if not name_node:
+                continue
+            line_num = name_node.start_point[0] + 1
+            print(f"  [DOC] Line {line_num}: Generating docstring for `{func_name}()`", flush=True)
+            targets.append((func_node, func_name, line_num))
+        
+        docstrings = self._request_docstrings([func_node for func_node, _, _ in targets], generator)
+        
+        changes = []
+        for (func_node, func_name, line_num), docstring in zip(targets, docstrings):
+            if not docstring or not docstring.strip():
+                print(f"  [WARN] No docstring returned for `{func_name}()`, skipping", flush=True)
+                continue
+            
+            # Insert docstring based on language
+            if self.lang == 'python':
+                self._insert_python_docstring(func_node, docstring)
+            else:
+                self._insert_other_language_docstring(func_node, docstring)
+            
+            changes.append({
+                "type": "docstring",
+                "line": line_num,
+                "function": func_name,
+                "description": f"Added docstring for {func_name}()"
+            })
+        return changes
+    
+    def _request_docstrings(self, func_nodes: List[Any], generator: Any) -> List[str]:
+        """Ask the generator for one docstring per node, packing nodes into batches in batch mode.
+        
+        Docstrings already produced for unchanged functions on an earlier run are reused.
+        """
+        results = {}
+        for func_node in func_nodes:
+            remembered = self.recall("docstring", func_node.text.decode('utf8'))
+            if remembered:
+                results[func_node] = remembered
+        to_request = [func_node for func_node in func_nodes if func_node not in results]
+        if results:
+            print(f"  [DOC] Reused {len(results)} docstring(s) for unchanged functions", flush=True)
+        
+        generated = zip(to_request, self.request_unique(
+            "docstring", to_request, lambda nodes: self._generate_uncached(nodes, generator)
+        ))
+        for func_node, docstring in generated:
+            results[func_node] = docstring
+            if docstring and docstring.strip():
+                self.remember("docstring", func_node.text.decode('utf8'), docstring)
+        return [results[func_node] for func_node in func_nodes]
+    
+    def _generate_uncached(self, func_nodes: List[Any], generator: Any) -> List[str]:
+        """Request docstrings from the generator, one per node or packed into batches."""
+        if not self.batch or not func_nodes:
+            return self.engine.map(generator.generate, func_nodes)
+        
+        batches = generator.pack_batches(func_nodes)
+        print(f"  [DOC] Packed {len(func_nodes)} function(s) into {len(batches)} request(s)", flush=True)
+        results = {}
+        for batch_nodes, docstrings in zip(batches, self.engine.map(generator.generate_batch, batches)):
+            results.update(zip(batch_nodes, docstrings))
+        return [results[func_node] for func_node in func_nodes]
+    
+    def _get_name_node(self, func_node: Any) -> Optional[Any]:
+        """Find the identifier node naming a function (C++ keeps it in the declarator)."""
         name_node = func_node.child_by_field_name('name')
         if not name_node:
             # For C++, check declarator
@@ -97,28 +169,7 @@ class DocstringProcessor(BaseProcessor):
                     if child.type == 'identifier':
                         name_node = child
                         break
-        
-        if not name_node:
-            return None
-        
-        line_num = name_node.start_point[0] + 1
-        print(f"  [DOC] Line {line_num}: Generating docstring for `{func_name}()`", flush=True)
-        
-        docstring = generator.generate(func_node)
-        
-        # Insert docstring based on language
-        if self.lang == 'python':
-            self._insert_python_docstring(func_node, docstring)
-        else:
-            self._insert_other_language_docstring(func_node, docstring)
-        
-        # Return change metadata
-        return {
-            "type": "docstring",
-            "line": line_num,
-            "function": func_name,
-            "description": f"Added docstring for {func_name}()"
-        }
+        return name_node
     
     def _insert_python_docstring(self, func_node: Any, docstring: str) -> None:
         """Insert docstring for Python function."""
@@ -210,44 +261,85 @@ class DocstringProcessor(BaseProcessor):
         """
         changes = []
         
-        for func_node, doc_node in documented_nodes.items():
+        candidates = []
+        for func_node, doc_node in sorted(documented_nodes.items(), key=lambda item: item[0].start_byte):
             func_name = self.get_function_name(func_node)
             
             # Skip dead functions
             if func_name and func_name in dead_functions:
                 continue
-            
-            docstring_text = doc_node.text.decode('utf8')
-            is_good = generator.evaluate(func_node, docstring_text)
-            
+            candidates.append((func_node, doc_node))
+        
+        # Verdicts (and replacements) from earlier runs stand while the function and its docstring are unchanged
+        replacements = {}
+        to_review = []
+        for func_node, doc_node in candidates:
+            code = func_node.text.decode('utf8')
+            verdict = self.recall("docstring_quality", code)
+            if verdict is None:
+                to_review.append((func_node, doc_node))
+            elif not verdict:
+                replacements[func_node] = self.recall("docstring", code)
+        
+        # One judge-and-rewrite request per docstring; it answers with the original or a replacement
+        doc_nodes = dict(to_review)
+        reviews = self.request_unique(
+            "docstring_review",
+            [func_node for func_node, _ in to_review],
+            lambda nodes: self.engine.map(
+                lambda func_node: generator.review(func_node, doc_nodes[func_node].text.decode('utf8')), nodes
+            ),
+            keep=lambda review: review is not None,
+        )
+        for (func_node, doc_node), review in zip(to_review, reviews):
+            if review is None:
+                continue
+            code = func_node.text.decode('utf8')
+            is_good = review == doc_node.text.decode('utf8')
+            self.remember("docstring_quality", code, is_good)
             if not is_good:
-                name_node = func_node.child_by_field_name('name')
-                func_name = name_node.text.decode('utf8') if name_node else 'unknown'
-                print(f"  [IMPROVE] Line {doc_node.start_point[0]+1}: Improving docstring for `{func_name}()` (low quality detected)")
+                self.remember("docstring", code, review)
+                replacements[func_node] = review
+        
+        # Low-quality verdicts remembered without their replacement are regenerated
+        missing = [func_node for func_node, docstring in replacements.items() if not docstring]
+        replacements.update(zip(missing, self._request_docstrings(missing, generator)))
+        low_quality = [(func_node, doc_node) for func_node, doc_node in candidates if func_node in replacements]
+        
+        for func_node, doc_node in low_quality:
+            name_node = func_node.child_by_field_name('name')
+            func_name = name_node.text.decode('utf8') if name_node else 'unknown'
+            print(f"  [IMPROVE] Line {doc_node.start_point[0]+1}: Improving docstring for `{func_name}()` (low quality detected)")
+        
+        new_docstrings = [replacements[func_node] for func_node, _ in low_quality]
+        
+        for (func_node, doc_node), new_docstring in zip(low_quality, new_docstrings):
+            name_node = func_node.child_by_field_name('name')
+            func_name = name_node.text.decode('utf8') if name_node else 'unknown'
+            if not new_docstring or not new_docstring.strip():
+                print(f"  [WARN] No replacement docstring returned for `{func_name}()`, keeping the original", flush=True)
+                continue
+            try:
+                func_line = self.source_text.split('\n')[func_node.start_point[0]]
+                func_def_indent = len(func_line) - len(func_line.lstrip())
+                body_indent_level = func_def_indent + 4
+                indentation_str = ' ' * body_indent_level
                 
-                new_docstring = generator.generate(func_node)
+                formatter = FormatterFactory.create_formatter(self.lang)
+                formatted_docstring = formatter.format(new_docstring, indentation_str).strip()
                 
-                try:
-                    func_line = self.source_text.split('\n')[func_node.start_point[0]]
-                    func_def_indent = len(func_line) - len(func_line.lstrip())
-                    body_indent_level = func_def_indent + 4
-                    indentation_str = ' ' * body_indent_level
-                    
-                    formatter = FormatterFactory.create_formatter(self.lang)
-                    formatted_docstring = formatter.format(new_docstring, indentation_str).strip()
-                    
-                    self.transformer.add_change(
-                        start_byte=doc_node.start_byte,
-                        end_byte=doc_node.end_byte,
-                        new_text=formatted_docstring
-                    )
-                    changes.append({
-                        "type": "docstring",
-                        "line": doc_node.start_point[0] + 1,
-                        "function": func_name,
-                        "description": f"Improved docstring for {func_name}()"
-                    })
-                except Exception as e:
-                    print(f"  [ERROR] Improving docstring failed: {e}", flush=True)
+                self.transformer.add_change(
+                    start_byte=doc_node.start_byte,
+                    end_byte=doc_node.end_byte,
+                    new_text=formatted_docstring
+                )
+                changes.append({
+                    "type": "docstring",
+                    "line": doc_node.start_point[0] + 1,
+                    "function": func_name,
+                    "description": f"Improved docstring for {func_name}()"
+                })
+            except Exception as e:
+                print(f"  [ERROR] Improving docstring failed: {e}", flush=True)
         
         return changes
@@ -5,20 +5,26 @@ Replaces magic numbers with named constants across all languages.
 
 from typing import Set, Any, Optional, List, Tuple, Dict
 from .base import BaseProcessor
+from ..telemetry import telemetry_scope
 
 
 class MagicNumberProcessor(BaseProcessor):
     """Replaces magic numbers with named constants, skipping dead code."""
     
-    def process(self, generator: Any, dead_functions: Optional[Set[str]] = None):
+    # Usage snippets sent per value in a batched naming request
+    MAX_USAGE_SNIPPETS = 3
+    
+    def process(self, generator: Any, dead_functions: Optional[Set[str]] = None, batch: bool = True):
         """
         Replace magic numbers with constants, skipping dead code.
         
         Args:
             generator: Generator instance for naming suggestions
             dead_functions: Set of dead function names to skip
+            batch: Name all of a file's magic numbers in one request instead of one per value
         """
         dead_functions = dead_functions or set()
+        self.batch = batch
         changes = []
         
         if self.lang == 'python':
@@ -282,27 +288,55 @@ class MagicNumberProcessor(BaseProcessor):
         constants_to_add = []
         replacements = []
         
-        for value, occurrences in magic_numbers.items():
+        items = list(magic_numbers.items())
+        contexts = {}
+        names = {}
+        for value, occurrences in items:
             first_node, first_function = occurrences[0]
-            function_code = first_function.text.decode('utf8') if first_function else self.source_text
-            
-            line_num = first_node.start_point[0] + 1
-            # print(f"  [MAGIC] Line {line_num}: Found magic number `{value}`", flush=True)
-            
-            constant_name = generator.suggest_constant_name(function_code, value)
-            
+            contexts[value] = generator.context.for_literal(first_node, first_function, self.source_text)
+            remembered = self.recall("constant_name", f"{value}\n{contexts[value]}")
+            if remembered:
+                names[value] = remembered
+        pending = [value for value, _ in items if value not in names]
+        
+        # One request names every remaining value of the file from short usage snippets
+        if self.batch and len(pending) > 1:
+            usages = {value: self._usage_snippets(magic_numbers[value], generator) for value in pending}
+            names.update(generator.suggest_constant_names(usages))
+        
+        def suggest(value):
+            first_function = magic_numbers[value][0][1]
+            with telemetry_scope(function=self.get_function_name(first_function) if first_function else None):
+                return generator.suggest_constant_name(contexts[value], value)
+        
+        # Values the batched response left out are named one at a time, concurrently
+        missing = [value for value in pending if value not in names]
+        names.update(zip(missing, self.engine.map(suggest, missing)))
+        for value in pending:
+            if names[value]:
+                self.remember("constant_name", f"{value}\n{contexts[value]}", names[value])
+        
+        for value, occurrences in items:
+            constant_name = names[value]
             if constant_name:
-                # print(f"     → Suggested constant: {constant_name}")
                 constants_to_add.append((constant_name, value))
                 
                 for node, _ in occurrences:
                     replacements.append((node, constant_name))
-            else:
-                pass
-                # print(f"     [WARN]  Could not generate meaningful name, skipping")
         
         return constants_to_add, replacements
     
+    def _usage_snippets(self, occurrences: List, generator: Any) -> List[str]:
+        """Distinct short snippets showing where a value is used, for batched naming."""
+        snippets = []
+        for node, function_node in occurrences:
+            snippet = generator.context.for_usage(node, function_node)
+            if snippet not in snippets:
+                snippets.append(snippet)
+            if len(snippets) == self.MAX_USAGE_SNIPPETS:
+                break
+        return snippets
+    
     def _apply_replacements(self, replacements: List) -> None:
         """Apply replacements in reverse order."""
         replacements.sort(key=lambda x: x[0].start_byte, reverse=True)
@@ -5,6 +5,7 @@ Adds type hints to Python functions, skipping dead code.
 
 from typing import Set, Any, Optional, Dict
 from .base import BaseProcessor
+from ..type_inference import TypeInferencer
 
 
 class TypeHintProcessor(BaseProcessor):
@@ -18,6 +19,7 @@ class TypeHintProcessor(BaseProcessor):
             generator: Generator instance for AI-powered type inference
             dead_functions: Set of dead function names to skip
         """
+        self.resolved_locally = 0
         if self.lang != 'python':
             return  # Type hints only for Python currently
         
@@ -40,7 +42,8 @@ class TypeHintProcessor(BaseProcessor):
         processed_count = 0
         skipped_count = 0
         
-        for func_node in functions_without_hints:
+        candidates = []
+        for func_node in sorted(functions_without_hints, key=lambda n: n.start_byte):
             name_node = func_node.child_by_field_name('name')
             if not name_node:
                 continue
@@ -58,10 +61,51 @@ class TypeHintProcessor(BaseProcessor):
             
             line_num = name_node.start_point[0] + 1
             print(f"  [TYPE] Line {line_num}: Adding type hints to `{func_name}()`", flush=True)
-            
+            candidates.append((func_node, func_name, line_num))
+        
+        # Types that follow from the code itself (literal defaults, isinstance guards, return
+        # expressions) are inferred locally; only functions with gaps go to the LLM
+        inferencer = TypeInferencer(self.tree.root_node)
+        local_hints = {}
+        unresolved = []
+        for candidate in candidates:
+            hints, missing = inferencer.infer(candidate[0])
+            local_hints[candidate[0]] = hints
+            if missing:
+                unresolved.append(candidate)
+        self.resolved_locally = len(candidates) - len(unresolved)
+        if self.resolved_locally:
+            print(f"  [TYPE] Resolved {self.resolved_locally} function(s) locally without the LLM", flush=True)
+        
+        def infer(candidate):
+            func_node, func_name, _ = candidate
+            code = func_node.text.decode('utf8')
+            # Unchanged functions reuse the hints inferred on an earlier run
+            remembered = self.recall("type_hints", code)
+            if remembered:
+                return remembered
+            try:
+                type_hints = generator.complete_type_hints(func_node, local_hints[func_node])
+            except Exception as e:
+                print(f"  [ERROR] Adding type hints to `{func_name}`: {e}", flush=True)
+                return None
+            # Empty hints are not recorded: adapters also return them when a request fails
+            if isinstance(type_hints, dict) and (type_hints.get('parameters') or type_hints.get('return_type')):
+                self.remember("type_hints", code, type_hints)
+            return type_hints
+        
+        # Ask for every unresolved function's hints up front, then rewrite signatures in source order
+        by_node = {candidate[0]: candidate for candidate in unresolved}
+        asked = dict(zip(by_node, self.request_unique(
+            "type_hints",
+            list(by_node),
+            lambda nodes: self.engine.map(infer, [by_node[node] for node in nodes]),
+            keep=lambda hints: bool(hints and (hints.get('parameters') or hints.get('return_type'))),
+        )))
+        all_hints = [self._merge_hints(local_hints[func_node], asked.get(func_node)) for func_node, _, _ in candidates]
+        
+        for (func_node, func_name, line_num), type_hints in zip(candidates, all_hints):
             try:
-                type_hints = generator.generate_type_hints(func_node)
-                
                 if not type_hints or (not type_hints.get('parameters') and not type_hints.get('return_type')):
                     print(f"     [WARN] Could not infer types for `{func_name}()`")
                     continue
@@ -110,6 +154,15 @@ class TypeHintProcessor(BaseProcessor):
         
         return changes
     
+    @staticmethod
+    def _merge_hints(local: Dict[str, Any], asked: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combines locally inferred hints with the LLM's answer; local inferences win."""
+        asked = asked if isinstance(asked, dict) else {}
+        return {
+            "parameters": {**(asked.get('parameters') or {}), **local['parameters']},
+            "return_type": local['return_type'] or asked.get('return_type'),
+        }
+    
     def _build_new_signature(self, func_node: Any, func_name: str, 
                             type_hints: Dict[str, Any]) -> tuple:
         """
@@ -0,0 +1,203 @@
+"""
+Prompt templates.
+
+Every prompt is a static instruction block followed by the per-request input (code,
+names, numbers), joined with PROMPT_SEPARATOR by `build_prompt`. The instructions never
+contain request data, so all requests of one task start with a byte-identical prefix.
+Adapters send that prefix as the system prompt (see `chat_messages`), which is what
+provider-side prompt caches key on: OpenAI and Groq reuse it automatically, Anthropic
+via `cache_control` and Gemini via `system_instruction`.
+
+Prompts still travel through the service chain as one string, so the response cache,
+batch recorder and rate limiter need not know about the split.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Marks where the static instructions end and the request's input begins
+PROMPT_SEPARATOR = "\n\n### Input\n\n"
+
+
+def build_prompt(instructions: str, content: str) -> str:
+    """Joins a task's static instructions and the request's input into one prompt."""
+    return instructions.strip() + PROMPT_SEPARATOR + content.strip()
+
+
+def split_prompt(prompt: str) -> Tuple[Optional[str], str]:
+    """
+    Splits a prompt made by `build_prompt` back into (instructions, input).
+    Prompts without a separator have no instructions.
+    """
+    instructions, separator, content = prompt.partition(PROMPT_SEPARATOR)
+    if not separator:
+        return None, prompt
+    return instructions, content
+
+
+def chat_messages(prompt: str) -> List[Dict[str, str]]:
+    """Chat-completion messages for a prompt: the instructions as a system message, the input as the user message."""
+    instructions, content = split_prompt(prompt)
+    if instructions is None:
+        return [{"role": "user", "content": content}]
+    return [{"role": "system", "content": instructions}, {"role": "user", "content": content}]
+
+
+def code_block(code: str, language: str = "python") -> str:
+    return f"```{language}\n{code}\n```"
+
+
+DOCSTRING = """
+Generate a professional docstring in the given style for the code below.
+Only return the raw content of the docstring, without the triple quotes.
+"""
+
+DOCSTRING_BATCH = """
+Generate a professional docstring in the given style for each of the functions below.
+The functions are given as a JSON array of objects with an "id" and the function "code".
+
+Return ONLY a JSON array with one object per function, in this exact format (no markdown, no extra text):
+[{"id": 0, "docstring": "raw docstring content"}]
+
+Each "docstring" must be only the raw content of the docstring, without triple quotes or comment markers.
+"""
+
+EVALUATE_DOCSTRING = """
+Analyze the Python code below and its docstring.
+Is the docstring a high-quality, descriptive, and helpful documentation for the code?
+A good docstring explains what the code does, its arguments (if any), what it returns. A bad docstring is either too generic or completely irrevalent.
+
+Answer with a single word: YES or NO.
+"""
+
+REVIEW_DOCSTRING = """
+Review the docstring of the code below.
+A good docstring explains what the code does, its arguments (if any), what it returns. A bad docstring is either too generic or completely irrevalent.
+If the docstring is good, keep it. Otherwise write a professional replacement in the given docstring style.
+
+Return ONLY a JSON object in one of these exact formats (no markdown, no extra text):
+{"verdict": "keep"}
+{"verdict": "rewrite", "docstring": "raw docstring content"}
+
+The "docstring" must be only the raw content of the docstring, without triple quotes or comment markers.
+"""
+
+EVALUATE_NAME = """
+Analyze the Python code below and the given name. Is this name high-quality and descriptive?
+
+**Be very conservative.** Only answer NO if the name is clearly poor.
+- **GOOD names** are descriptive and conventional (e.g., `user_profile`, `calculate_interest`, `first_number`, `item_count`, `MyCoolClass`). Do NOT flag these. These are YES.
+- **BAD names** are too short (e.g., 'x', 'd'), too generic (e.g., 'data', 'temp'), or misleading. These are NO.
+
+Is the name a high-quality name in this context? Answer with a single word: YES or NO.
+"""
+
+SUGGEST_NAME = """
+Analyze the Python code below. The given variable name has been flagged for a potential naming issue.
+Suggest a better, more descriptive variable name based on its usage.
+
+A good name is descriptive and follows Python's snake_case convention.
+
+**IMPORTANT: If you believe the original name is already a good and descriptive name, then simply return the original name itself.**
+
+Return only the new variable name, and nothing else.
+"""
+
+SUGGEST_FUNCTION_NAME = """
+Analyze the Python function/method below. The given name has been flagged for a potential naming issue.
+Suggest a better, more descriptive name that follows Python's snake_case convention.
+
+**IMPORTANT: If you believe the original name is already a good and descriptive name, then simply return the original name itself.**
+
+Return only the new function name, and nothing else.
+"""
+
+SUGGEST_CLASS_NAME = """
+Analyze the Python class below. The given name has been flagged for a potential naming issue.
+Suggest a better, more descriptive name that follows Python's PascalCase convention.
+
+**IMPORTANT: If you believe the original name is already a good and descriptive name, then simply return the original name itself.**
+
+Return only the new class name, and nothing else.
+"""
+
+TYPE_HINTS = """
+Analyze the Python function below and infer appropriate type hints for its parameters and return type.
+
+Based on the function's implementation, variable usage, and operations:
+1. Infer the type for each parameter
+2. Infer the return type
+3. Use standard Python type hints (str, int, float, bool, list, dict, tuple, None, Any, Optional, etc.)
+4. For complex types, use typing module annotations (List[str], Dict[str, int], Optional[int], etc.)
+
+Return ONLY a valid JSON object in this exact format (no markdown, no extra text):
+{
+    "parameters": {"param_name": "type_hint", "another_param": "type_hint"},
+    "return_type": "return_type_hint"
+}
+
+If a parameter type cannot be inferred confidently, use "Any".
+If the function returns nothing, use "None".
+If some types are listed as already known, they must not be changed; include only the missing ones.
+"""
+
+CONSTANT_NAME = """
+Analyze the Python code below and suggest a descriptive constant name for the given magic number.
+
+Based on how the number is used in the code:
+1. Suggest a clear, descriptive constant name in UPPER_SNAKE_CASE
+2. The name should explain what the number represents
+3. Follow Python naming conventions
+
+Examples of good constant names:
+- MAX_RETRIES (for 3 in retry logic)
+- TAX_RATE (for 0.15 in tax calculations)
+- DEFAULT_TIMEOUT_SECONDS (for 30 in timeout logic)
+- DAYS_IN_WEEK (for 7)
+
+Return ONLY the constant name, nothing else. No explanations, no markdown.
+If the number is too generic to name meaningfully, return "SKIP".
+"""
+
+CONSTANT_NAMES = """
+Suggest a descriptive constant name for each magic number used in the code below.
+The numbers are given as a JSON object mapping each number to snippets of the code that use it.
+
+Return ONLY a JSON object mapping each number, exactly as given, to its constant name (no markdown, no extra text):
+{"0.15": "TAX_RATE", "30": "DEFAULT_TIMEOUT_SECONDS"}
+
+Each name must be in UPPER_SNAKE_CASE and explain what the number represents.
+If a number is too generic to name meaningfully, map it to "SKIP".
+"""
+
+
+# JSON schemas of the tasks that answer with a JSON object. Adapters use them to request
+# structured output from the provider (JSON schema, JSON mode or a forced tool call), so
+# the reply is valid JSON by construction instead of free text that happens to contain it.
+TYPE_HINTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "parameters": {"type": "object", "additionalProperties": {"type": "string"}},
+        "return_type": {"type": ["string", "null"]},
+    },
+    "required": ["parameters", "return_type"],
+}
+
+REVIEW_DOCSTRING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdict": {"type": "string", "enum": ["keep", "rewrite"]},
+        "docstring": {"type": "string"},
+    },
+    "required": ["verdict"],
+}
+
+CONSTANT_NAMES_SCHEMA = {
+    "type": "object",
+    "additionalProperties": {"type": "string"},
+}
+
+RESPONSE_SCHEMAS = {
+    "type_hints": TYPE_HINTS_SCHEMA,
+    "review_docstring": REVIEW_DOCSTRING_SCHEMA,
+    "constant_names": CONSTANT_NAMES_SCHEMA,
+}
@@ -0,0 +1,222 @@
+"""
+Per-call LLM telemetry.
+
+TelemetryLLMService (in llm_services) sits outermost in the service chain and opens a
+CallRecord for every request. The layers underneath annotate the record in flight through
+a context variable: the cache marks hits and misses, the coalescer marks requests answered
+by an identical one in flight, the rate limiter counts retries and throttle time, and
+adapters report the provider's token usage. Labels such as the file and function being processed come from
+`telemetry_scope`, and RequestEngine carries them (and the time a request sat in its queue)
+onto worker threads.
+"""
+
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+_labels: contextvars.ContextVar = contextvars.ContextVar("zenco_telemetry_labels", default={})
+_queue_ms: contextvars.ContextVar = contextvars.ContextVar("zenco_telemetry_queue_ms", default=0.0)
+_current_call: contextvars.ContextVar = contextvars.ContextVar("zenco_telemetry_call", default=None)
+
+
+@contextmanager
+def telemetry_scope(**labels: Any):
+    """Labels every LLM call made inside the block (e.g. `file=`, `function=`)."""
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def current_labels() -> Dict[str, Any]:
+    """Returns the labels (file, function, ...) of the enclosing `telemetry_scope`."""
+    return dict(_labels.get())
+
+
+def set_queue_time(milliseconds: float) -> None:
+    """Records how long the current work item waited for a worker thread."""
+    _queue_ms.set(milliseconds)
+
+
+@dataclass
+class CallRecord:
+    """Everything measured about one logical LLM request."""
+    task: str
+    provider: str
+    model: str
+    file: Optional[str] = None
+    function: Optional[str] = None
+    started_at: float = 0.0
+    latency_ms: float = 0.0
+    queue_ms: float = 0.0
+    throttle_ms: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    tokens_estimated: bool = False
+    retries: int = 0
+    cache: Optional[str] = None
+    streamed: bool = False
+    ok: bool = True
+    error: Optional[str] = None
+
+
+def start_call(task: str, provider: str, model: str) -> CallRecord:
+    """Opens a record for a request, labelled from the enclosing `telemetry_scope`."""
+    labels = _labels.get()
+    return CallRecord(
+        task=task,
+        provider=provider,
+        model=model,
+        file=labels.get("file"),
+        function=labels.get("function"),
+        started_at=time.time(),
+        queue_ms=round(_queue_ms.get(), 1),
+    )
+
+
+@contextmanager
+def active_call(record: CallRecord):
+    """Makes `record` the call that lower layers annotate while the block runs."""
+    token = _current_call.set(record)
+    try:
+        yield record
+    finally:
+        _current_call.reset(token)
+
+
+def current_call() -> Optional[CallRecord]:
+    """Returns the record of the LLM call in progress on this thread, if any."""
+    return _current_call.get()
+
+
+def record_usage(input_tokens: Optional[int], output_tokens: Optional[int], cached_tokens: int = 0) -> None:
+    """
+    Called by adapters with the token counts the provider reported. `cached_tokens` is the
+    part of `input_tokens` served from the provider's prompt cache.
+    """
+    record = _current_call.get()
+    if record is not None and input_tokens is not None and output_tokens is not None:
+        record.input_tokens = int(input_tokens)
+        record.output_tokens = int(output_tokens)
+        record.cached_tokens = int(cached_tokens or 0)
+        record.tokens_estimated = False
+
+
+def record_retry() -> None:
+    """Called by the rate limiter for each retried attempt."""
+    record = _current_call.get()
+    if record is not None:
+        record.retries += 1
+
+
+def record_throttle(seconds: float) -> None:
+    """Called by the rate limiter with time spent waiting for quota."""
+    record = _current_call.get()
+    if record is not None:
+        record.throttle_ms += seconds * 1000
+
+
+def record_cache(hit: bool) -> None:
+    """Called by the response cache on every lookup."""
+    record = _current_call.get()
+    if record is not None:
+        record.cache = "hit" if hit else "miss"
+
+
+def record_coalesced() -> None:
+    """Called when a request was answered by an identical one already in flight."""
+    record = _current_call.get()
+    if record is not None:
+        record.cache = "coalesced"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Telemetry:
+    """
+    Collects CallRecords for a run and aggregates them by task, by model and by file.
+
+    Args:
+        prices: Optional USD prices per million tokens, keyed by model. Cached input tokens
+            use "cached_input" when given and the input price otherwise:
+            {"gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60}}
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        self.prices = prices or {}
+        self.records: List[CallRecord] = []
+        self._lock = threading.Lock()
+
+    def add(self, record: CallRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def cost(self, record: CallRecord) -> float:
+        """Estimated USD cost of one call, or 0.0 when its model has no configured price."""
+        price = self.prices.get(record.model)
+        if not price:
+            return 0.0
+        input_price = float(price.get("input", 0.0))
+        cached_price = float(price.get("cached_input", input_price))
+        return ((record.input_tokens - record.cached_tokens) * input_price
+                + record.cached_tokens * cached_price
+                + record.output_tokens * float(price.get("output", 0.0))) / 1_000_000
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregates all records into totals, per-task, per-model and per-file breakdowns."""
+        with self._lock:
+            records = list(self.records)
+
+        def aggregate(group: List[CallRecord]) -> Dict[str, Any]:
+            latencies = [r.latency_ms for r in group if r.cache != "hit"]
+            return {
+                "calls": len(group),
+                "cache_hits": sum(1 for r in group if r.cache == "hit"),
+                "coalesced": sum(1 for r in group if r.cache == "coalesced"),
+                "errors": sum(1 for r in group if not r.ok),
+                "retries": sum(r.retries for r in group),
+                "input_tokens": sum(r.input_tokens for r in group),
+                "output_tokens": sum(r.output_tokens for r in group),
+                "cached_input_tokens": sum(r.cached_tokens for r in group),
+                "estimated_token_calls": sum(1 for r in group if r.tokens_estimated),
+                "latency_p50_ms": round(_percentile(latencies, 50), 1),
+                "latency_p95_ms": round(_percentile(latencies, 95), 1),
+                "queue_ms": round(sum(r.queue_ms for r in group), 1),
+                "throttle_ms": round(sum(r.throttle_ms for r in group), 1),
+                "cost_usd": round(sum(self.cost(r) for r in group), 6),
+            }
+
+        by_task: Dict[str, List[CallRecord]] = {}
+        by_model: Dict[str, List[CallRecord]] = {}
+        by_file: Dict[str, List[CallRecord]] = {}
+        for record in records:
+            by_task.setdefault(record.task, []).append(record)
+            by_model.setdefault(record.model, []).append(record)
+            by_file.setdefault(record.file or "<none>", []).append(record)
+
+        summary = aggregate(records)
+        summary["by_task"] = {task: aggregate(group) for task, group in sorted(by_task.items())}
+        summary["by_model"] = {model: aggregate(group) for model, group in sorted(by_model.items())}
+        summary["by_file"] = {path: aggregate(group) for path, group in sorted(by_file.items())}
+        return summary
+
+    def dump_jsonl(self, path: str) -> None:
+        """Writes one JSON object per call, for offline analysis."""
+        with self._lock:
+            records = list(self.records)
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                row = asdict(record)
+                row["cost_usd"] = self.cost(record)
+                f.write(json.dumps(row) + "\n")
@@ -0,0 +1,330 @@
+"""
+Local type inference for Python functions.
+
+Many functions need no model to annotate: literal defaults, `isinstance` guards and
+return expressions built from literals, constructors or annotated calls already pin
+their types down. TypeInferencer resolves what it can from the tree-sitter tree of one
+file, so TypeHintProcessor only asks the LLM about what is left. It is deliberately
+conservative: anything it is not sure of stays unresolved.
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+from tree_sitter import Node
+
+# Marker in the unresolved list for a function whose return type is unknown
+RETURN = "return"
+
+LITERAL_TYPES = {
+    'integer': 'int',
+    'float': 'float',
+    'string': 'str',
+    'concatenated_string': 'str',
+    'true': 'bool',
+    'false': 'bool',
+    'none': 'None',
+}
+
+# Builtins whose result type does not depend on their arguments
+BUILTIN_RESULTS = {
+    'len': 'int', 'str': 'str', 'repr': 'str', 'int': 'int', 'float': 'float', 'bool': 'bool',
+    'bytes': 'bytes', 'ord': 'int', 'chr': 'str', 'hash': 'int', 'id': 'int', 'format': 'str',
+    'isinstance': 'bool', 'issubclass': 'bool', 'hasattr': 'bool', 'callable': 'bool',
+    'all': 'bool', 'any': 'bool',
+}
+
+# Types an `isinstance` guard can pin a parameter to
+BUILTIN_TYPES = {'int', 'float', 'str', 'bool', 'bytes', 'list', 'dict', 'set', 'tuple'}
+
+NUMERIC_TYPES = {'int', 'float'}
+
+# Nested scopes whose return statements belong to someone else
+NESTED_SCOPES = {'function_definition', 'lambda', 'class_definition'}
+
+IMPLICIT_PARAMETERS = {'self', 'cls'}
+
+
+def join_types(types: List[Optional[str]]) -> Optional[str]:
+    """
+    Combines the types of several expressions (e.g. every return statement) into one,
+    or None when they do not agree. int and float widen to float; T and None become Optional[T].
+    """
+    if not types or any(t is None for t in types):
+        return None
+    distinct = set(types)
+    optional = 'None' in distinct and len(distinct) > 1
+    if optional:
+        distinct.discard('None')
+    if distinct == NUMERIC_TYPES:
+        distinct = {'float'}
+    if len(distinct) != 1:
+        return None
+    single = distinct.pop()
+    return f"Optional[{single}]" if optional else single
+
+
+def _text(node: Optional[Node]) -> str:
+    return node.text.decode('utf8') if node is not None else ''
+
+
+class TypeInferencer:
+    """
+    Infers parameter and return types for the functions of one parsed Python file.
+
+    Args:
+        root: Root node of the file's tree-sitter tree
+    """
+
+    def __init__(self, root: Node):
+        self.root = root
+        self.classes: Dict[str, Node] = {}
+        self.function_returns: Dict[str, str] = {}
+        self._attribute_types: Dict[Tuple[int, str], Optional[str]] = {}
+        for node in self._walk(root):
+            if node.type == 'class_definition':
+                self.classes[_text(node.child_by_field_name('name'))] = node
+        for node in root.children:
+            node = self._definition(node)
+            if node is not None and node.type == 'function_definition' and node.child_by_field_name('return_type'):
+                self.function_returns[_text(node.child_by_field_name('name'))] = _text(node.child_by_field_name('return_type'))
+
+    def infer(self, func_node: Node) -> Tuple[Dict, List[str]]:
+        """
+        Returns the hints that could be derived locally, in the shape `generate_type_hints`
+        uses ({"parameters": {...}, "return_type": ...}), and the names of the parameters
+        still missing a type (plus RETURN if the return type is unknown).
+        """
+        owner = self._enclosing_class(func_node)
+        env = self._parameter_types(func_node)
+        unresolved = [name for name in self._parameters_to_annotate(func_node, owner) if name not in env]
+
+        return_type = self._return_type(func_node, env, owner)
+        if return_type is None:
+            unresolved.append(RETURN)
+        parameters = {name: hint for name, hint in env.items()
+                      if name in self._parameters_to_annotate(func_node, owner)}
+        return {"parameters": parameters, "return_type": return_type}, unresolved
+
+    # --- Parameters ---
+
+    def _parameters_to_annotate(self, func_node: Node, owner: Optional[Node]) -> List[str]:
+        """Plain and defaulted parameters without an annotation (what TypeHintProcessor can rewrite)."""
+        params = func_node.child_by_field_name('parameters')
+        names = []
+        for child in params.children if params else []:
+            if child.type == 'identifier':
+                names.append(_text(child))
+            elif child.type == 'default_parameter':
+                names.append(_text(child.child_by_field_name('name')))
+        if owner is not None and names and names[0] in IMPLICIT_PARAMETERS:
+            names = names[1:]
+        return [name for name in names if name not in IMPLICIT_PARAMETERS]
+
+    def _parameter_types(self, func_node: Node) -> Dict[str, str]:
+        """Types known for the parameters: existing annotations, literal defaults and isinstance guards."""
+        types: Dict[str, str] = {}
+        params = func_node.child_by_field_name('parameters')
+        for child in params.children if params else []:
+            if child.type in ('typed_parameter', 'typed_default_parameter'):
+                name = child.child_by_field_name('name') or next(
+                    (c for c in child.children if c.type == 'identifier'), None)
+                if name is not None and child.child_by_field_name('type') is not None:
+                    types[_text(name)] = _text(child.child_by_field_name('type'))
+            elif child.type == 'default_parameter':
+                default_type = self._literal_type(child.child_by_field_name('value'))
+                # A None default says nothing about the type of other values
+                if default_type and default_type != 'None':
+                    types[_text(child.child_by_field_name('name'))] = default_type
+        types.update({name: hint for name, hint in self._isinstance_guards(func_node) if name not in types})
+        return types
+
+    def _isinstance_guards(self, func_node: Node) -> Iterator[Tuple[str, str]]:
+        """`assert isinstance(p, T)` and `if not isinstance(p, T): raise ...` at the top level of the body."""
+        body = func_node.child_by_field_name('body')
+        for statement in body.children if body else []:
+            call = None
+            if statement.type == 'assert_statement':
+                call = next((c for c in statement.children if c.type == 'call'), None)
+            elif statement.type == 'if_statement':
+                condition = statement.child_by_field_name('condition')
+                consequence = statement.child_by_field_name('consequence')
+                raises = consequence is not None and any(c.type == 'raise_statement' for c in consequence.children)
+                if condition is not None and condition.type == 'not_operator' and raises:
+                    call = condition.child_by_field_name('argument')
+            guard = self._isinstance_call(call)
+            if guard:
+                yield guard
+
+    def _isinstance_call(self, call: Optional[Node]) -> Optional[Tuple[str, str]]:
+        if call is None or call.type != 'call' or _text(call.child_by_field_name('function')) != 'isinstance':
+            return None
+        args = [c for c in call.child_by_field_name('arguments').children if c.is_named]
+        if len(args) != 2 or args[0].type != 'identifier' or args[1].type != 'identifier':
+            return None
+        type_name = _text(args[1])
+        if type_name in BUILTIN_TYPES or type_name in self.classes:
+            return _text(args[0]), type_name
+        return None
+
+    # --- Return type ---
+
+    def _return_type(self, func_node: Node, env: Dict[str, str], owner: Optional[Node]) -> Optional[str]:
+        existing = func_node.child_by_field_name('return_type')
+        if existing is not None:
+            return _text(existing)
+
+        returns = []
+        for node in self._walk(func_node.child_by_field_name('body'), skip=NESTED_SCOPES):
+            if node.type in ('yield', 'await'):
+                # Generators and coroutines are left to the model
+                return None
+            if node.type == 'return_statement':
+                returns.append(node)
+
+        if not any(self._return_value(node) is not None for node in returns):
+            # Stubs (pass, ..., raise NotImplementedError) return whatever their overrides do
+            return None if self._is_stub(func_node) else 'None'
+
+        types = []
+        for node in returns:
+            value = self._return_value(node)
+            types.append('None' if value is None else self._expression_type(value, env, owner))
+        return join_types(types)
+
+    @staticmethod
+    def _return_value(return_node: Node) -> Optional[Node]:
+        return next((c for c in return_node.children if c.is_named), None)
+
+    @staticmethod
+    def _is_stub(func_node: Node) -> bool:
+        body = func_node.child_by_field_name('body')
+        statements = [c for c in (body.children if body else []) if c.is_named and c.type != 'comment']
+        if statements and statements[0].type == 'expression_statement' and statements[0].children[0].type == 'string':
+            statements = statements[1:]  # docstring
+        return all(
+            s.type in ('pass_statement', 'raise_statement')
+            or (s.type == 'expression_statement' and _text(s) == '...')
+            for s in statements
+        )
+
+    def _expression_type(self, node: Node, env: Dict[str, str], owner: Optional[Node]) -> Optional[str]:
+        """The type of an expression, or None if it cannot be determined locally."""
+        if node.type in LITERAL_TYPES:
+            return self._literal_type(node)
+        if node.type == 'parenthesized_expression':
+            inner = next((c for c in node.children if c.is_named), None)
+            return self._expression_type(inner, env, owner) if inner is not None else None
+        if node.type in ('comparison_operator', 'not_operator'):
+            return 'bool'
+        if node.type == 'boolean_operator':
+            operands = [node.child_by_field_name('left'), node.child_by_field_name('right')]
+            types = [self._expression_type(operand, env, owner) for operand in operands]
+            return 'bool' if types == ['bool', 'bool'] else None
+        if node.type == 'identifier':
+            return env.get(_text(node))
+        if node.type == 'unary_operator':
+            operand = self._expression_type(node.child_by_field_name('argument'), env, owner)
+            return operand if operand in NUMERIC_TYPES else None
+        if node.type == 'binary_operator':
+            return self._binary_type(node, env, owner)
+        if node.type == 'conditional_expression':
+            branches = [c for c in node.children if c.is_named]
+            if len(branches) == 3:
+                return join_types([self._expression_type(branches[0], env, owner),
+                                   self._expression_type(branches[2], env, owner)])
+            return None
+        if node.type == 'call':
+            return self._call_type(node, owner)
+        if node.type == 'attribute':
+            return self._self_attribute_type(node, owner)
+        return None
+
+    def _binary_type(self, node: Node, env: Dict[str, str], owner: Optional[Node]) -> Optional[str]:
+        left = self._expression_type(node.child_by_field_name('left'), env, owner)
+        right = self._expression_type(node.child_by_field_name('right'), env, owner)
+        operator = _text(node.child_by_field_name('operator'))
+        if left == 'str' and (right == 'str' or operator == '%'):
+            return 'str' if operator in ('+', '%') else None
+        if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+            if operator == '/':
+                return 'float'
+            if operator in ('+', '-', '*', '//', '%', '**'):
+                return 'float' if 'float' in (left, right) else 'int'
+        return None
+
+    def _call_type(self, node: Node, owner: Optional[Node]) -> Optional[str]:
+        function = node.child_by_field_name('function')
+        if function.type == 'identifier':
+            name = _text(function)
+            if name in self.classes:
+                return name
+            if name in self.function_returns:
+                return self.function_returns[name]
+            return BUILTIN_RESULTS.get(name)
+        if function.type == 'attribute' and owner is not None and _text(function.child_by_field_name('object')) == 'self':
+            method = self._method(owner, _text(function.child_by_field_name('attribute')))
+            if method is not None and method.child_by_field_name('return_type') is not None:
+                return _text(method.child_by_field_name('return_type'))
+        return None
+
+    def _self_attribute_type(self, node: Node, owner: Optional[Node]) -> Optional[str]:
+        """`self.x`, typed from every `self.x = <expression>` assignment in the class's methods."""
+        if owner is None or _text(node.child_by_field_name('object')) != 'self':
+            return None
+        attribute = _text(node.child_by_field_name('attribute'))
+        key = (owner.start_byte, attribute)
+        if key not in self._attribute_types:
+            # Guards against attributes defined in terms of themselves
+            self._attribute_types[key] = None
+            types = []
+            for method in self._methods(owner):
+                env = self._parameter_types(method)
+                for assignment in self._walk(method.child_by_field_name('body'), skip=NESTED_SCOPES):
+                    left = assignment.child_by_field_name('left') if assignment.type == 'assignment' else None
+                    if left is not None and left.type == 'attribute' and _text(left) == f"self.{attribute}":
+                        value = assignment.child_by_field_name('right')
+                        types.append(self._expression_type(value, env, owner) if value is not None else None)
+            self._attribute_types[key] = join_types(types)
+        return self._attribute_types[key]
+
+    # --- Tree helpers ---
+
+    @staticmethod
+    def _literal_type(node: Optional[Node]) -> Optional[str]:
+        if node is None:
+            return None
+        if node.type == 'string':
+            prefix = _text(node)[:3].split('"')[0].split("'")[0].lower()
+            return 'bytes' if 'b' in prefix else 'str'
+        return LITERAL_TYPES.get(node.type)
+
+    @staticmethod
+    def _definition(node: Node) -> Optional[Node]:
+        """Unwraps a decorated definition."""
+        if node.type == 'decorated_definition':
+            return node.child_by_field_name('definition')
+        return node
+
+    def _enclosing_class(self, func_node: Node) -> Optional[Node]:
+        parent = func_node.parent
+        if parent is not None and parent.type == 'decorated_definition':
+            parent = parent.parent
+        if parent is not None and parent.type == 'block' and parent.parent is not None \
+                and parent.parent.type == 'class_definition':
+            return parent.parent
+        return None
+
+    def _methods(self, class_node: Node) -> List[Node]:
+        body = class_node.child_by_field_name('body')
+        methods = [self._definition(child) for child in (body.children if body else [])]
+        return [m for m in methods if m is not None and m.type == 'function_definition']
+
+    def _method(self, class_node: Node, name: str) -> Optional[Node]:
+        return next((m for m in self._methods(class_node) if _text(m.child_by_field_name('name')) == name), None)
+
+    @staticmethod
+    def _walk(node: Optional[Node], skip=frozenset()) -> Iterator[Node]:
+        stack = [node] if node is not None else []
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed([c for c in current.children if c.type not in skip]))
@@ -101,4 +101,15 @@ def get_python_files(path: str) -> list[str]:
                 if spec and spec.match_file(full_path):
                     continue
                 python_files.append(full_path)
-    return python_files
\ No newline at end of file
+    return python_files
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheaply estimates how many LLM tokens a piece of text will use.
+
+    Uses the common ~4 characters per token rule of thumb, which is close enough
+    for budgeting prompts without shipping a tokenizer per provider.
+    """
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
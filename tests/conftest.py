@@ -0,0 +1,12 @@
+"""Shared pytest fixtures."""
+import pytest
+
+from autodoc_ai.fake_server import FakeLLMServer
+
+
+@pytest.fixture
+def server():
+    """A local fake LLM server with fast, deterministic answers; tests adjust its settings as needed."""
+    fake = FakeLLMServer(latency_ms=1, latency_distribution="fixed", chunk_delay_ms=0, retry_after=0.01, seed=1).start()
+    yield fake
+    fake.stop()
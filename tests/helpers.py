@@ -0,0 +1,25 @@
+"""Test doubles shared across the test modules."""
+from autodoc_ai.llm_services import ILLMService
+
+
+class CountingService(ILLMService):
+    """Minimal ILLMService that records every completion request."""
+    provider = "fake"
+    model = "fake-model"
+
+    def __init__(self, response="CACHED_VALUE"):
+        self.calls = 0
+        self.response = response
+
+    def create_completion(self, prompt, task="completion"):
+        self.calls += 1
+        return self.response
+
+    def evaluate_docstring(self, code, docstring): return True
+    def review_docstring(self, code, docstring, style="google"): return docstring
+    def suggest_name(self, code_context, old_name): return None
+    def suggest_function_name(self, code_context, old_name): return None
+    def evaluate_name(self, code_context, name): return True
+    def generate_type_hints(self, code_context, known=None): return {"parameters": {}, "return_type": None}
+    def suggest_constant_name(self, code_context, magic_number): return None
+    def suggest_constant_names(self, usages): return {}
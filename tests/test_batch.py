@@ -0,0 +1,59 @@
+"""Tests for offline batch submit / poll / apply."""
+import json
+
+from autodoc_ai.batch import (
+    BatchJobStore,
+    BatchRecorder,
+    LocalBatchBackend,
+    RecordingLLMService,
+    STATUS_COMPLETED,
+    STATUS_SUBMITTED,
+    parse_batch_output,
+    poll_job,
+)
+from autodoc_ai.cache import CachedLLMService, ResponseCache
+from tests.helpers import CountingService
+
+
+def test_submit_poll_apply_roundtrip(tmp_path):
+    cache_dir = str(tmp_path)
+    recorder = BatchRecorder()
+    inner = CountingService(response="LIVE_ANSWER")
+    recording = CachedLLMService(RecordingLLMService(inner, recorder), ResponseCache(cache_dir=cache_dir))
+
+    # Submit: nothing is sent or applied, the request is recorded once
+    assert not recording.suggest_constant_name("x = 3", "3")
+    assert not recording.suggest_constant_name("x = 3", "3")
+    assert inner.calls == 0
+    requests = list(recorder.requests.values())
+    assert len(requests) == 1 and requests[0]["task"] == "constant_name"
+
+    backend = LocalBatchBackend(str(tmp_path / "local"), responder=lambda prompt: "MAX_RETRIES")
+    store = BatchJobStore(cache_dir)
+    job = store.create("local", "fake", "fake-model", requests, run_args={"path": "."})
+    job["backend_job_id"] = backend.submit(requests)
+    store.save(job)
+
+    # Poll from a "new process": the job is reloaded from disk and its answers land in the cache
+    reloaded = BatchJobStore(cache_dir).load(job["id"])
+    assert poll_job(reloaded, backend, ResponseCache(cache_dir=cache_dir), BatchJobStore(cache_dir)) == STATUS_COMPLETED
+    assert BatchJobStore(cache_dir).load(job["id"])["answered"] == 1
+
+    # Apply: the same request is now a cache hit
+    applying = CachedLLMService(inner, ResponseCache(cache_dir=cache_dir))
+    assert applying.suggest_constant_name("x = 3", "3") == "MAX_RETRIES"
+    assert inner.calls == 0
+
+
+def test_local_backend_reports_pending_until_delay(tmp_path):
+    backend = LocalBatchBackend(str(tmp_path), delay_seconds=3600)
+    backend_job_id = backend.submit([{"key": "k", "provider": "p", "model": "m", "task": "t", "prompt": "hi"}])
+    assert backend.poll(backend_job_id) == STATUS_SUBMITTED
+
+
+def test_parse_batch_output_skips_failed_lines():
+    ok = {"custom_id": "a", "response": {"status_code": 200,
+                                         "body": {"choices": [{"message": {"content": "DONE"}}]}}}
+    failed = {"custom_id": "b", "response": None, "error": {"message": "boom"}}
+    text = "\n".join([json.dumps(ok), json.dumps(failed), "not json", ""])
+    assert parse_batch_output(text) == {"a": "DONE"}
@@ -0,0 +1,57 @@
+"""Tests for packed multi-function docstring generation."""
+import json
+
+from autodoc_ai.generators import LLMGenerator, pack_by_token_budget
+from autodoc_ai.parser import get_language_parser
+from tests.helpers import CountingService
+
+
+class BatchService(CountingService):
+    """Answers batch prompts with a JSON array, optionally dropping some ids."""
+    def __init__(self, drop_ids=()):
+        super().__init__()
+        self.drop_ids = set(drop_ids)
+        self.tasks = []
+
+    def create_completion(self, prompt, task="completion"):
+        self.calls += 1
+        self.tasks.append(task)
+        if task != "docstring_batch":
+            return "Single docstring."
+        payload = prompt.split("Functions:", 1)[1]
+        functions = json.loads(payload[payload.index("["):payload.rindex("]") + 1])
+        answer = [{"id": f["id"], "docstring": f"Batched {f['id']}."} for f in functions if f["id"] not in self.drop_ids]
+        return "```json\n" + json.dumps(answer) + "\n```"
+
+
+def _function_nodes(count):
+    source = b"".join(f"def helper_{i}(a):\n    return a + {i}\n\n".encode() for i in range(count))
+    tree = get_language_parser("python").parse(source)
+    return [child for child in tree.root_node.children if child.type == "function_definition"]
+
+
+def test_pack_by_token_budget_respects_budget_and_item_limit():
+    bins = pack_by_token_budget([5, 5, 5, 5, 50], budget=12, max_items=3)
+    assert sorted(i for b in bins for i in b) == [0, 1, 2, 3, 4]
+    assert [4] in bins
+    assert all(len(b) <= 3 for b in bins)
+
+
+def test_generate_batch_uses_one_request_for_many_functions():
+    service = BatchService()
+    generator = LLMGenerator(service, batch_token_budget=10000)
+    nodes = _function_nodes(12)
+
+    batches = generator.pack_batches(nodes)
+    assert len(batches) == 1
+    assert generator.generate_batch(batches[0]) == [f"Batched {i}." for i in range(12)]
+    assert service.calls == 1
+
+
+def test_generate_batch_falls_back_per_missing_item():
+    service = BatchService(drop_ids={1})
+    generator = LLMGenerator(service)
+    docstrings = generator.generate_batch(_function_nodes(3))
+
+    assert docstrings == ["Batched 0.", "Single docstring.", "Batched 2."]
+    assert service.tasks == ["docstring_batch", "docstring"]
@@ -0,0 +1,63 @@
+"""Tests for the on-disk LLM response cache."""
+from autodoc_ai.cache import ResponseCache, CachedLLMService
+from tests.helpers import CountingService
+
+
+def test_cache_hit_skips_inner_service(tmp_path):
+    inner = CountingService()
+    service = CachedLLMService(inner, ResponseCache(cache_dir=str(tmp_path)))
+
+    assert service.create_completion("prompt", task="docstring") == "CACHED_VALUE"
+    assert service.create_completion("prompt", task="docstring") == "CACHED_VALUE"
+    assert inner.calls == 1
+    assert service.cache.stats()["hits"] == 1
+
+    # A different task is a different key
+    service.create_completion("prompt", task="type_hints")
+    assert inner.calls == 2
+
+
+def test_generation_profile_is_part_of_the_key(tmp_path):
+    inner = CountingService()
+    service = CachedLLMService(inner, ResponseCache(cache_dir=str(tmp_path)))
+    service.create_completion("prompt", task="docstring")
+
+    # Answers made under other limits (e.g. a lower max_tokens) are not reused
+    inner.generation = {"docstring": {"max_tokens": 50}}
+    service.create_completion("prompt", task="docstring")
+    # Overrides for other tasks leave this one's key alone
+    inner.generation = {"type_hints": {"max_tokens": 50}}
+    service.create_completion("prompt", task="docstring")
+    assert inner.calls == 2
+
+
+def test_cache_survives_new_instance_and_routes_prompt_methods(tmp_path):
+    inner = CountingService(response="MAX_RETRIES")
+    CachedLLMService(inner, ResponseCache(cache_dir=str(tmp_path))).suggest_constant_name("x = 3", "3")
+
+    second = CachedLLMService(inner, ResponseCache(cache_dir=str(tmp_path)))
+    assert second.suggest_constant_name("x = 3", "3") == "MAX_RETRIES"
+    assert inner.calls == 1
+
+
+def test_empty_responses_are_not_cached(tmp_path):
+    inner = CountingService(response="")
+    service = CachedLLMService(inner, ResponseCache(cache_dir=str(tmp_path)))
+    service.create_completion("prompt")
+    service.create_completion("prompt")
+    assert inner.calls == 2
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_entries=2)
+    keys = [ResponseCache.make_key("p", "m", "t", str(i)) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, f"value{i}")
+    import os
+    for i, key in enumerate(keys):
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+    cache.max_age_seconds = float("inf")
+
+    assert cache.prune() == 1
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == "value2"
@@ -0,0 +1,88 @@
+"""Tests for the per-provider circuit breaker."""
+import time
+
+import pytest
+
+from autodoc_ai.llm_services import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitBreakerLLMService,
+    CircuitOpenError,
+)
+from autodoc_ai.telemetry import telemetry_scope
+from tests.helpers import CountingService
+
+
+class Outage(Exception):
+    status_code = 503
+
+
+class FlakyService(CountingService):
+    """Fails with a provider outage until `healthy` is set."""
+    def __init__(self):
+        super().__init__(response="OK")
+        self.healthy = False
+
+    def _complete(self, prompt, task="completion"):
+        self.calls += 1
+        if not self.healthy:
+            raise Outage("service unavailable")
+        return self.response
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    inner = FlakyService()
+    service = CircuitBreakerLLMService(inner, CircuitBreaker("fake", failure_threshold=3, cooldown_seconds=60))
+    for _ in range(3):
+        with pytest.raises(Outage):
+            service._complete("p", "docstring")
+    assert service.breaker.state == CIRCUIT_OPEN
+
+    with telemetry_scope(file="a.py", function="f"):
+        with pytest.raises(CircuitOpenError):
+            service._complete("p", "docstring")
+        # The public path swallows the fast failure like any other error
+        assert service.create_completion("p", task="docstring") == ""
+    assert inner.calls == 3
+    assert service.breaker.skipped[0] == {"provider": "fake", "task": "docstring", "file": "a.py", "function": "f"}
+
+
+def test_half_open_probe_closes_the_circuit_on_success():
+    inner = FlakyService()
+    breaker = CircuitBreaker("fake", failure_threshold=1, cooldown_seconds=0.01)
+    service = CircuitBreakerLLMService(inner, breaker)
+    with pytest.raises(Outage):
+        service._complete("p", "docstring")
+    time.sleep(0.02)
+
+    # Still failing: the probe re-opens the circuit
+    with pytest.raises(Outage):
+        service._complete("p", "docstring")
+    assert breaker.state == CIRCUIT_OPEN and breaker.opened_count == 2
+
+    time.sleep(0.02)
+    inner.healthy = True
+    assert service._complete("p", "docstring") == "OK"
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_error_rate_trips_without_consecutive_failures():
+    breaker = CircuitBreaker("fake", failure_threshold=100, error_rate=0.5, window=4)
+    for ok in (True, False, True, False):
+        breaker.record_success() if ok else breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_request_specific_errors_do_not_count():
+    class BadRequest(Exception):
+        status_code = 400
+
+    class RejectingService(CountingService):
+        def _complete(self, prompt, task="completion"):
+            raise BadRequest("prompt too long")
+
+    service = CircuitBreakerLLMService(RejectingService(), CircuitBreaker("fake", failure_threshold=1))
+    with pytest.raises(BadRequest):
+        service._complete("p", "docstring")
+    assert service.breaker.state == CIRCUIT_CLOSED
@@ -0,0 +1,89 @@
+"""Tests for coalescing identical in-flight requests."""
+import threading
+import time
+
+import pytest
+
+from autodoc_ai.cache import CoalescingLLMService
+from autodoc_ai.llm_services import TelemetryLLMService
+from autodoc_ai.telemetry import Telemetry
+from tests.helpers import CountingService
+
+
+class SlowService(CountingService):
+    """Answers after `release` is set, so concurrent requests overlap."""
+    def __init__(self, response="VALUE_86400", error=None):
+        super().__init__(response=response)
+        self.release = threading.Event()
+        self.error = error
+        self._lock = threading.Lock()
+
+    def _complete(self, prompt, task):
+        with self._lock:
+            self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return self.response
+
+
+def _concurrently(service, prompts, task="constant_name"):
+    results = [None] * len(prompts)
+
+    def call(i):
+        try:
+            results[i] = service._complete(prompts[i], task)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(prompts))]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_for_followers(service, count):
+    deadline = time.monotonic() + 5
+    while service.coalesced < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_identical_concurrent_requests_share_one_call():
+    inner = SlowService()
+    telemetry = Telemetry()
+    coalescing = CoalescingLLMService(inner)
+    service = TelemetryLLMService(coalescing, telemetry)
+
+    threads, results = _concurrently(service, ["name 86400"] * 4 + ["name 3600"])
+    _wait_for_followers(coalescing, 3)
+    inner.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["VALUE_86400"] * 5
+    assert inner.calls == 2  # one per distinct prompt
+    summary = telemetry.summary()
+    assert summary["calls"] == 5 and summary["coalesced"] == 3
+    # Followers sent nothing, so they add no tokens
+    assert sum(r.input_tokens for r in telemetry.records if r.cache == "coalesced") == 0
+
+    # Once the leader is done, the same prompt is sent again (the response cache covers repeats)
+    assert service._complete("name 86400", "constant_name") == "VALUE_86400"
+    assert inner.calls == 3
+
+
+def test_followers_share_the_leaders_error():
+    inner = SlowService(error=TimeoutError("provider timed out"))
+    service = CoalescingLLMService(inner)
+
+    threads, results = _concurrently(service, ["same prompt"] * 3)
+    _wait_for_followers(service, 2)
+    inner.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert inner.calls == 1
+    assert all(isinstance(result, TimeoutError) for result in results)
+    with pytest.raises(TimeoutError):
+        service._complete("same prompt", "constant_name")
+    assert inner.calls == 2
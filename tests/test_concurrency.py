@@ -0,0 +1,64 @@
+"""Tests for concurrent LLM request execution."""
+import threading
+import time
+
+from autodoc_ai.concurrency import RequestEngine
+from autodoc_ai.generators import MockGenerator
+from autodoc_ai.parser import get_language_parser
+from autodoc_ai.processors import DocstringProcessor
+from autodoc_ai.transformers import CodeTransformer
+
+
+class SlowGenerator(MockGenerator):
+    """MockGenerator that sleeps per call and tracks peak concurrency."""
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, node):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return f"Docs for {node.child_by_field_name('name').text.decode('utf8')}."
+
+
+def test_map_preserves_order_and_limits_in_flight():
+    engine = RequestEngine(max_in_flight=3)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(i):
+        with lock:
+            active.append(i)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(i)
+        return i * 2
+
+    assert engine.map(work, range(10)) == [i * 2 for i in range(10)]
+    assert max(peak) <= 3
+    engine.shutdown()
+
+
+def test_docstring_processor_runs_requests_concurrently():
+    source = b"".join(f"def f{i}(x):\n    return x\n\n".encode() for i in range(8))
+    tree = get_language_parser("python").parse(source)
+    transformer = CodeTransformer(source)
+    generator = SlowGenerator()
+    engine = RequestEngine(max_in_flight=8)
+
+    changes = DocstringProcessor("python", tree, source, transformer, engine).process(generator=generator)
+    engine.shutdown()
+
+    assert len(changes) == 8
+    assert generator.peak > 1
+    output = transformer.apply_changes().decode("utf8")
+    for i in range(8):
+        assert f"Docs for f{i}." in output
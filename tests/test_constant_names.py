@@ -0,0 +1,81 @@
+"""Tests for naming all magic numbers of a file in one request."""
+from autodoc_ai.batch import BatchRecorder, RecordingLLMService
+from autodoc_ai.generators import MockGenerator
+from autodoc_ai.parser import get_language_parser
+from autodoc_ai.processors import MagicNumberProcessor
+from autodoc_ai.transformers import CodeTransformer
+from tests.helpers import CountingService
+
+
+class BatchNamingGenerator(MockGenerator):
+    """Answers batched naming requests but leaves 4.99 out, to exercise the per-value fallback."""
+    def __init__(self):
+        self.batched = []
+        self.single = []
+
+    def suggest_constant_names(self, usages):
+        self.batched.append(usages)
+        return {value: name for value, name in {"100": "DISCOUNT_THRESHOLD", "0.9": "DISCOUNT_FACTOR"}.items()
+                if value in usages}
+
+    def suggest_constant_name(self, code_context, magic_number):
+        self.single.append(magic_number)
+        return "SHIPPING_FEE" if magic_number == "4.99" else None
+
+
+SOURCE = (b"def price(total):\n"
+          b"    if total > 100:\n"
+          b"        return total * 0.9 + 4.99\n"
+          b"    return total + 4.99\n")
+
+
+def _run(generator, batch=True):
+    tree = get_language_parser("python").parse(SOURCE)
+    transformer = CodeTransformer(SOURCE)
+    MagicNumberProcessor("python", tree, SOURCE, transformer).process(generator=generator, batch=batch)
+    return transformer.apply_changes().decode("utf8")
+
+
+def test_one_request_names_every_value_with_fallback_for_omissions():
+    generator = BatchNamingGenerator()
+    result = _run(generator)
+
+    assert len(generator.batched) == 1
+    usages = generator.batched[0]
+    assert set(usages) == {"100", "0.9", "4.99"}
+    # Each value is described by its function's signature and the statements using it
+    assert usages["0.9"] == ["def price(total):\n    return total * 0.9 + 4.99"]
+    assert usages["4.99"] == ["def price(total):\n    return total * 0.9 + 4.99",
+                              "def price(total):\n    return total + 4.99"]
+    assert generator.single == ["4.99"]
+    assert "if total > DISCOUNT_THRESHOLD:" in result
+    assert "return total * DISCOUNT_FACTOR + SHIPPING_FEE" in result
+
+
+def test_batching_can_be_disabled():
+    generator = BatchNamingGenerator()
+    _run(generator, batch=False)
+    assert generator.batched == []
+    assert sorted(generator.single) == ["0.9", "100", "4.99"]
+
+
+class RecordingGenerator(MockGenerator):
+    """Sends naming requests through a batch recorder, as `--batch-submit` does."""
+    def __init__(self):
+        self.recorder = BatchRecorder()
+        self.service = RecordingLLMService(CountingService(), self.recorder)
+
+    def suggest_constant_names(self, usages):
+        return self.service.suggest_constant_names(usages)
+
+    def suggest_constant_name(self, code_context, magic_number):
+        return self.service.suggest_constant_name(code_context, magic_number)
+
+
+def test_recorded_batch_requests_are_not_repeated_per_value():
+    generator = RecordingGenerator()
+    result = _run(generator)
+
+    # No response is not an omission: only the batched request is recorded
+    assert [r["task"] for r in generator.recorder.requests.values()] == ["constant_names"]
+    assert result == SOURCE.decode("utf8")
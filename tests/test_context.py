@@ -0,0 +1,61 @@
+"""Tests for token-budgeted prompt context."""
+from autodoc_ai.context import ContextExtractor
+from autodoc_ai.parser import get_language_parser
+from autodoc_ai.utils import estimate_tokens
+
+
+def _parse(source):
+    return get_language_parser("python").parse(source.encode()).root_node
+
+
+def _find(node, node_type, text=None):
+    if node.type == node_type and (text is None or node.text.decode() == text):
+        return node
+    for child in node.children:
+        found = _find(child, node_type, text)
+        if found:
+            return found
+    return None
+
+
+def test_small_function_is_returned_verbatim():
+    func = _parse("def add(a, b):\n    return a + b\n").children[0]
+    assert ContextExtractor(budget_tokens=100).for_node(func) == func.text.decode()
+
+
+def test_long_function_keeps_signature_and_tail_within_budget():
+    body = "".join(f"    total += step_{i}(value)\n" for i in range(300))
+    func = _parse(f"def accumulate(value):\n    total = 0\n{body}    return total\n").children[0]
+
+    context = ContextExtractor(budget_tokens=200).for_node(func)
+
+    assert context.startswith("def accumulate(value):")
+    assert context.rstrip().endswith("return total")
+    assert "lines omitted" in context
+    assert estimate_tokens(context) <= 220
+
+
+def test_module_level_literal_gets_a_window_not_the_whole_file():
+    filler = "".join(f"name_{i} = compute_{i}()\n" for i in range(2000))
+    source = filler + "timeout = fetch(url, 86400)\n" + filler
+    root = _parse(source)
+    literal = _find(root, "integer", "86400")
+
+    context = ContextExtractor(budget_tokens=300, surrounding_lines=3).for_literal(literal, None, source)
+
+    assert "timeout = fetch(url, 86400)" in context
+    assert len(context.split("\n")) == 7
+
+
+def test_literal_in_long_function_includes_signature():
+    body = "".join(f"    x_{i} = work_{i}()\n" for i in range(500))
+    source = f"def poll(client):\n{body}    client.wait(3600)\n{body}"
+    root = _parse(source)
+    func = root.children[0]
+    literal = _find(root, "integer", "3600")
+
+    context = ContextExtractor(budget_tokens=300, surrounding_lines=2).for_literal(literal, func, source)
+
+    assert context.startswith("def poll(client):")
+    assert "client.wait(3600)" in context
+    assert estimate_tokens(context) <= 300
@@ -0,0 +1,80 @@
+"""Tests for per-task request timeouts and the run deadline."""
+import time
+
+import pytest
+
+from autodoc_ai.cli import main
+from autodoc_ai.concurrency import DeadlineExceeded, get_deadline, set_deadline
+from autodoc_ai.llm_services import (
+    CIRCUIT_CLOSED,
+    CircuitBreaker,
+    CircuitBreakerLLMService,
+    RateLimitedLLMService,
+    RateLimiter,
+    request_timeout,
+    timeout_args,
+)
+from autodoc_ai.telemetry import telemetry_scope
+from tests.helpers import CountingService
+
+
+@pytest.fixture(autouse=True)
+def no_deadline():
+    set_deadline(None)
+    yield
+    set_deadline(None)
+
+
+def test_per_task_timeouts_fall_back_to_default():
+    timeouts = {"default": 20.0, "docstring_batch": 120.0}
+    assert request_timeout(timeouts, "docstring_batch") == 120.0
+    assert request_timeout(timeouts, "docstring") == 20.0
+    # Unset timeouts are left to the HTTP client rather than passed as None ("no timeout")
+    assert timeout_args({}, "docstring") == {}
+
+
+def test_deadline_caps_request_timeouts():
+    set_deadline(5)
+    assert 4 < request_timeout({"default": 60.0}, "docstring") <= 5
+    assert 4 < request_timeout({}, "docstring") <= 5
+
+
+def test_requests_after_the_deadline_fail_fast_and_mark_the_file():
+    set_deadline(0.01)
+    time.sleep(0.02)
+    inner = CountingService()
+    service = RateLimitedLLMService(inner, RateLimiter())
+    with telemetry_scope(file="slow.py"):
+        assert service.create_completion("p", task="docstring") == ""
+    assert inner.calls == 0
+    assert get_deadline().unfinished_files == {"slow.py"}
+
+
+def test_deadline_refusals_do_not_trip_the_circuit_breaker():
+    set_deadline(0.01)
+    time.sleep(0.02)
+    breaker = CircuitBreaker("fake", failure_threshold=2, cooldown_seconds=60)
+    service = CircuitBreakerLLMService(RateLimitedLLMService(CountingService(), RateLimiter()), breaker)
+    for _ in range(5):
+        with pytest.raises(DeadlineExceeded):
+            service._complete("p", "docstring")
+
+    # A deadline refusal says nothing about the provider's health
+    assert breaker.stats() == {"state": CIRCUIT_CLOSED, "opened": 0, "skipped": 0}
+
+
+def test_summary_separates_files_the_deadline_kept_from_starting(tmp_path, monkeypatch, capsys):
+    for name in ("a.py", "b.py"):
+        (tmp_path / name).write_text("def f(x):\n    return x * 86400\n")
+    monkeypatch.chdir(tmp_path)
+    for provider in ("GROQ", "OPENAI", "ANTHROPIC", "GEMINI"):
+        monkeypatch.delenv(f"{provider}_API_KEY", raising=False)
+        monkeypatch.delenv(f"{provider}_API_KEYS", raising=False)
+    monkeypatch.delenv("LOCAL_BASE_URL", raising=False)
+    monkeypatch.setattr("sys.argv", ["zenco", "run", ".", "--fix-magic-numbers", "--strategy", "mock",
+                                      "--deadline", "0.000001"])
+    main()
+
+    output = capsys.readouterr().out
+    assert "Files processed: 0" in output
+    assert "Files not started: 2" in output
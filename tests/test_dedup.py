@@ -0,0 +1,41 @@
+"""Tests for run-wide deduplication of identical functions."""
+from autodoc_ai.dedup import FunctionDeduplicator, structural_key
+from autodoc_ai.parser import get_language_parser
+from autodoc_ai.processors import DocstringProcessor
+from autodoc_ai.transformers import CodeTransformer
+from tests.test_fingerprints import CountingGenerator
+
+
+def _function(source):
+    return get_language_parser("python").parse(source.encode()).root_node.children[0]
+
+
+def test_comments_and_layout_do_not_change_the_key():
+    plain = _function("def total(items):\n    result = 0\n    for item in items:\n        result += item\n    return result\n")
+    noisy = _function("def total(items):  # sum\n    result = 0\n\n    for item in items:   # loop\n        result += item\n    return result\n")
+    assert structural_key(plain) == structural_key(noisy)
+
+
+def test_alpha_rename_only_renames_locals():
+    original = _function("def total(items):\n    result = 0\n    for item in items:\n        result += item\n    return result\n")
+    renamed = _function("def total(items):\n    acc = 0\n    for x in items:\n        acc += x\n    return acc\n")
+    other_param = _function("def total(values):\n    acc = 0\n    for x in values:\n        acc += x\n    return acc\n")
+
+    assert structural_key(original) != structural_key(renamed)
+    assert structural_key(original, alpha_rename=True) == structural_key(renamed, alpha_rename=True)
+    assert structural_key(original, alpha_rename=True) != structural_key(other_param, alpha_rename=True)
+
+
+def test_identical_functions_across_files_share_one_request():
+    generator = CountingGenerator()
+    dedup = FunctionDeduplicator()
+    for source in [b"def add(a, b):\n    return a + b\n\ndef add2(a, b):\n    return a + b\n",
+                   b"# copy\ndef add(a, b):\n    return a + b  # same\n"]:
+        tree = get_language_parser("python").parse(source)
+        transformer = CodeTransformer(source)
+        changes = DocstringProcessor("python", tree, source, transformer, dedup=dedup).process(generator=generator)
+        assert all(change["type"] == "docstring" for change in changes)
+        assert transformer.apply_changes().decode("utf8").count("Adds two numbers.") == len(changes)
+
+    assert generator.generated == 2
+    assert dedup.stats() == {"functions": 3, "requests": 2, "dedup_ratio": 1.5}
@@ -0,0 +1,50 @@
+"""Tests for provider failover and hedged requests."""
+import time
+
+from autodoc_ai.llm_services import FailoverLLMService
+from tests.helpers import CountingService
+
+
+class Backend(CountingService):
+    """Fake backend with a fixed delay that can be made to fail."""
+    def __init__(self, name, response="OK", delay=0.0, fail=False):
+        super().__init__(response=response)
+        self.provider = name
+        self.delay = delay
+        self.fail = fail
+
+    def _complete(self, prompt, task):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.provider} is down")
+        return self.response
+
+
+def test_failover_moves_down_the_list_on_errors():
+    primary = Backend("primary", fail=True)
+    secondary = Backend("secondary", response="FROM_SECONDARY")
+    service = FailoverLLMService([primary, secondary])
+
+    assert service.create_completion("prompt") == "FROM_SECONDARY"
+    assert service.failover_count == 1
+    assert service.provider == "primary"
+
+
+def test_empty_answers_count_as_failures():
+    service = FailoverLLMService([Backend("a", response=""), Backend("b", response="B")])
+    assert service.create_completion("prompt") == "B"
+
+
+def test_hedge_fires_when_primary_exceeds_p95():
+    primary = Backend("primary", response="SLOW", delay=0.5)
+    secondary = Backend("secondary", response="FAST")
+    service = FailoverLLMService([primary, secondary], hedge=True, hedge_min_samples=3)
+    for _ in range(3):
+        service.latencies[0].record(0.01)
+
+    start = time.monotonic()
+    assert service.create_completion("prompt") == "FAST"
+    assert time.monotonic() - start < 0.4
+    assert service.hedged_count == 1
+    assert service.hedge_wins == 1
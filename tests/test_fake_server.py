@@ -0,0 +1,33 @@
+"""End-to-end tests of the real adapters against the local fake LLM server."""
+import pytest
+
+from autodoc_ai.fake_server import canned_response
+from autodoc_ai.llm_services import GroqAdapter, OpenAIAdapter, is_rate_limit_error
+
+
+def test_canned_responses_are_task_aware():
+    assert canned_response("... Answer with a single word: YES or NO.") == "YES"
+    assert canned_response("... magic number ...\n\nMagic number: `3.5`") == "VALUE_3_5"
+    assert '"b": "Any"' in canned_response("infer appropriate type hints\ndef f(a, b=2):\n")
+
+
+@pytest.mark.parametrize("adapter_class", [OpenAIAdapter, GroqAdapter])
+def test_adapters_complete_and_parse_against_fake_server(server, adapter_class):
+    adapter = adapter_class(api_key="fake", model="fake-model", base_url=server.base_url)
+
+    assert adapter.evaluate_docstring("def f(): pass", "Does f.") is True
+    assert adapter.generate_type_hints("def scale(value, factor):\n    return value * factor\n") == {
+        "parameters": {"value": "Any", "factor": "Any"}, "return_type": "None"}
+    assert adapter.suggest_constant_name("timeout = 86400", "86400") == "VALUE_86400"
+    assert server.stats["completed"] == 3
+
+
+def test_injected_rate_limits_surface_as_rate_limit_errors(server):
+    server.rate_limit_rate = 1.0
+    adapter = OpenAIAdapter(api_key="fake", model="fake-model", base_url=server.base_url)
+    adapter.client = adapter.client.with_options(max_retries=0)
+
+    with pytest.raises(Exception) as error:
+        adapter._complete("Generate a docstring", task="docstring")
+    assert is_rate_limit_error(error.value)
+    assert server.stats["rate_limited"] == 1
@@ -0,0 +1,59 @@
+"""Tests for the per-function fingerprint store."""
+from autodoc_ai.fingerprints import FingerprintStore
+from autodoc_ai.parser import get_language_parser
+from autodoc_ai.processors import DocstringProcessor, TypeHintProcessor
+from autodoc_ai.transformers import CodeTransformer
+from autodoc_ai.generators import MockGenerator
+
+
+class CountingGenerator(MockGenerator):
+    """MockGenerator that counts docstring and type-hint requests."""
+    def __init__(self):
+        self.generated = 0
+        self.hinted = 0
+
+    def generate(self, node):
+        self.generated += 1
+        return "Adds two numbers."
+
+    def generate_type_hints(self, node):
+        self.hinted += 1
+        return {"parameters": {"a": "int", "b": "int"}, "return_type": "int"}
+
+
+SOURCE = b"def add(a, b):\n    return a + b\n"
+
+
+def _run(processor_class, generator, store, **kwargs):
+    tree = get_language_parser("python").parse(SOURCE)
+    transformer = CodeTransformer(SOURCE)
+    processor_class("python", tree, SOURCE, transformer, fingerprints=store).process(generator=generator, **kwargs)
+    return transformer.apply_changes().decode("utf8")
+
+
+def test_formatting_changes_keep_the_fingerprint(tmp_path):
+    store = FingerprintStore(cache_dir=str(tmp_path))
+    original = store.fingerprint("python", "docstring", "def f(x):\n    return x\n")
+    reindented = store.fingerprint("python", "docstring", "    def f(x):  \n\n        return x")
+    assert original == reindented
+    assert original != store.fingerprint("python", "type_hints", "def f(x):\n    return x\n")
+    assert original != FingerprintStore(cache_dir=str(tmp_path), scope="other").fingerprint(
+        "python", "docstring", "def f(x):\n    return x\n")
+
+
+def test_unchanged_functions_are_answered_from_an_earlier_run(tmp_path):
+    generator = CountingGenerator()
+    first_store = FingerprintStore(cache_dir=str(tmp_path))
+    first = _run(DocstringProcessor, generator, first_store)
+    _run(TypeHintProcessor, generator, first_store)
+    first_store.save()
+
+    second_store = FingerprintStore(cache_dir=str(tmp_path))
+    second = _run(DocstringProcessor, generator, second_store)
+    hinted = _run(TypeHintProcessor, generator, second_store)
+
+    assert generator.generated == 1
+    assert generator.hinted == 1
+    assert second == first
+    assert "def add(a: int, b: int) -> int:" in hinted
+    assert second_store.stats() == {"reused": 2, "recorded": 0}
@@ -0,0 +1,37 @@
+"""Tests for per-task generation profiles (max tokens, stop sequences, temperature, seed)."""
+from autodoc_ai.batch import build_batch_lines
+from autodoc_ai.fake_server import FakeLLMServer
+from autodoc_ai.llm_services import AnthropicAdapter, OpenAIAdapter, chat_generation_args, generation_profile
+
+
+def test_profiles_layer_builtin_defaults_and_overrides():
+    assert generation_profile(None, "evaluate_docstring") == {"max_tokens": 8, "temperature": 0}
+    overrides = {"default": {"seed": 7, "temperature": 0.2}, "docstring": {"max_tokens": 300}}
+    assert generation_profile(overrides, "docstring") == {"max_tokens": 300, "temperature": 0.2, "seed": 7}
+    assert chat_generation_args(overrides, "constant_name") == {
+        "max_tokens": 24, "stop": ["\n\n"], "temperature": 0.2, "seed": 7}
+
+    line = build_batch_lines([{"key": "k", "model": "m", "task": "evaluate_name", "prompt": "p"}])[0]
+    assert line["body"]["max_tokens"] == 8 and line["body"]["temperature"] == 0
+
+
+def test_anthropic_maps_the_profile_onto_the_messages_api():
+    adapter = AnthropicAdapter.__new__(AnthropicAdapter)
+    adapter.generation = {"suggest_name": {"stop": ["\n\n", "###"]}}
+    # max_tokens is required by the Messages API, and whitespace-only stop sequences are rejected
+    assert adapter._generation_args("suggest_name") == {"max_tokens": 24, "temperature": 0, "stop_sequences": ["###"]}
+    assert adapter._generation_args("docstring_batch")["max_tokens"] == 4096
+
+
+def test_limits_reach_the_endpoint():
+    server = FakeLLMServer(latency_ms=1, latency_distribution="fixed", chunk_delay_ms=0, seed=1).start()
+    try:
+        adapter = OpenAIAdapter(api_key="fake", model="fake-model", base_url=server.base_url,
+                                generation={"docstring": {"max_tokens": 5}})
+        docstring = adapter.create_completion("Write a docstring for this code.", task="docstring")
+        verdict = adapter.evaluate_docstring("def f(): pass", "Does f.")
+    finally:
+        server.stop()
+
+    assert docstring == "Performs the operati"  # 5 tokens at ~4 characters each
+    assert verdict is True
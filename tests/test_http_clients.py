@@ -0,0 +1,22 @@
+"""Tests for pooled HTTP clients and reused model handles."""
+from autodoc_ai.http_clients import close_http_clients, get_http_client
+from autodoc_ai.llm_services import GeminiAdapter, OpenAIAdapter
+
+
+def test_one_pooled_client_per_provider():
+    try:
+        first = get_http_client("openai", pool_size=7)
+        assert get_http_client("openai") is first
+        assert get_http_client("groq") is not first
+
+        adapter = OpenAIAdapter(api_key="test-key", http_client=first)
+        assert adapter.client._client is first
+    finally:
+        close_http_clients()
+    assert get_http_client("openai") is not first
+    close_http_clients()
+
+
+def test_gemini_reuses_model_handles():
+    adapter = GeminiAdapter(api_key="test-key", model="gemini-1.5-flash")
+    assert adapter._get_model_handle("gemini-1.5-flash") is adapter._get_model_handle("gemini-1.5-flash")
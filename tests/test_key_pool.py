@@ -0,0 +1,59 @@
+"""Tests for spreading requests over a pool of API keys per provider."""
+import openai
+import pytest
+
+from autodoc_ai.generators import GeneratorFactory
+from autodoc_ai.llm_services import KeyPoolExhausted, KeyPoolLLMService, OpenAIAdapter, RateLimitedLLMService, RateLimiter
+
+
+def _pool(server, keys, eviction_seconds=300.0):
+    # sk-revoked is rejected as invalid, sk-spent has run out of quota
+    server.key_errors = {"sk-revoked": 401, "sk-spent": 429}
+    members = [RateLimitedLLMService(OpenAIAdapter(api_key=key, model="fake-model", base_url=server.base_url),
+                                     RateLimiter(max_retries=2, base_delay=0.01))
+               for key in keys]
+    return KeyPoolLLMService(members, eviction_seconds=eviction_seconds)
+
+
+def test_requests_rotate_over_the_keys(server):
+    pool = _pool(server, ["sk-a", "sk-b", "sk-c"])
+    for i in range(6):
+        assert pool.suggest_constant_name(f"limit = {i + 10}", str(i + 10)) == f"VALUE_{i + 10}"
+    assert server.requests_by_key == {"sk-a": 2, "sk-b": 2, "sk-c": 2}
+
+
+def test_auth_and_quota_failures_evict_the_key(server):
+    pool = _pool(server, ["sk-revoked", "sk-a", "sk-spent"])
+    for i in range(4):
+        assert pool.suggest_constant_name(f"limit = {i + 10}", str(i + 10)) == f"VALUE_{i + 10}"
+
+    # Each bad key failed once, without retries, and was then left out
+    assert server.requests_by_key == {"sk-revoked": 1, "sk-spent": 1, "sk-a": 4}
+    assert pool.evictions == 2 and pool.available_keys() == 1
+
+
+def test_a_fully_evicted_pool_fails_fast(server):
+    pool = _pool(server, ["sk-revoked", "sk-spent"])
+    # The last key's own error surfaces first; after that no key is left to try
+    with pytest.raises(openai.RateLimitError):
+        pool._complete("prompt", "completion")
+    with pytest.raises(KeyPoolExhausted):
+        pool._complete("prompt", "completion")
+    assert sum(server.requests_by_key.values()) == 2
+
+
+def test_factory_reads_the_key_pool_from_the_environment(monkeypatch, tmp_path):
+    (tmp_path / "pyproject.toml").write_text('[tool.zenco.key_pool]\nopenai = ["NIGHTLY_OPENAI_KEY"]\n')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-a")
+    monkeypatch.setenv("OPENAI_API_KEYS", "sk-b:org-1:proj-1, sk-a")
+    monkeypatch.setenv("NIGHTLY_OPENAI_KEY", "sk-c")
+
+    assert GeneratorFactory._key_pool("openai") == [
+        {"api_key": "sk-a"},
+        {"api_key": "sk-b", "organization": "org-1", "project": "proj-1"},
+        {"api_key": "sk-c"},
+    ]
+    adapters = GeneratorFactory._create_adapters("openai", "fake-model")
+    assert [adapter.client.api_key for adapter in adapters] == ["sk-a", "sk-b", "sk-c"]
+    assert adapters[1].client.organization == "org-1"
@@ -0,0 +1,28 @@
+"""Tests for the self-hosted OpenAI-compatible provider, against the local fake server."""
+from autodoc_ai.generators import GeneratorFactory, LLMGenerator
+from autodoc_ai.llm_services import LocalAdapter
+
+
+def test_local_adapter_discovers_model_and_completes(server):
+    adapter = LocalAdapter(base_url=server.base_url)
+    assert adapter.model == "fake-model"
+    assert adapter.suggest_constant_name("timeout = 86400", "86400") == "VALUE_86400"
+    assert adapter.evaluate_docstring("def f(): pass", "Does f.") is True
+
+
+def test_local_adapter_sends_key_in_custom_header(server):
+    adapter = LocalAdapter(base_url=server.base_url, model="llama", api_key="secret", auth_header="X-API-Key")
+    assert adapter.client.default_headers["X-API-Key"] == "secret"
+    assert adapter.model == "llama"
+
+
+def test_factory_builds_local_generator_from_environment(server, monkeypatch):
+    monkeypatch.setenv("LOCAL_BASE_URL", server.base_url)
+    monkeypatch.setenv("LOCAL_MODEL_NAME", "fake-model")
+    for key in ("GROQ_API_KEY", "OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GEMINI_API_KEY"):
+        monkeypatch.delenv(key, raising=False)
+
+    generator = GeneratorFactory.create_generator("mock", provider="local", use_cache=False)
+    assert isinstance(generator, LLMGenerator)
+    assert generator.llm_service.provider == "local"
+    assert generator.llm_service.suggest_constant_name("retries = 5", "5") == "VALUE_5"
@@ -0,0 +1,55 @@
+"""Tests for routing tasks to their own models with [tool.zenco.models]."""
+from autodoc_ai.batch import BatchRecorder
+from autodoc_ai.fake_server import FakeLLMServer
+from autodoc_ai.generators import GeneratorFactory
+from autodoc_ai.parser import get_language_parser
+
+
+PYPROJECT = """
+[tool.zenco.models]
+evaluate_docstring = "small-model"
+constant_name = "small-model"
+type_hints = "large-model"
+"""
+
+
+def test_tasks_go_to_their_configured_models(tmp_path, monkeypatch):
+    (tmp_path / "pyproject.toml").write_text(PYPROJECT)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LOCAL_MODEL_NAME", "default-model")
+    server = FakeLLMServer(latency_ms=1, latency_distribution="fixed", seed=1).start()
+    try:
+        generator = GeneratorFactory.create_generator("llm", provider="local", base_url=server.base_url,
+                                                      use_cache=False)
+        function = get_language_parser("python").parse(b"def add(a, b):\n    return a + b\n").root_node.children[0]
+        generator.generate(function)
+        generator.evaluate(function, "Adds two numbers.")
+        generator.generate_type_hints(function)
+        generator.suggest_constant_name("timeout = 86400", "86400")
+    finally:
+        server.stop()
+
+    assert {task: service.model for task, service in generator.routes.items()} == {
+        "evaluate_docstring": "small-model", "constant_name": "small-model", "type_hints": "large-model"}
+    # Both routed tasks of one model share its chain
+    assert generator.routes["evaluate_docstring"] is generator.routes["constant_name"]
+    assert "evaluate_docstring=small-model" in generator.fingerprint_scope
+
+    # One telemetry collector sees every model
+    by_model = generator.llm_service.telemetry.summary()["by_model"]
+    assert {model: stats["calls"] for model, stats in by_model.items()} == {
+        "default-model": 1, "small-model": 2, "large-model": 1}
+
+
+def test_batch_runs_use_the_primary_model_for_every_task(tmp_path, monkeypatch):
+    (tmp_path / "pyproject.toml").write_text(PYPROJECT)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LOCAL_MODEL_NAME", "default-model")
+    recorded = GeneratorFactory.create_generator("llm", provider="local", base_url="http://127.0.0.1:9/v1",
+                                                 use_cache=False, batch_recorder=BatchRecorder())
+    # `zenco batch apply` must look answers up under the model the job was recorded for
+    applying = GeneratorFactory.create_generator("llm", provider="local", base_url="http://127.0.0.1:9/v1",
+                                                 use_cache=False, route_models=False)
+
+    assert recorded.routes == applying.routes == {}
+    assert applying.fingerprint_scope == recorded.fingerprint_scope
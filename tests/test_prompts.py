@@ -0,0 +1,54 @@
+"""Tests for stable prompt prefixes and provider-side prompt caching."""
+from autodoc_ai.fake_server import FakeLLMServer
+from autodoc_ai.llm_services import AnthropicAdapter, OpenAIAdapter, TelemetryLLMService
+from autodoc_ai.prompts import build_prompt, chat_messages, split_prompt
+from autodoc_ai.telemetry import Telemetry
+from tests.helpers import CountingService
+
+
+class PromptRecordingService(CountingService):
+    def __init__(self):
+        super().__init__(response="NAME")
+        self.prompts = []
+
+    def create_completion(self, prompt, task="completion"):
+        self.prompts.append(prompt)
+        return super().create_completion(prompt, task)
+
+
+def test_instructions_are_identical_across_requests_of_a_task():
+    service = PromptRecordingService()
+    OpenAIAdapter.suggest_name(service, "x = load()", "x")
+    OpenAIAdapter.suggest_name(service, "rows = fetch()\nprint(rows)", "rows")
+    first, second = (split_prompt(prompt) for prompt in service.prompts)
+
+    assert first[0] == second[0]
+    assert "`x`" in first[1] and "`x`" not in first[0]
+    assert chat_messages(service.prompts[0]) == [{"role": "system", "content": first[0]},
+                                                 {"role": "user", "content": first[1]}]
+    assert chat_messages("plain") == [{"role": "user", "content": "plain"}]
+
+
+def test_anthropic_marks_the_instructions_for_caching():
+    args = AnthropicAdapter._message_args(build_prompt("Do the task.", "input"))
+    assert args["system"] == [{"type": "text", "text": "Do the task.", "cache_control": {"type": "ephemeral"}}]
+    assert args["messages"] == [{"role": "user", "content": "input"}]
+
+
+def test_cached_prompt_tokens_reach_telemetry():
+    server = FakeLLMServer(latency_ms=1, latency_distribution="fixed", seed=1).start()
+    try:
+        telemetry = Telemetry(prices={"fake-model": {"input": 1.0, "cached_input": 0.5, "output": 0.0}})
+        adapter = OpenAIAdapter(api_key="fake", model="fake-model", base_url=server.base_url)
+        service = TelemetryLLMService(adapter, telemetry)
+        service.suggest_constant_name("timeout = 86400", "86400")
+        service.suggest_constant_name("retries = 5", "5")
+    finally:
+        server.stop()
+
+    first, second = telemetry.records
+    assert first.cached_tokens == 0
+    assert 0 < second.cached_tokens < second.input_tokens
+    assert telemetry.summary()["cached_input_tokens"] == second.cached_tokens
+    # Cached input tokens are billed at the "cached_input" price
+    assert telemetry.cost(second) == (second.input_tokens - second.cached_tokens * 0.5) / 1_000_000
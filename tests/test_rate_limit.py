@@ -0,0 +1,70 @@
+"""Tests for the shared rate limiter and 429 backoff."""
+import time
+
+from autodoc_ai.llm_services import (
+    RateLimitedLLMService,
+    RateLimiter,
+    TokenBucket,
+    get_retry_after,
+    is_rate_limit_error,
+)
+from tests.helpers import CountingService
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after="0"):
+        super().__init__("rate limited")
+        self.response = FakeResponse({"retry-after": retry_after})
+
+
+class FlakyService(CountingService):
+    """Raises a 429 for the first `failures` calls."""
+    def __init__(self, failures):
+        super().__init__(response="OK")
+        self.failures = failures
+
+    def _complete(self, prompt, task):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise FakeRateLimitError()
+        return self.response
+
+
+def test_rate_limit_errors_are_detected_and_retry_after_is_read():
+    error = FakeRateLimitError(retry_after="2.5")
+    assert is_rate_limit_error(error)
+    assert get_retry_after(error) == 2.5
+    assert not is_rate_limit_error(ValueError("boom"))
+
+
+def test_rate_limited_service_retries_429_then_succeeds():
+    inner = FlakyService(failures=2)
+    limiter = RateLimiter(max_retries=3)
+    service = RateLimitedLLMService(inner, limiter)
+
+    assert service.create_completion("prompt") == "OK"
+    assert inner.calls == 3
+    assert limiter.rate_limited_count == 2
+
+
+def test_rate_limited_service_gives_up_after_max_retries():
+    inner = FlakyService(failures=10)
+    service = RateLimitedLLMService(inner, RateLimiter(max_retries=1))
+
+    assert service.create_completion("prompt") == ""
+    assert inner.calls == 2
+
+
+def test_token_bucket_blocks_once_empty():
+    bucket = TokenBucket(per_minute=600)  # 10 per second
+    bucket.level = 0
+    start = time.monotonic()
+    bucket.acquire(1)
+    assert time.monotonic() - start >= 0.08
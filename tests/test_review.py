@@ -0,0 +1,63 @@
+"""Tests for the fused docstring judge-and-rewrite request."""
+import json
+
+from autodoc_ai.fingerprints import FingerprintStore
+from autodoc_ai.generators import MockGenerator
+from autodoc_ai.llm_services import OpenAIAdapter
+from autodoc_ai.parser import get_language_parser
+from autodoc_ai.processors import DocstringProcessor
+from autodoc_ai.transformers import CodeTransformer
+from tests.helpers import CountingService
+
+
+class ReviewingGenerator(MockGenerator):
+    """Rewrites one-word docstrings and keeps the rest, in a single review call."""
+    def __init__(self):
+        self.reviews = 0
+
+    def review(self, node, docstring):
+        self.reviews += 1
+        return docstring if len(docstring) > 20 else "Adds two numbers and returns the sum."
+
+    def evaluate(self, node, docstring):
+        raise AssertionError("review should replace the separate evaluation request")
+
+    def generate(self, node):
+        raise AssertionError("review should replace the separate generation request")
+
+
+SOURCE = (b'def add(a, b):\n    """Add."""\n    return a + b\n\n\n'
+          b'def sub(a, b):\n    """Subtracts b from a and returns the difference."""\n    return a - b\n')
+
+
+def _run(generator, store):
+    tree = get_language_parser("python").parse(SOURCE)
+    transformer = CodeTransformer(SOURCE)
+    DocstringProcessor("python", tree, SOURCE, transformer, fingerprints=store).process(
+        generator=generator, overwrite_existing=True)
+    return transformer.apply_changes().decode("utf8")
+
+
+def test_review_judges_and_rewrites_in_one_request(tmp_path):
+    generator = ReviewingGenerator()
+    store = FingerprintStore(cache_dir=str(tmp_path))
+    first = _run(generator, store)
+    store.save()
+
+    assert generator.reviews == 2
+    assert "Adds two numbers and returns the sum." in first
+    assert '"""Subtracts b from a and returns the difference."""' in first
+
+    # Both the keep and the rewrite verdicts are reused for unchanged functions
+    assert _run(generator, FingerprintStore(cache_dir=str(tmp_path))) == first
+    assert generator.reviews == 2
+
+
+def test_review_docstring_parses_keep_rewrite_and_garbage():
+    keep = CountingService(response=json.dumps({"verdict": "keep"}))
+    assert OpenAIAdapter.review_docstring(keep, "def f(): pass", '"""Does f."""') == '"""Does f."""'
+
+    rewrite = CountingService(response='```json\n{"verdict": "rewrite", "docstring": " Does f. "}\n```')
+    assert OpenAIAdapter.review_docstring(rewrite, "def f(): pass", '"""f"""') == "Does f."
+
+    assert OpenAIAdapter.review_docstring(CountingService(response="YES"), "def f(): pass", '"""f"""') is None
@@ -0,0 +1,53 @@
+"""Tests for streamed completions and early-exit verdicts."""
+from autodoc_ai.cache import CachedLLMService, ResponseCache
+from autodoc_ai.generators import LLMGenerator
+from autodoc_ai.llm_services import LLMServiceWrapper
+from autodoc_ai.parser import get_language_parser
+from tests.helpers import CountingService
+
+
+class StreamingService(CountingService):
+    """Streams a fixed list of chunks and records how many were consumed."""
+    def __init__(self, chunks):
+        super().__init__(response="".join(chunks))
+        self.chunks = chunks
+        self.consumed = 0
+
+    def stream_completion(self, prompt, task="completion"):
+        self.calls += 1
+        for chunk in self.chunks:
+            self.consumed += 1
+            yield chunk
+
+
+def test_verdict_short_circuits_after_the_verdict_word():
+    inner = StreamingService(["YES", ".", " The docstring", " explains", " everything."])
+    service = LLMServiceWrapper(inner)
+
+    assert service.evaluate_docstring("def f(): pass", "Does f.") is True
+    assert inner.consumed == 2
+
+
+def test_verdict_does_not_mistake_not_for_no():
+    inner = StreamingService(["NO", "T sure, ", "but yes."])
+    assert LLMServiceWrapper(inner).evaluate_name("x = 1", "x") is True
+
+
+def test_short_circuited_verdicts_are_cached(tmp_path):
+    inner = StreamingService(["NO", "\n", "Explanation follows..."])
+    service = CachedLLMService(inner, ResponseCache(cache_dir=str(tmp_path)))
+
+    assert service.evaluate_docstring("def f(): pass", "Bad.") is False
+    assert service.evaluate_docstring("def f(): pass", "Bad.") is False
+    assert inner.calls == 1
+
+
+def test_generate_forwards_docstring_chunks_to_listener():
+    inner = StreamingService(["Adds ", "two numbers."])
+    generator = LLMGenerator(inner)
+    received = []
+    generator.stream_listener = lambda node, delta: received.append(delta)
+
+    node = get_language_parser("python").parse(b"def add(a, b):\n    return a + b\n").root_node.children[0]
+    assert generator.generate(node) == "Adds two numbers."
+    assert received == ["Adds ", "two numbers."]
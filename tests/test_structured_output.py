@@ -0,0 +1,85 @@
+"""Tests for structured-output requests and lenient JSON repair."""
+from types import SimpleNamespace
+
+from autodoc_ai.batch import build_batch_lines
+from autodoc_ai.fake_server import FakeLLMServer
+from autodoc_ai.llm_services import (
+    AnthropicAdapter,
+    GroqAdapter,
+    OpenAIAdapter,
+    extract_json,
+    failed_generation,
+    repair_json,
+)
+from tests.helpers import CountingService
+
+
+def test_repair_recovers_near_miss_json():
+    assert extract_json('Here you go:\n{"parameters": {"x": "int",}, "return_type": "str"}\nHope it helps!') == \
+        {"parameters": {"x": "int"}, "return_type": "str"}
+    assert repair_json("{'parameters': {'x': 'int'}, 'return_type': None}") == \
+        {"parameters": {"x": "int"}, "return_type": None}
+    # Truncated output keeps what was complete
+    assert repair_json('[{"id": 0, "docstring": "Uses {braces}."}, {"id": 1') == \
+        [{"id": 0, "docstring": "Uses {braces}."}, {"id": 1}]
+    assert repair_json("no JSON here") is None
+
+
+def test_malformed_type_hints_yield_empty_hints_not_none():
+    service = CountingService(response="I think x is an int.")
+    assert GroqAdapter.generate_type_hints(service, "def f(x): return x") == {"parameters": {}, "return_type": None}
+    service = CountingService(response='```json\n{"parameters": {"x": "int"}, "return_type": "int",}\n```')
+    assert OpenAIAdapter.generate_type_hints(service, "def f(x): return x") == \
+        {"parameters": {"x": "int"}, "return_type": "int"}
+
+
+def _adapter(server):
+    return OpenAIAdapter(api_key="fake", model="fake-model", base_url=server.base_url)
+
+
+def test_json_tasks_request_structured_output():
+    server = FakeLLMServer(latency_ms=1, latency_distribution="fixed", seed=1).start()
+    try:
+        adapter = _adapter(server)
+        hints = adapter.generate_type_hints("def scale(value, factor):\n    return value * factor")
+        adapter.suggest_name("x = load()", "x")
+        stats = dict(server.stats)
+    finally:
+        server.stop()
+
+    assert hints == {"parameters": {"value": "Any", "factor": "Any"}, "return_type": "None"}
+    assert stats["requests"] == 2 and stats["structured"] == 1
+
+
+def test_servers_without_json_mode_get_plain_requests():
+    server = FakeLLMServer(latency_ms=1, latency_distribution="fixed", seed=1, structured_output=False).start()
+    try:
+        adapter = _adapter(server)
+        first = adapter.generate_type_hints("def scale(value):\n    return value")
+        second = adapter.generate_type_hints("def shift(value):\n    return value")
+        stats = dict(server.stats)
+    finally:
+        server.stop()
+
+    assert first["parameters"] == {"value": "Any"} and second["parameters"] == {"value": "Any"}
+    assert adapter.structured_output is False
+    # Only the first request was rejected; the second went out without response_format
+    assert stats["requests"] == 3
+
+
+def test_provider_specific_json_modes():
+    args = AnthropicAdapter._tool_args("type_hints")
+    assert args["tool_choice"] == {"type": "tool", "name": "type_hints"}
+    assert args["tools"][0]["input_schema"]["required"] == ["parameters", "return_type"]
+    assert AnthropicAdapter._tool_args("suggest_name") == {}
+
+    lines = build_batch_lines([
+        {"key": "a", "model": "m", "task": "constant_names", "prompt": "p"},
+        {"key": "b", "model": "m", "task": "generate_docstring", "prompt": "p"},
+    ])
+    assert lines[0]["body"]["response_format"] == {"type": "json_object"}
+    assert "response_format" not in lines[1]["body"]
+
+    rejected = SimpleNamespace(body={"error": {"code": "json_validate_failed", "failed_generation": "{'a': 1,}"}})
+    assert failed_generation(rejected) == "{'a': 1,}"
+    assert failed_generation(ValueError("boom")) is None
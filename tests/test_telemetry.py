@@ -0,0 +1,55 @@
+"""Tests for per-call LLM telemetry."""
+import json
+
+from autodoc_ai.cache import CachedLLMService, ResponseCache
+from autodoc_ai.concurrency import RequestEngine
+from autodoc_ai.llm_services import TelemetryLLMService
+from autodoc_ai.telemetry import Telemetry, record_usage, telemetry_scope
+from tests.helpers import CountingService
+
+
+class UsageService(CountingService):
+    """Reports provider usage like the real adapters do."""
+    def _complete(self, prompt, task="completion"):
+        record_usage(100, 20)
+        return self.create_completion(prompt, task)
+
+
+def test_records_labels_usage_and_cache_hits_across_worker_threads(tmp_path):
+    telemetry = Telemetry(prices={"fake-model": {"input": 1.0, "output": 2.0}})
+    cached = CachedLLMService(UsageService(), ResponseCache(cache_dir=str(tmp_path)))
+    service = TelemetryLLMService(cached, telemetry)
+    engine = RequestEngine(max_in_flight=4)
+
+    def call(name):
+        with telemetry_scope(function=name):
+            return service.create_completion(f"document {name}", task="docstring")
+
+    with telemetry_scope(file="a.py"):
+        engine.map(call, ["f", "g", "f"])
+    engine.shutdown()
+
+    records = sorted(telemetry.records, key=lambda r: (r.function, r.cache or ""))
+    assert [(r.file, r.function) for r in records] == [("a.py", "f")] * 2 + [("a.py", "g")]
+    assert {r.cache for r in records} >= {"miss"}
+
+    summary = telemetry.summary()
+    task = summary["by_task"]["docstring"]
+    assert task["calls"] == 3
+    misses = 3 - task["cache_hits"]
+    assert task["input_tokens"] == 100 * misses
+    assert summary["cost_usd"] == round(misses * (100 * 1.0 + 20 * 2.0) / 1_000_000, 6)
+    assert summary["by_file"]["a.py"]["calls"] == 3
+
+
+def test_streams_fall_back_to_estimated_tokens_and_dump_jsonl(tmp_path):
+    telemetry = Telemetry()
+    service = TelemetryLLMService(CountingService(response="YES, it is."), telemetry)
+
+    assert service.evaluate_docstring("def f(): pass", "Does f.") is True
+
+    record = telemetry.records[0]
+    assert record.task == "evaluate_docstring" and record.streamed and record.tokens_estimated
+    path = tmp_path / "calls.jsonl"
+    telemetry.dump_jsonl(str(path))
+    assert json.loads(path.read_text().splitlines()[0])["task"] == "evaluate_docstring"
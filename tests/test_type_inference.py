@@ -0,0 +1,116 @@
+"""Tests for the local type-inference pass that runs before the LLM."""
+from autodoc_ai.generators import MockGenerator
+from autodoc_ai.parser import get_language_parser
+from autodoc_ai.processors import TypeHintProcessor
+from autodoc_ai.transformers import CodeTransformer
+from autodoc_ai.type_inference import RETURN, TypeInferencer, join_types
+
+
+SOURCE = (b"class Point:\n"
+          b"    def __init__(self, x=0, y=0):\n"
+          b"        self.x = x\n"
+          b"        self.y = y\n"
+          b"\n"
+          b"    def norm(self):\n"
+          b"        return (self.x ** 2 + self.y ** 2) ** 0.5\n"
+          b"\n"
+          b"\n"
+          b"def make_point(x, y):\n"
+          b"    assert isinstance(x, int)\n"
+          b"    assert isinstance(y, int)\n"
+          b"    return Point(x, y)\n"
+          b"\n"
+          b"\n"
+          b"def is_ready(count, limit=10):\n"
+          b"    return count >= limit\n"
+          b"\n"
+          b"\n"
+          b"def find(items, key):\n"
+          b"    for item in items:\n"
+          b"        if item == key:\n"
+          b"            return 1\n"
+          b"    return None\n"
+          b"\n"
+          b"\n"
+          b"make_point(1, 2).norm()\n"
+          b"is_ready(3)\n"
+          b"find([], 1)\n")
+
+
+def _functions(tree):
+    found = {}
+    stack = [tree.root_node]
+    while stack:
+        node = stack.pop()
+        if node.type == 'function_definition':
+            found[node.child_by_field_name('name').text.decode('utf8')] = node
+        stack.extend(node.children)
+    return found
+
+
+def test_infers_from_defaults_guards_and_returns():
+    tree = get_language_parser("python").parse(SOURCE)
+    inferencer = TypeInferencer(tree.root_node)
+    functions = _functions(tree)
+
+    assert inferencer.infer(functions['make_point']) == (
+        {"parameters": {"x": "int", "y": "int"}, "return_type": "Point"}, [])
+    assert inferencer.infer(functions['__init__']) == (
+        {"parameters": {"x": "int", "y": "int"}, "return_type": "None"}, [])
+    # `self.x` is an int from __init__, and `** 0.5` widens the result to float
+    assert inferencer.infer(functions['norm']) == ({"parameters": {}, "return_type": "float"}, [])
+    # `count` is only compared, so its type stays with the LLM
+    assert inferencer.infer(functions['is_ready']) == (
+        {"parameters": {"limit": "int"}, "return_type": "bool"}, ["count"])
+    assert inferencer.infer(functions['find']) == (
+        {"parameters": {}, "return_type": "Optional[int]"}, ["items", "key"])
+
+
+def test_join_types():
+    assert join_types(["int", "float"]) == "float"
+    assert join_types(["str", "None"]) == "Optional[str]"
+    assert join_types(["str", "int"]) is None
+    assert join_types(["int", None]) is None
+
+
+class CompletingGenerator(MockGenerator):
+    """Records which functions reach the LLM and what was already known about them."""
+    def __init__(self):
+        self.asked = {}
+
+    def complete_type_hints(self, node, known):
+        name = node.child_by_field_name('name').text.decode('utf8')
+        self.asked[name] = known
+        # A conflicting answer for an inferred hint must not override it
+        return {"parameters": {"count": "int", "items": "list", "key": "Any", "limit": "float"},
+                "return_type": "str"}
+
+    def generate_type_hints(self, node):
+        raise AssertionError("the processor should ask only for the missing hints")
+
+
+def test_processor_only_asks_the_llm_about_unresolved_functions():
+    tree = get_language_parser("python").parse(SOURCE)
+    transformer = CodeTransformer(SOURCE)
+    generator = CompletingGenerator()
+    processor = TypeHintProcessor("python", tree, SOURCE, transformer)
+    processor.process(generator=generator)
+    result = transformer.apply_changes().decode("utf8")
+
+    assert processor.resolved_locally == 2  # norm and make_point; __init__ is not annotated
+    assert set(generator.asked) == {"is_ready", "find"}
+    assert generator.asked["is_ready"] == {"parameters": {"limit": "int"}, "return_type": "bool"}
+    assert "def make_point(x: int, y: int) -> Point:" in result
+    assert "def is_ready(count: int, limit: int = 10) -> bool:" in result
+    assert "def find(items: list, key: Any) -> Optional[int]:" in result
+    assert RETURN not in generator.asked["is_ready"]["parameters"]
+
+
+def test_processor_skips_other_languages():
+    source = b"function add(a, b) {\n  return a + b;\n}\n"
+    transformer = CodeTransformer(source)
+    processor = TypeHintProcessor("javascript", get_language_parser("javascript").parse(source), source, transformer)
+    processor.process(generator=CompletingGenerator())
+
+    assert processor.resolved_locally == 0
+    assert transformer.apply_changes() == source